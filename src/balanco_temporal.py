@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Balanço de massa resolvido no tempo (diário e horário).
+
+O balanço global (extrator_dados._montar_balanco) compara apenas os
+totais do período. Aqui a mesma conta é feita dia a dia: o volume horário
+de cada cliente (Volume_Nm3h) é somado nos dias de gás da entrada
+(Concessionaria_Nm3d), e para cada dia saem entrada, saída, diferença e as
+bandas de incerteza RSS.
+
+Alinhamento: os carimbos horários dos clientes marcam o FIM da hora
+(01:00 … 24:00 pertencem ao dia D, como nas planilhas). Com a hora h
+(desde a época) e o dia de gás começando às ``inicio_dia_gas`` horas, a
+posição na grade densa é
+
+    k = h − 1 − inicio_dia_gas − 24 · d0
+
+e a grade (C, dias · 24) é remodelada para (C, dias, 24) e somada no
+último eixo: sem groupby e sem ordenar, linear no número de horas (anos de
+dados em poucos milissegundos).
+
+Clientes sem dados horários entram com o volume de referência rateado
+igualmente pelos dias. A ``Cobertura`` de cada dia é a fração das horas
+medidas ponderada pela participação de cada cliente no volume total, de
+modo que falhas num cliente pequeno quase não afetam o dia.
+
+Uso:
+    from balanco_temporal import balanco_diario, resumir_diario
+    df = balanco_diario(snapshot.volumes, snapshot.clientes, u_entrada=0.0152, u_saida=0.0619)
+    resumir_diario(df)["dif_media_pct"]
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from dados_horarios import COLUNAS, ClientesHorarios, horas_epoch
+from estatisticas import resumir
+
+logger = logging.getLogger(__name__)
+
+COBERTURA_MINIMA = 0.99  # dias abaixo disso ficam fora das estatísticas
+
+
+def _bandas(df: pd.DataFrame, u_entrada: float, u_saida: float) -> pd.DataFrame:
+    """Acrescenta diferença, diferença % e bandas RSS às colunas Entrada_Nm3/Saida_Nm3."""
+    entrada, saida = df["Entrada_Nm3"].to_numpy(), df["Saida_Nm3"].to_numpy()
+    df["Dif_Nm3"] = entrada - saida
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df["Dif_Pct"] = np.where(entrada != 0, (entrada - saida) / entrada * 100, np.nan)
+    df["Entrada_Min"] = entrada * (1 - u_entrada)
+    df["Entrada_Max"] = entrada * (1 + u_entrada)
+    df["Saida_Min"] = saida * (1 - u_saida)
+    df["Saida_Max"] = saida * (1 + u_saida)
+    df["Sobrepoe"] = (df["Entrada_Min"] <= df["Saida_Max"]) & (df["Saida_Min"] <= df["Entrada_Max"])
+    return df
+
+
+def balanco_diario(
+    volumes: pd.DataFrame,
+    clientes: ClientesHorarios,
+    u_entrada: float,
+    u_saida: float,
+    referencias: dict[str, float] | None = None,
+    inicio_dia_gas: int = 0,
+) -> pd.DataFrame:
+    """Balanço de cada dia de gás.
+
+    Args:
+        volumes: Volumes de entrada (Data diária, Concessionaria_Nm3d).
+        clientes: Grade horária dos clientes.
+        u_entrada, u_saida: Incertezas RSS relativas (fração) de entrada e saída.
+        referencias: Volume de referência do período (Nm³) por nome de
+            cliente, usado para os clientes sem dados horários.
+        inicio_dia_gas: Hora em que começa o dia de gás (0 = meia-noite).
+
+    Returns:
+        DataFrame com uma linha por dia: Data, Entrada_Nm3, Saida_Nm3,
+        Dif_Nm3, Dif_Pct, Entrada_Min/Max, Saida_Min/Max, Sobrepoe, Cobertura.
+    """
+    referencias = referencias or {}
+    dias_ent = horas_epoch(volumes["Data"].to_numpy("datetime64[ns]")) // 24
+    if not dias_ent.size:
+        return _bandas(pd.DataFrame({"Data": pd.to_datetime([]), "Entrada_Nm3": [], "Saida_Nm3": [],
+                                     "Cobertura": []}), u_entrada, u_saida)
+    d0 = int(dias_ent.min())
+    nd = int(dias_ent.max()) - d0 + 1
+
+    entrada = np.full(nd, np.nan)
+    entrada[dias_ent - d0] = volumes["Concessionaria_Nm3d"].to_numpy(np.float64)
+
+    # Grade densa (C, nd·24) com as horas de cada dia de gás em sequência
+    k = clientes.horas - 1 - inicio_dia_gas - d0 * 24
+    dentro = (k >= 0) & (k < nd * 24)
+    c = len(clientes)
+    grade = np.full((c, nd * 24), np.nan, dtype=np.float32)
+    grade[:, k[dentro]] = clientes.valores[:, COLUNAS.index("Volume_Nm3h"), dentro]
+    grade = grade.reshape(c, nd, 24)
+
+    saida_cli = np.nansum(grade, axis=2, dtype=np.float64)          # (C, nd)
+    horas_cli = np.count_nonzero(~np.isnan(grade), axis=2) / 24       # (C, nd)
+
+    totais = np.empty(c)
+    for i, aba in enumerate(clientes):
+        if clientes.sem_dados(aba):
+            ref = referencias.get(clientes.nomes[aba], 0.0)
+            saida_cli[i] = ref / nd
+            horas_cli[i] = 1.0
+            totais[i] = ref
+        else:
+            totais[i] = clientes.soma(aba)
+    pesos = totais / totais.sum() if totais.sum() else np.full(c, 1 / max(c, 1))
+
+    df = pd.DataFrame({
+        "Data": ((d0 + np.arange(nd)) * 24 * 3_600 * 10**9).view("datetime64[ns]"),
+        "Entrada_Nm3": entrada,
+        "Saida_Nm3": saida_cli.sum(axis=0),
+        "Cobertura": pesos @ horas_cli,
+    })
+    return _bandas(df, u_entrada, u_saida)
+
+
+def balanco_horario(
+    datas,
+    entrada_nm3h,
+    clientes: ClientesHorarios,
+    u_entrada: float,
+    u_saida: float,
+) -> pd.DataFrame:
+    """Balanço hora a hora, quando há medição horária da entrada.
+
+    ``datas``/``entrada_nm3h`` usam a mesma convenção de fim de hora dos
+    clientes; cada hora da entrada é casada com a mesma hora da grade por
+    busca binária (sem merge).
+
+    Returns:
+        DataFrame com Data, Entrada_Nm3, Saida_Nm3, diferença, bandas e
+        Clientes (número de clientes medidos na hora).
+    """
+    horas = horas_epoch(np.asarray(datas, dtype="datetime64[ns]"))
+    c, h = len(clientes), clientes.horas.size
+    if h:
+        pos = np.searchsorted(clientes.horas, horas).clip(max=h - 1)
+        vol = clientes.valores[:, COLUNAS.index("Volume_Nm3h")][:, pos]   # (C, n)
+        vol = np.where(clientes.horas[pos] == horas, vol, np.nan)
+    else:
+        vol = np.full((c, horas.size), np.nan, dtype=np.float32)
+    df = pd.DataFrame({
+        "Data": (horas * 3_600 * 10**9).view("datetime64[ns]"),
+        "Entrada_Nm3": np.asarray(entrada_nm3h, dtype=np.float64),
+        "Saida_Nm3": np.nansum(vol, axis=0, dtype=np.float64),
+        "Clientes": np.count_nonzero(~np.isnan(vol), axis=0),
+    })
+    return _bandas(df, u_entrada, u_saida)
+
+
+def resumir_diario(df: pd.DataFrame, cobertura_minima: float = COBERTURA_MINIMA) -> dict:
+    """Estatísticas da diferença % sobre os dias completos (entrada medida e cobertura suficiente)."""
+    completos = df["Entrada_Nm3"].notna() & (df["Cobertura"] >= cobertura_minima)
+    r = resumir(df.loc[completos, ["Dif_Pct"]])["Dif_Pct"]
+    return {
+        "dias": int(len(df)),
+        "dias_completos": int(completos.sum()),
+        "dias_sobrepoem": int(df.loc[completos, "Sobrepoe"].sum()),
+        "dif_media_pct": r["media"],
+        "dif_desvio_pct": r["desvio"],
+        "dif_min_pct": r["min"],
+        "dif_max_pct": r["max"],
+        "completos": completos.to_numpy(),
+    }
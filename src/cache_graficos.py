@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de renderização dos gráficos, endereçado por conteúdo.
+
+Cada PNG tem uma impressão digital (SHA-256) composta por:
+
+    dados        bytes exatos do que a figura plota (payload de ``_dados_*``:
+                 arrays, DataFrames, listas e escalares, em ordem)
+    figura       fonte da função ``_fig_*`` e das funções e classes do
+                 projeto que ela usa (em qualquer módulo de src/), valor
+                 das constantes globais lidas, parâmetros de gravação (SAVE_KW)
+    versões      matplotlib e seaborn
+
+O armazém fica em GRAFICOS_CACHE_DIR: ``objetos/<sha256 do PNG>.png``
+guarda cada imagem uma única vez e ``impressoes/<impressão>`` aponta para
+o objeto renderizado com aquela impressão; ``variantes/<sha256>.<perfil>``
+guarda as variantes leves de cada PNG (variantes_graficos.py), que
+dependem só do conteúdo do PNG mestre. No diretório de saída,
+``graficos_manifesto.json`` registra a impressão, o SHA-256 e a origem de
+cada PNG da última geração:
+
+    inalterado   o arquivo já estava no diretório com a mesma impressão
+    copiado      copiado do armazém (renderizado antes, em outro diretório ou execução)
+    renderizado  desenhado nesta geração
+
+Assim, refazer só as seções do LLM ou corrigir uma aba de cliente
+redesenha apenas os gráficos cujos dados de fato mudaram.
+
+O armazém é limitado a GRAFICOS_CACHE_MAX_MB (LRU pelo mtime dos objetos
+e das variantes).
+
+Uso:
+    from cache_graficos import ManifestoGraficos, impressao_grafico, restaurar, guardar
+    impressao = impressao_grafico(dados, _fig_pcs_serie, SAVE_KW)
+    if not restaurar(impressao, out / "pcs_serie.png"): ...
+"""
+import ast
+import dis
+import hashlib
+import importlib
+import inspect
+import json
+import linecache
+import logging
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from functools import cache, cached_property, lru_cache
+from pathlib import Path
+from typing import Callable
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from cache_planilha import hash_arquivo
+from config import GRAFICOS_CACHE_DIR, GRAFICOS_CACHE_MAX_MB, SRC_DIR
+
+logger = logging.getLogger(__name__)
+
+MANIFESTO_GRAFICOS = "graficos_manifesto.json"
+VERSAO_MANIFESTO = 1
+
+# Incrementar se a impressão passar a cobrir outra coisa (invalida o armazém)
+VERSAO_IMPRESSAO = "2"
+
+INALTERADO, COPIADO, RENDERIZADO = "inalterado", "copiado", "renderizado"
+
+
+def _atualizar(h, obj):
+    """Alimenta ``h`` com o conteúdo de um payload (tipos e valores, em ordem)."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(f"DataFrame{list(obj.columns)!r}{list(obj.dtypes.astype(str))}".encode())
+        h.update(repr(list(obj.index.names)).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(f"Series{obj.name!r}{obj.dtype}".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"ndarray{obj.dtype.str}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else repr(obj.tolist()).encode())
+    elif isinstance(obj, dict):
+        h.update(f"dict{len(obj)}".encode())
+        for k, v in obj.items():
+            _atualizar(h, k)
+            _atualizar(h, v)
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for v in obj:
+            _atualizar(h, v)
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+    h.update(b"\0")
+
+
+def _do_projeto(obj) -> bool:
+    """True se ``obj`` (função, classe ou módulo) foi definido num módulo de src/."""
+    modulo = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, "__module__", None))
+    arquivo = getattr(modulo, "__file__", None)
+    return bool(arquivo) and Path(arquivo).resolve().is_relative_to(SRC_DIR)
+
+
+def _constante(obj) -> bool:
+    """True para valores puros (números, textos e coleções deles), cujo repr é estável."""
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        return True
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return all(_constante(v) for v in obj)
+    if isinstance(obj, dict):
+        return all(_constante(k) and _constante(v) for k, v in obj.items())
+    return False
+
+
+@cache
+def _modulos_src() -> frozenset[str]:
+    return frozenset(p.stem for p in SRC_DIR.glob("*.py"))
+
+
+@cache
+def _importados(codigo) -> tuple[str, ...]:
+    """Módulos de src/ importados por ``codigo`` (``import``/``from`` em qualquer ponto)."""
+    if _modulos_src().isdisjoint(codigo.co_names):
+        return ()
+    return tuple(instr.argval for instr in dis.get_instructions(codigo)
+                 if instr.opname == "IMPORT_NAME" and instr.argval in _modulos_src())
+
+
+@lru_cache(maxsize=64)
+def _definicoes(fonte: str) -> dict[str, str]:
+    """Fonte de cada função e classe de nível superior de um módulo (um único parse)."""
+    linhas = fonte.splitlines(keepends=True)
+    return {
+        no.name: "".join(linhas[min([no.lineno] + [d.lineno for d in no.decorator_list]) - 1:no.end_lineno])
+        for no in ast.parse(fonte).body
+        if isinstance(no, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    }
+
+
+@cache
+def _fonte_objeto(obj) -> str:
+    """Fonte de uma função ou classe (objetos carregados não mudam de fonte; reload cria outros)."""
+    arquivo = getattr(sys.modules.get(obj.__module__), "__file__", None)
+    if arquivo and "." not in obj.__qualname__:
+        fonte = _definicoes("".join(linecache.getlines(arquivo))).get(obj.__qualname__)
+        if fonte is not None:
+            return fonte
+    return inspect.getsource(obj)
+
+
+def _modulos_usados(codigo, escopo: dict) -> list:
+    """Módulos de src/ que ``codigo`` importa (inclusive dentro da função) ou usa por alias global."""
+    modulos = [escopo[n] for n in codigo.co_names if inspect.ismodule(escopo.get(n))]
+    modulos += [importlib.import_module(nome) for nome in _importados(codigo)]
+    return [m for m in modulos if _do_projeto(m)]
+
+
+def _funcoes_classe(cls) -> list[Callable]:
+    """Funções definidas na classe, inclusive classmethod, staticmethod, property e cached_property."""
+    funcoes = []
+    for m in vars(cls).values():
+        if isinstance(m, (classmethod, staticmethod)):
+            m = m.__func__
+        elif isinstance(m, cached_property):
+            m = m.func
+        candidatas = (m.fget, m.fset, m.fdel) if isinstance(m, property) else (m,)
+        funcoes.extend(c for c in candidatas if inspect.isfunction(c))
+    return funcoes
+
+
+def dependencias_fonte(fn: Callable) -> list[tuple[str, str]]:
+    """(nome qualificado, fonte) de ``fn`` e de tudo do projeto que ela usa (recursivo).
+
+    Segue as funções e classes chamadas em qualquer módulo de src/ (não só
+    no de ``fn``), inclusive as importadas dentro de funções ou acessadas
+    como atributo de um módulo, e registra o valor das constantes globais
+    lidas, como ``COMPLETUDE_ALERTA_PCT`` ou ``PASSADAS``.
+    """
+    vistas, lidas, deps, pendentes = set(), set(), [], [fn]
+    while pendentes:
+        f = pendentes.pop()
+        if id(f) in vistas:
+            continue
+        vistas.add(id(f))
+        deps.append((f"{f.__module__}.{f.__qualname__}", _fonte_objeto(f)))
+        if inspect.isclass(f):
+            codigos = [m.__code__ for m in _funcoes_classe(f)]
+            escopo = sys.modules[f.__module__].__dict__
+        else:
+            codigos = [f.__code__]
+            escopo = f.__globals__
+        while codigos:  # inclui lambdas e funções aninhadas
+            codigo = codigos.pop()
+            codigos.extend(c for c in codigo.co_consts if inspect.iscode(c))
+            modulos = _modulos_usados(codigo, escopo)
+            for nome in codigo.co_names:
+                if nome in escopo:
+                    g, origem = escopo[nome], escopo["__name__"]
+                else:
+                    m = next((m for m in modulos if nome in vars(m)), None)
+                    if m is None:
+                        continue
+                    g, origem = vars(m)[nome], m.__name__
+                if (inspect.isfunction(g) or inspect.isclass(g)) and _do_projeto(g):
+                    pendentes.append(g)
+                elif _constante(g) and not nome.startswith("__"):
+                    chave = f"{origem}.{nome}"
+                    if chave not in lidas:
+                        lidas.add(chave)
+                        deps.append((chave, f"{chave} = {g!r}"))
+    return deps
+
+
+def _fontes(fn: Callable) -> list[str]:
+    """Fonte de ``fn``, das funções e classes do projeto que ela usa e das constantes lidas."""
+    return [fonte for _, fonte in dependencias_fonte(fn)]
+
+
+def impressao_grafico(dados, desenhar: Callable, save_kw: dict) -> str:
+    """Impressão digital de um PNG: payload + função de desenho + parâmetros + versões."""
+    h = hashlib.sha256()
+    h.update(f"v{VERSAO_IMPRESSAO}|mpl {matplotlib.__version__}|sns {sns.__version__}|".encode())
+    h.update(repr(sorted(save_kw.items())).encode())
+    for fonte in _fontes(desenhar):
+        h.update(fonte.encode("utf-8"))
+    _atualizar(h, dados)
+    return h.hexdigest()
+
+
+def _objeto(sha: str) -> Path:
+    return GRAFICOS_CACHE_DIR / "objetos" / f"{sha}.png"
+
+
+def _referencia(impressao: str) -> Path:
+    return GRAFICOS_CACHE_DIR / "impressoes" / impressao
+
+
+def _variante(sha: str, nome: str) -> Path:
+    return GRAFICOS_CACHE_DIR / "variantes" / f"{sha}.{nome}"
+
+
+def _copiar(origem: Path, destino: Path):
+    # Cópia para temporário + rename: nenhum leitor vê um PNG pela metade
+    tmp = destino.with_name(f".{destino.name}.tmp-{os.getpid()}")
+    try:
+        shutil.copyfile(origem, tmp)
+        os.replace(tmp, destino)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def restaurar(impressao: str, destino: str | Path) -> str | None:
+    """Copia para ``destino`` o PNG renderizado com ``impressao``; devolve o SHA-256 ou None."""
+    ref = _referencia(impressao)
+    try:
+        sha = ref.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    objeto = _objeto(sha)
+    if not objeto.exists():
+        ref.unlink(missing_ok=True)
+        return None
+    try:
+        _copiar(objeto, Path(destino))
+        os.utime(objeto)  # marca como usado recentemente (LRU)
+    except OSError as e:
+        logger.warning(f"Cache de gráficos: falha ao restaurar {Path(destino).name}: {e}")
+        return None
+    return sha
+
+
+def guardar(impressao: str, arquivo: str | Path) -> str:
+    """Guarda um PNG recém-renderizado no armazém; devolve o SHA-256 do conteúdo."""
+    sha = hash_arquivo(arquivo)
+    try:
+        objeto = _objeto(sha)
+        objeto.parent.mkdir(parents=True, exist_ok=True)
+        if objeto.exists():
+            os.utime(objeto)
+        else:
+            _copiar(Path(arquivo), objeto)
+        ref = _referencia(impressao)
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ref.with_name(f".{ref.name}.tmp-{os.getpid()}")
+        tmp.write_text(sha, encoding="utf-8")
+        os.replace(tmp, ref)
+    except OSError as e:
+        logger.warning(f"Falha ao gravar cache de gráficos: {e}")
+    return sha
+
+
+def restaurar_variante(sha: str, nome: str, destino: str | Path) -> bool:
+    """Copia para ``destino`` a variante ``nome`` (ex.: "llm.png") do PNG com SHA-256 ``sha``."""
+    objeto = _variante(sha, nome)
+    if not objeto.exists():
+        return False
+    try:
+        _copiar(objeto, Path(destino))
+        os.utime(objeto)
+    except OSError as e:
+        logger.warning(f"Cache de gráficos: falha ao restaurar {Path(destino).name}: {e}")
+        return False
+    return True
+
+
+def guardar_variante(sha: str, nome: str, arquivo: str | Path):
+    """Guarda no armazém a variante ``nome`` do PNG com SHA-256 ``sha``."""
+    try:
+        objeto = _variante(sha, nome)
+        objeto.parent.mkdir(parents=True, exist_ok=True)
+        _copiar(Path(arquivo), objeto)
+    except OSError as e:
+        logger.warning(f"Falha ao gravar cache de gráficos: {e}")
+
+
+def limpar_cache(max_mb: float = GRAFICOS_CACHE_MAX_MB) -> int:
+    """Remove os objetos e variantes menos recentemente usados até caber em ``max_mb``.
+
+    Referências para objetos removidos são descartadas na próxima leitura.
+
+    Returns:
+        Número de arquivos removidos.
+    """
+    arquivos = [*(GRAFICOS_CACHE_DIR / "objetos").glob("*.png"), *(GRAFICOS_CACHE_DIR / "variantes").glob("*.*")]
+    if not arquivos:
+        return 0
+    objetos = [(p.stat().st_mtime, p.stat().st_size, p) for p in arquivos]
+    total = sum(t for _, t, _ in objetos)
+    limite = max_mb * 1024 * 1024
+    removidos = 0
+    for _, tamanho, p in sorted(objetos):
+        if total <= limite:
+            break
+        p.unlink(missing_ok=True)
+        total -= tamanho
+        removidos += 1
+    if removidos:
+        logger.info(f"Cache de gráficos: {removidos} arquivos removidos (LRU)")
+    return removidos
+
+
+@dataclass
+class ManifestoGraficos:
+    """Impressão, SHA-256 e origem de cada PNG de um diretório de gráficos."""
+    graficos: dict[str, dict] = field(default_factory=dict)
+    path: Path = Path(MANIFESTO_GRAFICOS)
+
+    @classmethod
+    def carregar(cls, output_dir: str | Path) -> "ManifestoGraficos":
+        path = Path(output_dir) / MANIFESTO_GRAFICOS
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path=path)
+        if raw.get("versao") != VERSAO_MANIFESTO:
+            return cls(path=path)
+        return cls(graficos=raw.get("graficos", {}), path=path)
+
+    def inalterado(self, arquivo: str, impressao: str) -> bool:
+        """True se o PNG no diretório foi gerado com ``impressao`` e não foi alterado desde então."""
+        registro = self.graficos.get(arquivo)
+        destino = self.path.parent / arquivo
+        if not registro or registro.get("impressao") != impressao or not destino.exists():
+            return False
+        return hash_arquivo(destino) == registro.get("sha256")
+
+    def registrar(self, arquivo: str, impressao: str, sha: str, origem: str):
+        self.graficos[arquivo] = {"impressao": impressao, "sha256": sha, "origem": origem}
+
+    def remover(self, arquivo: str):
+        self.graficos.pop(arquivo, None)
+
+    def reaproveitados(self) -> list[str]:
+        """PNGs da última geração que não foram desenhados (inalterados ou copiados)."""
+        return [f for f, r in self.graficos.items() if r.get("origem") != RENDERIZADO]
+
+    def salvar(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"versao": VERSAO_MANIFESTO, "graficos": self.graficos},
+                                  indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Cache colunar (Parquet) das abas do Excel já parseadas.
+
+Cada entrada é um diretório em PLANILHAS_CACHE_DIR cujo nome combina o
+SHA-256 do workbook e a versão dos loaders; dentro dele, um arquivo Parquet
+por aba, gravado quando a aba é parseada pela primeira vez (o snapshot
+carrega as abas sob demanda, então uma entrada pode estar parcial).
+Reenvios do mesmo Excel (modo --resume, /api/phase/extract,
+/api/phase/graphs, lambdas do Vercel) carregam as colunas direto do
+Parquet, sem passar pelo openpyxl.
+
+O diretório é limitado a PLANILHAS_CACHE_MAX_MB: as entradas acessadas há
+mais tempo são removidas primeiro (LRU pelo mtime do diretório).
+
+Uso:
+    from cache_planilha import chave_cache, carregar_aba, salvar_abas
+    chave = chave_cache(excel_path, versao="1")
+    df = carregar_aba(chave, "volumes")  # None se não houver cache
+    salvar_abas(chave, {"volumes": df, ...})
+"""
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+from config import PLANILHAS_CACHE_DIR, PLANILHAS_CACHE_MAX_MB
+
+try:
+    import pyarrow  # noqa: F401  (engine do to_parquet/read_parquet)
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+logger = logging.getLogger(__name__)
+
+
+def hash_arquivo(path: str | Path, bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo (lido em blocos de 1 MB)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(bloco), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def chave_cache(excel_path: str | Path, versao: str) -> str:
+    """Chave de cache: SHA-256 do workbook + versão dos loaders."""
+    return f"{hash_arquivo(excel_path)}-v{versao}"
+
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza dtypes antes de gravar: datas em ns, numéricos float64 (float32 preservado), texto str.
+
+    Colunas object com números (ex.: Dif_Abs/Dif_Pct, que o Excel pode trazer
+    com células de texto) viram float64, com o texto como NaN; só colunas
+    puramente textuais (ex.: "Aba" das horas duplicadas) são gravadas como str.
+    """
+    df = df.copy()
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            df[col] = serie.astype("datetime64[ns]")
+        elif serie.dtype == "float32":
+            continue
+        elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            df[col] = serie.astype("float64")
+        elif serie.dtype == object:
+            numeros = pd.to_numeric(serie, errors="coerce")
+            if numeros.notna().any() and pd.api.types.infer_dtype(serie, skipna=True) != "string":
+                df[col] = numeros.astype("float64")
+            else:
+                df[col] = serie.astype(str)
+    return df
+
+
+def _arquivo(aba: str) -> str:
+    """Nome do arquivo Parquet de uma aba (nome da aba escapado)."""
+    return quote(aba, safe="") + ".parquet"
+
+
+def carregar_aba(chave: str, aba: str) -> pd.DataFrame | None:
+    """Carrega uma aba de uma entrada do cache, ou None se ausente/corrompida."""
+    if not HAS_PARQUET:
+        return None
+    entrada = PLANILHAS_CACHE_DIR / chave
+    arquivo = entrada / _arquivo(aba)
+    if not arquivo.exists():
+        return None
+    try:
+        df = pd.read_parquet(arquivo)
+    except Exception as e:
+        logger.warning(f"Cache de planilha inválido ({chave[:12]}/{aba}): {e}")
+        arquivo.unlink(missing_ok=True)
+        return None
+    os.utime(entrada)  # marca como usado recentemente (LRU)
+    return df
+
+
+def carregar_abas(chave: str, abas: list[str]) -> dict[str, pd.DataFrame] | None:
+    """Carrega várias abas; None se qualquer uma estiver ausente."""
+    dados = {}
+    for aba in abas:
+        df = carregar_aba(chave, aba)
+        if df is None:
+            return None
+        dados[aba] = df
+    logger.info(f"Cache de planilha: {len(dados)} abas carregadas ({chave[:12]})")
+    return dados
+
+
+def _gravar(entrada: Path, aba: str, df: pd.DataFrame):
+    # Escrita em arquivo temporário + rename: lambdas concorrentes nunca
+    # leem uma aba pela metade.
+    destino = entrada / _arquivo(aba)
+    tmp = entrada / f".{destino.name}.tmp-{os.getpid()}"
+    try:
+        _normalizar(df).to_parquet(tmp, index=False)
+        os.replace(tmp, destino)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def salvar_abas(chave: str, abas: dict[str, pd.DataFrame]):
+    """Grava as abas em Parquet (um arquivo por aba) e aplica a política de eviction LRU."""
+    if not HAS_PARQUET:
+        return
+    entrada = PLANILHAS_CACHE_DIR / chave
+    try:
+        entrada.mkdir(parents=True, exist_ok=True)
+        for aba, df in abas.items():
+            _gravar(entrada, aba, df)
+        os.utime(entrada)
+    except Exception as e:
+        logger.warning(f"Falha ao gravar cache de planilha: {e}")
+        return
+    logger.info(f"Cache de planilha: {len(abas)} abas gravadas ({chave[:12]})")
+    limpar_cache()
+
+
+def _tamanho(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def limpar_cache(max_mb: float = PLANILHAS_CACHE_MAX_MB) -> list[str]:
+    """Remove as entradas menos recentemente usadas até caber em ``max_mb``.
+
+    Returns:
+        Lista de chaves removidas.
+    """
+    if not PLANILHAS_CACHE_DIR.exists():
+        return []
+    entradas = [
+        (d.stat().st_mtime, _tamanho(d), d)
+        for d in PLANILHAS_CACHE_DIR.iterdir()
+        if d.is_dir() and not d.name.startswith(".")
+    ]
+    total = sum(t for _, t, _ in entradas)
+    limite = max_mb * 1024 * 1024
+    removidas = []
+    for _, tamanho, d in sorted(entradas):
+        if total <= limite:
+            break
+        shutil.rmtree(d, ignore_errors=True)
+        total -= tamanho
+        removidas.append(d.name)
+    if removidas:
+        logger.info(f"Cache de planilha: {len(removidas)} entradas removidas (LRU)")
+    return removidas
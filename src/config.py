@@ -39,6 +39,20 @@ else:
     REPORTS_DIR = OUTPUTS_DIR / "reports"
     PRESENT_DIR = OUTPUTS_DIR / "presentations"
 
+# Cache colunar (Parquet) das abas do Excel, indexado pelo SHA-256 do arquivo.
+# Limitado por tamanho (LRU) para não esgotar o /tmp das lambdas do Vercel.
+PLANILHAS_CACHE_DIR = CACHE_DIR / "planilhas"
+PLANILHAS_CACHE_MAX_MB = 128 if IS_VERCEL else 1024
+
+# Armazém de PNGs já renderizados, indexado pela impressão digital de cada
+# gráfico (dados plotados + código da figura + versões); ver cache_graficos.py.
+GRAFICOS_CACHE_DIR = CACHE_DIR / "graficos"
+GRAFICOS_CACHE_MAX_MB = 64 if IS_VERCEL else 512
+
+# Pools de processos (parsing paralelo de abas). Desligados no Vercel:
+# as lambdas não têm /dev/shm nem semáforos POSIX para o multiprocessing.
+USAR_PROCESSOS = not IS_VERCEL
+
 # Arquivo Excel padrão (para automação futura)
 EXCEL_DEFAULT = "Analise de Condições de Operação de Distrito.xlsx"
 
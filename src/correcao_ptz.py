@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Correção PTZ vetorizada das condições de operação para as de referência.
+
+Equação de metodologia/equacoes.json ("Cálculo do Volume Corrigido"):
+
+    V_ref = V_op × FC_P × FC_T × FC_Z × F_M
+
+    FC_P = P / P_ref          (pressões absolutas, bar)
+    FC_T = T_ref / T          (temperaturas absolutas, K)
+    FC_Z = Z_ref / Z          (compressibilidade nas duas condições)
+    F_M  = fator do medidor   (1 quando não informado)
+
+Referência: 20 °C e 1,01325 bar (condições de referência da ANP). O fator
+de compressibilidade vem da correlação explícita de Papay sobre as
+propriedades pseudocríticas de Sutton (densidade relativa), com correção
+de Wichert-Aziz para o CO2 — expressões fechadas, sem iteração, que
+avaliam milhões de leituras por segundo em arrays NumPy. Na faixa de
+distribuição (até ~20 bar, 0–40 °C) concorda com o AGA-8 em poucos
+décimos de ponto percentual. SGERG-88/AGA-8 exigem a composição e as
+tabelas de coeficientes da ISO 12213; ``fator_z`` é o ponto de troca do
+método quando a cromatografia estiver disponível.
+
+As planilhas dos clientes já trazem o volume nas condições de referência
+(Volume_Nm3h) junto com Pressao_bara e Temperatura_C. Sem a leitura bruta
+do medidor, o volume de operação é reconstruído (V_op = V_ref / FC_PTZ) e
+a verificação por cliente mede:
+
+    horas inválidas   volume medido com P/T ausente ou fora da faixa física,
+                      cuja conversão não pode ser verificada
+    efeito P/T médios quanto o volume corrigido mudaria se a conversão usasse
+                      P e T médios fixos em vez dos valores horários
+
+O efeito de P/T médios é informativo: como o V_op é reconstruído com os
+próprios fatores horários, ele mede apenas quanto P e T variam no período e
+não indica falha do medidor. O status só sinaliza horas com condições
+inválidas. Quando houver o volume de operação lido no medidor,
+``comparar_conversao`` compara diretamente o volume recalculado com o
+reportado.
+
+Uso:
+    from correcao_ptz import conversao_clientes
+    for c in conversao_clientes(snapshot.clientes):
+        print(c.nome, c.fc_medio, c.efeito_pt_medios_pct, c.status)
+"""
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from dados_horarios import COLUNAS, ClientesHorarios
+from estatisticas import Agregado
+
+logger = logging.getLogger(__name__)
+
+P_REF_BARA = 1.01325
+T_REF_C = 20.0
+KELVIN = 273.15
+
+# Gás natural típico de distribuição (substituir pelos valores da cromatografia)
+DENSIDADE_RELATIVA = 0.60
+FRACAO_CO2 = 0.01
+
+# Faixa física aceita para as leituras horárias
+FAIXA_PRESSAO_BARA = (0.9, 100.0)
+FAIXA_TEMPERATURA_C = (-20.0, 60.0)
+
+# Grandezas de ``grandezas_ptz`` (agregadas por cliente)
+GRANDEZAS = ("fc", "z", "vop", "vn", "p", "t")
+
+TOLERANCIA_PCT = 0.5          # desvio recalculado x reportado acima disso sinaliza a hora
+MAX_HORAS_INVALIDAS = 0.01    # fração das horas com volume
+
+
+def _pseudocriticas(densidade_relativa: float, fracao_co2: float) -> tuple[float, float]:
+    """Tpc (K) e Ppc (bar) de Sutton com a correção de Wichert-Aziz para CO2."""
+    g = densidade_relativa
+    tpc_r = 169.2 + 349.5 * g - 74.0 * g**2          # °R
+    ppc_psi = 756.8 - 131.07 * g - 3.6 * g**2        # psia
+    a = fracao_co2
+    eps = 120.0 * (a**0.9 - a**1.6) if a > 0 else 0.0
+    tpc_corr = tpc_r - eps
+    ppc_corr = ppc_psi * tpc_corr / tpc_r
+    return tpc_corr / 1.8, ppc_corr * 0.0689475729
+
+
+def fator_z(
+    p_bara,
+    t_c,
+    densidade_relativa: float = DENSIDADE_RELATIVA,
+    fracao_co2: float = FRACAO_CO2,
+) -> np.ndarray:
+    """Fator de compressibilidade Z (Papay) para arrays de pressão e temperatura."""
+    tpc, ppc = _pseudocriticas(densidade_relativa, fracao_co2)
+    ppr = np.asarray(p_bara, dtype=np.float64) / ppc
+    tpr = (np.asarray(t_c, dtype=np.float64) + KELVIN) / tpc
+    return 1.0 - 3.52 * ppr * 10.0 ** (-0.9813 * tpr) + 0.274 * ppr**2 * 10.0 ** (-0.8157 * tpr)
+
+
+@dataclass(eq=False)
+class FatoresPTZ:
+    """Fatores de conversão (arrays com a forma das leituras)."""
+    fc_p: np.ndarray
+    fc_t: np.ndarray
+    fc_z: np.ndarray
+    z: np.ndarray
+    f_m: float = 1.0
+
+    @property
+    def fator(self) -> np.ndarray:
+        """FC_P × FC_T × FC_Z × F_M (V_ref = V_op × fator)."""
+        return self.fc_p * self.fc_t * self.fc_z * self.f_m
+
+
+def fatores_ptz(
+    p_bara,
+    t_c,
+    densidade_relativa: float = DENSIDADE_RELATIVA,
+    fracao_co2: float = FRACAO_CO2,
+    f_m: float = 1.0,
+) -> FatoresPTZ:
+    """Fatores de pressão, temperatura e compressibilidade de cada leitura."""
+    p = np.asarray(p_bara, dtype=np.float64)
+    t = np.asarray(t_c, dtype=np.float64)
+    z = fator_z(p, t, densidade_relativa, fracao_co2)
+    z_ref = float(fator_z(P_REF_BARA, T_REF_C, densidade_relativa, fracao_co2))
+    return FatoresPTZ(
+        fc_p=p / P_REF_BARA,
+        fc_t=(T_REF_C + KELVIN) / (t + KELVIN),
+        fc_z=z_ref / z,
+        z=z,
+        f_m=f_m,
+    )
+
+
+def condicoes_validas(p_bara, t_c) -> np.ndarray:
+    """Máscara das leituras com P e T presentes e dentro da faixa física."""
+    p = np.asarray(p_bara)
+    t = np.asarray(t_c)
+    return ((p >= FAIXA_PRESSAO_BARA[0]) & (p <= FAIXA_PRESSAO_BARA[1])
+            & (t >= FAIXA_TEMPERATURA_C[0]) & (t <= FAIXA_TEMPERATURA_C[1]))
+
+
+def volume_corrigido(v_op, p_bara, t_c, **kwargs) -> np.ndarray:
+    """V_ref = V_op × FC_PTZ (NaN onde as condições são inválidas)."""
+    fator = fatores_ptz(p_bara, t_c, **kwargs).fator
+    v = np.asarray(v_op, dtype=np.float64) * fator
+    return np.where(condicoes_validas(p_bara, t_c), v, np.nan)
+
+
+def comparar_conversao(v_op, v_reportado, p_bara, t_c, tolerancia_pct: float = TOLERANCIA_PCT,
+                       **kwargs) -> dict:
+    """Volume recalculado a partir da leitura de operação vs volume reportado.
+
+    Returns:
+        dict com horas comparadas, horas fora da tolerância, volumes
+        recalculado e reportado e o desvio % do total (recalculado − reportado).
+    """
+    recalc = volume_corrigido(v_op, p_bara, t_c, **kwargs)
+    rep = np.asarray(v_reportado, dtype=np.float64)
+    ok = ~np.isnan(recalc) & ~np.isnan(rep)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        desvio_h = np.where(ok & (rep != 0), (recalc - rep) / rep * 100, np.nan)
+    soma_recalc, soma_rep = float(recalc[ok].sum()), float(rep[ok].sum())
+    return {
+        "horas": int(ok.sum()),
+        "horas_fora": int(np.count_nonzero(np.abs(desvio_h) > tolerancia_pct)),
+        "recalculado_nm3": soma_recalc,
+        "reportado_nm3": soma_rep,
+        "desvio_pct": (soma_recalc - soma_rep) / soma_rep * 100 if soma_rep else None,
+    }
+
+
+def grandezas_ptz(vn, p_bara, t_c, **kwargs) -> dict[str, np.ndarray]:
+    """Grandezas da verificação, com NaN fora das horas válidas.
+
+    Devolve fc, z, vop (volume de operação reconstruído), vn, p e t — todas
+    somáveis bloco a bloco (``Agregado``), o que serve tanto à extração
+    completa quanto à incremental.
+    """
+    vn = np.asarray(vn, dtype=np.float64)
+    p = np.asarray(p_bara, dtype=np.float64)
+    t = np.asarray(t_c, dtype=np.float64)
+    ok = ~np.isnan(vn) & condicoes_validas(p, t)
+    f = fatores_ptz(np.where(ok, p, P_REF_BARA), np.where(ok, t, T_REF_C), **kwargs)
+    fator = f.fator
+    nan = np.nan
+    return {
+        "fc": np.where(ok, fator, nan),
+        "z": np.where(ok, f.z, nan),
+        "vop": np.where(ok, vn / fator, nan),
+        "vn": np.where(ok, vn, nan),
+        "p": np.where(ok, p, nan),
+        "t": np.where(ok, t, nan),
+    }
+
+
+@dataclass
+class ConversaoCliente:
+    """Verificação da conversão PTZ de um cliente no período."""
+    nome: str
+    horas_volume: int
+    horas_validas: int
+    fc_medio: float | None
+    fc_min: float | None
+    fc_max: float | None
+    z_medio: float | None
+    efeito_pt_medios_pct: float | None    # informativo, não entra no status
+
+    @property
+    def horas_invalidas(self) -> int:
+        return self.horas_volume - self.horas_validas
+
+    @property
+    def status(self) -> str:
+        if self.horas_volume and self.horas_invalidas > MAX_HORAS_INVALIDAS * self.horas_volume:
+            return "Condições inválidas"
+        return "OK"
+
+
+def resumir_conversao(nome: str, horas_volume: int, aggs: dict[str, Agregado], **kwargs) -> ConversaoCliente:
+    """ConversaoCliente a partir dos agregados de ``grandezas_ptz`` (chaves fc, z, vop, vn, p, t)."""
+    fc = aggs["fc"]
+    if not fc.n:
+        return ConversaoCliente(nome, horas_volume, 0, None, None, None, None, None)
+    # Conversão com P e T médios fixos aplicada ao volume de operação reconstruído
+    fc_fixo = float(fatores_ptz(aggs["p"].media, aggs["t"].media, **kwargs).fator)
+    vn = aggs["vn"].soma
+    efeito = (fc_fixo * aggs["vop"].soma - vn) / vn * 100 if vn else None
+    return ConversaoCliente(
+        nome=nome,
+        horas_volume=horas_volume,
+        horas_validas=fc.n,
+        fc_medio=fc.media,
+        fc_min=fc.min,
+        fc_max=fc.max,
+        z_medio=aggs["z"].media,
+        efeito_pt_medios_pct=efeito,
+    )
+
+
+def conversao_clientes(clientes: ClientesHorarios, **kwargs) -> list[ConversaoCliente]:
+    """Verificação PTZ de todos os clientes com dados horários (grade inteira de uma vez)."""
+    v = clientes.valores
+    g = grandezas_ptz(v[:, COLUNAS.index("Volume_Nm3h")], v[:, COLUNAS.index("Pressao_bara")],
+                      v[:, COLUNAS.index("Temperatura_C")], **kwargs)
+    resultado = []
+    for i, aba in enumerate(clientes):
+        if clientes.sem_dados(aba):
+            continue
+        aggs = {k: Agregado.de_valores(x[i]) for k, x in g.items()}
+        c = resumir_conversao(clientes.nomes[aba], clientes.contagem(aba), aggs, **kwargs)
+        if c.status != "OK":
+            logger.info(f"  Conversão PTZ {c.nome}: {c.status} ({c.horas_invalidas} horas inválidas)")
+        resultado.append(c)
+    return resultado
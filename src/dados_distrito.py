@@ -4,8 +4,15 @@ Dados estaticos do distrito de distribuicao de gas natural.
 Valores pre-computados pelos 7 notebooks de analise.
 Periodo: abril a setembro de 2025 (183 dias), 7 clientes, 1 entrada.
 """
-from dataclasses import dataclass, field
-from typing import List, Optional
+from dataclasses import dataclass, field, fields
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from qualidade_dados import COMPLETUDE_ALERTA_PCT
+
+# Linhas da tabela de clientes no texto enviado ao modelo (demais agregados em "Demais clientes")
+MAX_CLIENTES_TEXTO = 30
 
 
 @dataclass
@@ -65,6 +72,11 @@ class EnergiaData:
     dif_calculado_planilha_kcal: float = 0.0
     dif_calculado_planilha_pct: float = 0.0
     correlacao_vol_energia: float = 0.999999
+    # Energia por cliente (volume horario x PCS vigente) e balanco energetico
+    energia_clientes: List[tuple] = field(default_factory=list)  # (nome, gcal, participacao_pct)
+    energia_saida_gcal: Optional[float] = None
+    energia_dif_gcal: Optional[float] = None
+    energia_dif_pct: Optional[float] = None
     graficos: List[str] = field(default_factory=lambda: [
         "energia_serie.png",
         "energia_diferencas.png",
@@ -85,12 +97,132 @@ class ClienteInfo:
     fator_carga: Optional[float]
     participacao_pct: float
     incerteza_pct: float
+    completude_pct: Optional[float] = None  # horas com volume no período (índice de qualidade)
+
+
+# Tipo de cada coluna de TabelaClientes; NaN representa None nos campos opcionais
+_DTYPES_CLIENTE = {
+    "nome": object,
+    "vol_medio_nm3h": np.int64,
+    "vol_min_nm3h": np.int64,
+    "vol_max_nm3h": np.int64,
+}
+_OPCIONAIS_CLIENTE = ("press_media_bara", "temp_media_c", "fator_carga", "completude_pct")
+CAMPOS_CLIENTE = tuple(f.name for f in fields(ClienteInfo))
+
+
+class LinhaCliente:
+    """Visao somente leitura de uma linha de TabelaClientes (mesmos atributos de ClienteInfo)."""
+    __slots__ = ("_tabela", "_i")
+
+    def __init__(self, tabela: "TabelaClientes", i: int):
+        self._tabela = tabela
+        self._i = i
+
+    def __getattr__(self, campo: str):
+        try:
+            coluna = self._tabela.colunas[campo]
+        except KeyError:
+            raise AttributeError(campo) from None
+        valor = coluna[self._i]
+        if campo in _OPCIONAIS_CLIENTE and np.isnan(valor):
+            return None
+        return valor.item() if isinstance(valor, np.generic) else valor
+
+    def para_info(self) -> ClienteInfo:
+        return ClienteInfo(**{campo: getattr(self, campo) for campo in CAMPOS_CLIENTE})
+
+    def __repr__(self) -> str:
+        return f"LinhaCliente({self.nome!r}, participacao_pct={self.participacao_pct})"
+
+
+class TabelaClientes:
+    """Perfis dos clientes em colunas: um array NumPy por campo de ClienteInfo.
+
+    Iterar devolve LinhaCliente (visoes de uma linha, sem copiar); ordenacao,
+    selecao dos N maiores e formatacao das tabelas operam sobre as colunas.
+    """
+    __slots__ = ("colunas",)
+
+    def __init__(self, colunas: dict[str, Iterable]):
+        n = None
+        self.colunas = {}
+        for campo in CAMPOS_CLIENTE:
+            valores = colunas.get(campo)
+            if valores is None:
+                if campo not in _OPCIONAIS_CLIENTE:
+                    raise KeyError(f"Coluna obrigatoria ausente: {campo}")
+                valores = np.full(n or 0, np.nan)
+            dtype = _DTYPES_CLIENTE.get(campo, np.float64)
+            if dtype is np.float64 and not isinstance(valores, np.ndarray):
+                valores = [np.nan if v is None else v for v in valores]
+            self.colunas[campo] = np.asarray(valores, dtype=dtype)
+            n = len(self.colunas[campo])
+
+    @classmethod
+    def de_linhas(cls, linhas: Iterable[ClienteInfo]) -> "TabelaClientes":
+        linhas = list(linhas)
+        return cls({campo: [getattr(c, campo) for c in linhas] for campo in CAMPOS_CLIENTE})
+
+    def __len__(self) -> int:
+        return len(self.colunas["nome"])
+
+    def __iter__(self):
+        return (LinhaCliente(self, i) for i in range(len(self)))
+
+    def __getitem__(self, i):
+        """Inteiro -> LinhaCliente; fatia, mascara ou indices -> TabelaClientes."""
+        if isinstance(i, (int, np.integer)):
+            return LinhaCliente(self, range(len(self))[i])
+        return TabelaClientes({campo: col[i] for campo, col in self.colunas.items()})
+
+    def __eq__(self, outra) -> bool:
+        if not isinstance(outra, TabelaClientes):
+            return NotImplemented
+        return all(
+            np.array_equal(col, outra.colunas[campo], equal_nan=col.dtype != object)
+            for campo, col in self.colunas.items()
+        )
+
+    def __repr__(self) -> str:
+        return f"TabelaClientes({len(self)} clientes)"
+
+    @property
+    def nomes(self) -> list[str]:
+        return self.colunas["nome"].tolist()
+
+    def ordenar(self, campo: str = "participacao_pct", decrescente: bool = True) -> "TabelaClientes":
+        """Copia ordenada por ``campo`` (estavel; NaN no fim)."""
+        x = self.colunas[campo].astype(np.float64)
+        chave = np.where(np.isnan(x), np.inf, -x if decrescente else x)
+        return self[np.argsort(chave, kind="stable")]
+
+    def maiores(self, n: int, campo: str = "participacao_pct") -> "TabelaClientes":
+        """Os ``n`` maiores por ``campo``, em ordem decrescente (argpartition + ordenacao dos n)."""
+        if n >= len(self):
+            return self.ordenar(campo)
+        x = np.nan_to_num(self.colunas[campo].astype(np.float64), nan=-np.inf)
+        idx = np.sort(np.argpartition(-x, n - 1)[:n])
+        return self[idx].ordenar(campo)
+
+    def texto(self, campo: str, formato: str, sufixo: str = "", vazio: str = "-") -> list[str]:
+        """Coluna formatada (``format(v, formato) + sufixo``; ``vazio`` onde nao ha valor)."""
+        col = self.colunas[campo]
+        nulos = np.isnan(col) if col.dtype == np.float64 else np.zeros(len(col), dtype=bool)
+        return [vazio if nulo else format(v, formato) + sufixo for v, nulo in zip(col.tolist(), nulos.tolist())]
+
+    def para_json(self) -> dict[str, list]:
+        """Colunas como listas (None no lugar de NaN)."""
+        return {
+            campo: [None if v != v else v for v in col.tolist()] if col.dtype == np.float64 else col.tolist()
+            for campo, col in self.colunas.items()
+        }
 
 
 @dataclass
 class PerfisClientes:
     """NB05: Perfis dos Clientes"""
-    clientes: List[ClienteInfo] = field(default_factory=lambda: [
+    clientes: TabelaClientes = field(default_factory=lambda: TabelaClientes.de_linhas([
         ClienteInfo("Empresa A", 104.10, 23_965, 1_359, 31_245, 15.47, 23.49, 0.767, 57.5, 1.33),
         ClienteInfo("Empresa B", 43.66, 10_052, 178, 17_113, 15.96, 23.41, 0.587, 24.1, 1.61),
         ClienteInfo("Empresa E", 10.18, 2_345, 300, 4_244, 4.93, 16.70, 0.552, 5.6, 3.05),
@@ -98,7 +230,9 @@ class PerfisClientes:
         ClienteInfo("Empresa C", 6.84, 1_567, 0, 4_959, 5.15, 17.84, 0.316, 3.8, 1.34),
         ClienteInfo("Empresa F", 5.96, 1_372, 0, 3_509, 7.55, 20.49, 0.391, 3.3, 1.48),
         ClienteInfo("Empresa D", 0.09, 47, 0, 187, 18.57, 23.64, 0.253, 0.05, 3.58),
-    ])
+    ]))
+    # Verificação PTZ: (nome, fc_medio, fc_min, fc_max, z_medio, efeito_pt_medios_pct, horas_invalidas, status)
+    conversao: List[tuple] = field(default_factory=list)
     graficos: List[str] = field(default_factory=lambda: [
         "clientes_serie.png",
         "clientes_perfil_horario.png",
@@ -106,8 +240,13 @@ class PerfisClientes:
         "clientes_pressao_temp.png",
         "clientes_participacao.png",
         "clientes_boxplot.png",
+        "clientes_heatmap_todos.png",
     ])
 
+    def __post_init__(self):
+        if not isinstance(self.clientes, TabelaClientes):
+            self.clientes = TabelaClientes.de_linhas(self.clientes)
+
 
 @dataclass
 class IncertezasData:
@@ -158,11 +297,30 @@ class BalancoMassa:
         ("Empresa F", 5_957_912, 3.3),
         ("Empresa D", 88_184, 0.05),
     ])
+    # Monte Carlo (GUM Suplemento 1) da diferenca entrada - saida
+    mc_amostras: int = 0
+    mc_diferenca_media_pct: Optional[float] = None
+    mc_diferenca_desvio_pct: Optional[float] = None
+    mc_intervalo_min_pct: Optional[float] = None
+    mc_intervalo_max_pct: Optional[float] = None
+    mc_limite_pct: Optional[float] = None
+    mc_prob_inaceitavel: Optional[float] = None
+    # Balanco diario por dia de gas (estatisticas apenas dos dias completos)
+    diario_dias: int = 0
+    diario_dias_completos: int = 0
+    diario_dias_sobrepoem: int = 0
+    diario_dif_media_pct: Optional[float] = None
+    diario_dif_desvio_pct: Optional[float] = None
+    diario_dif_min_pct: Optional[float] = None
+    diario_dif_max_pct: Optional[float] = None
+    # (data, entrada_nm3, saida_nm3, dif_pct, bandas_sobrepoem, dia_completo)
+    diario_serie: List[tuple] = field(default_factory=list)
     graficos: List[str] = field(default_factory=lambda: [
         "balanco_barras.png",
         "balanco_waterfall.png",
         "balanco_bandas.png",
         "balanco_dashboard.png",
+        "balanco_diario.png",
     ])
 
 
@@ -235,16 +393,45 @@ def gerar_tabelas_resumo(dados: dict = None) -> dict:
         ],
     }
 
+    if ene.energia_clientes:
+        tabelas["secao_4_energia_clientes"] = {
+            "titulo": "Tabela 4.2: Energia por Cliente e Balanço Energético",
+            "headers": ["Cliente", "Energia (Gcal)", "Participação (%)"],
+            "rows": [
+                [nome, f"{gcal:,.0f}", f"{pct:.1f}%"] for nome, gcal, pct in ene.energia_clientes
+            ] + [
+                ["Total dos Clientes", f"{ene.energia_saida_gcal:,.0f}", "100.0%"],
+                ["Entrada", f"{ene.total_gcal:,.0f}", ""],
+                ["Diferença (Entrada − Clientes)", f"{ene.energia_dif_gcal:,.0f}", f"{ene.energia_dif_pct:.2f}%"],
+            ],
+        }
+
     # Seção 5: Clientes
     tabelas["secao_5_clientes"] = {
         "titulo": "Tabela 5.1: Resumo dos Clientes do Distrito",
         "headers": ["Cliente", "Vol. Total (Mm³)", "Média (Nm³/h)", "Fator Carga", "Participação (%)"],
-        "rows": [
-            [c.nome, f"{c.vol_total_mm3:.2f}", f"{c.vol_medio_nm3h:,}", f"{c.fator_carga:.3f}", f"{c.participacao_pct:.1f}%"]
-            for c in perf.clientes
-        ],
+        "rows": [list(linha) for linha in zip(
+            perf.clientes.nomes,
+            perf.clientes.texto("vol_total_mm3", ".2f"),
+            perf.clientes.texto("vol_medio_nm3h", ","),
+            perf.clientes.texto("fator_carga", ".3f"),
+            perf.clientes.texto("participacao_pct", ".1f", "%"),
+        )],
     }
 
+    if perf.conversao:
+        tabelas["secao_5_conversao"] = {
+            "titulo": "Tabela 5.2: Verificação da Conversão PTZ por Cliente",
+            "headers": ["Cliente", "FC PTZ Médio", "Faixa FC PTZ", "Z Médio", "Efeito P/T Médios (%)",
+                        "Horas Inválidas", "Status"],
+            "rows": [
+                [nome, f"{fc:.3f}", f"{fc_min:.3f}-{fc_max:.3f}", f"{z:.4f}", f"{efeito:+.2f}%",
+                 f"{invalidas:,}", status]
+                if fc is not None else [nome, "-", "-", "-", "-", f"{invalidas:,}", status]
+                for nome, fc, fc_min, fc_max, z, efeito, invalidas, status in perf.conversao
+            ],
+        }
+
     # Seção 6: Incertezas
     tabelas["secao_6_incertezas"] = {
         "titulo": "Tabela 6.1: Incertezas de Medição por Ponto",
@@ -273,9 +460,30 @@ def gerar_tabelas_resumo(dados: dict = None) -> dict:
         ],
     }
 
+    if bal.diario_serie:
+        completos = [d for d in bal.diario_serie if d[5]]
+        maiores = sorted(completos, key=lambda d: abs(d[3]), reverse=True)[:10]
+        tabelas["secao_7_balanco_diario"] = {
+            "titulo": "Tabela 7.2: Dias com Maior Diferença no Balanço Diário",
+            "headers": ["Dia", "Entrada (Nm³)", "Saída (Nm³)", "Diferença (%)", "Bandas"],
+            "rows": [
+                [data, f"{ent:,.0f}", f"{sai:,.0f}", f"{dif:.2f}%", "Sobrepõem" if sob else "NÃO sobrepõem"]
+                for data, ent, sai, dif, sob, _ in maiores
+            ],
+        }
+
     return tabelas
 
 
+def clientes_incompletos(perfis: "PerfisClientes") -> tuple[list[tuple[str, float]], int]:
+    """Clientes abaixo de COMPLETUDE_ALERTA_PCT: até MAX_CLIENTES_TEXTO (nome, % de horas faltantes) e quantos ficaram de fora."""
+    completude = perfis.clientes.colunas["completude_pct"]
+    baixa = np.flatnonzero(completude < COMPLETUDE_ALERTA_PCT)
+    nomes = perfis.clientes.colunas["nome"]
+    listados = [(str(nomes[i]), float(100 - completude[i])) for i in baixa[:MAX_CLIENTES_TEXTO]]
+    return listados, len(baixa) - len(listados)
+
+
 def formatar_dados_secao(obj, config: DistritoConfig = None) -> str:
     """Converte qualquer dataclass de dados em texto legivel para prompt.
 
@@ -309,7 +517,7 @@ def formatar_dados_secao(obj, config: DistritoConfig = None) -> str:
             f"- Diferenca maxima Conc vs Transp: {obj.dif_conc_transp_max_pct:.6f}%"
         )
     elif isinstance(obj, EnergiaData):
-        return (
+        texto = (
             "ENERGIA DIARIA (E = Volume x PCS)\n"
             f"- Energia media diaria: {obj.media_gcal_dia:,.2f} Gcal/dia\n"
             f"- Energia minima diaria: {obj.min_gcal_dia:,.2f} Gcal/dia\n"
@@ -318,18 +526,58 @@ def formatar_dados_secao(obj, config: DistritoConfig = None) -> str:
             f"- Validacao: diferenca calculado vs planilha = {obj.dif_calculado_planilha_kcal:.2f} kcal ({obj.dif_calculado_planilha_pct:.6f}%)\n"
             f"- Correlacao Volume-Energia: r = {obj.correlacao_vol_energia:.6f}"
         )
+        if obj.energia_clientes:
+            lines = [texto, "\nENERGIA POR CLIENTE (volume horario x PCS vigente)"]
+            for nome, gcal, pct in obj.energia_clientes:
+                lines.append(f"  - {nome}: {gcal:,.0f} Gcal ({pct:.1f}%)")
+            lines.append(f"- Energia total dos clientes: {obj.energia_saida_gcal:,.0f} Gcal")
+            lines.append(f"- Balanco energetico (entrada - clientes): {obj.energia_dif_gcal:,.0f} Gcal ({obj.energia_dif_pct:.2f}%)")
+            texto = "\n".join(lines)
+        return texto
     elif isinstance(obj, PerfisClientes):
-        lines = ["PERFIS DE CONSUMO DOS 7 CLIENTES\n"]
+        t = obj.clientes
+        lines = [f"PERFIS DE CONSUMO DOS {len(t)} CLIENTES\n"]
         lines.append("| Cliente | Vol Total (Mm3) | Vol Medio (Nm3/h) | Faixa (Nm3/h) | Pressao (bara) | Temp (C) | Fator Carga | Participacao |")
         lines.append("|---------|----------------|-------------------|---------------|----------------|----------|-------------|-------------|")
-        for c in obj.clientes:
-            lines.append(
-                f"| {c.nome} | {c.vol_total_mm3:.2f} | {c.vol_medio_nm3h:,.0f} | "
-                f"{c.vol_min_nm3h:,.0f}-{c.vol_max_nm3h:,.0f} | {c.press_media_bara:.2f} | "
-                f"{c.temp_media_c:.2f} | {c.fator_carga:.3f} | {c.participacao_pct:.1f}% |"
-            )
-        lines.append(f"\nNota: Empresa D possui 57% de dados horarios faltantes.")
+        demais = None
+        if len(t) > MAX_CLIENTES_TEXTO:
+            maiores = t.maiores(MAX_CLIENTES_TEXTO)
+            demais = (len(t) - len(maiores),
+                      t.colunas["vol_total_mm3"].sum() - maiores.colunas["vol_total_mm3"].sum(),
+                      t.colunas["participacao_pct"].sum() - maiores.colunas["participacao_pct"].sum())
+            t = maiores
+        faixa = [f"{a}-{b}" for a, b in zip(t.texto("vol_min_nm3h", ",.0f"), t.texto("vol_max_nm3h", ",.0f"))]
+        for linha in zip(
+            t.nomes, t.texto("vol_total_mm3", ".2f"), t.texto("vol_medio_nm3h", ",.0f"), faixa,
+            t.texto("press_media_bara", ".2f"), t.texto("temp_media_c", ".2f"),
+            t.texto("fator_carga", ".3f"), t.texto("participacao_pct", ".1f", "%"),
+        ):
+            lines.append("| " + " | ".join(linha) + " |")
+        if demais:
+            n, vol, pct = demais
+            lines.append(f"| Demais {n} clientes | {vol:.2f} | - | - | - | - | - | {pct:.1f}% |")
+        incompletos, restantes = clientes_incompletos(obj)
+        for nome, faltantes in incompletos:
+            lines.append(f"\nNota: {nome} possui {faltantes:.0f}% de dados horarios faltantes.")
+        if restantes:
+            lines.append(f"\nNota: mais {restantes} clientes com menos de "
+                         f"{COMPLETUDE_ALERTA_PCT:.0f}% das horas com dados.")
         lines.append(f"Fator de carga = Vol Medio / Vol Maximo (mais proximo de 1 = consumo mais constante)")
+        if obj.conversao:
+            lines.append("\nVERIFICACAO DA CONVERSAO PTZ (V_ref = V_op x FC_P x FC_T x FC_Z x F_M)")
+            lines.append("| Cliente | FC PTZ Medio | Faixa FC PTZ | Z Medio | Efeito P/T Medios | Horas Invalidas | Status |")
+            lines.append("|---------|--------------|--------------|---------|-------------------|-----------------|--------|")
+            for nome, fc, fc_min, fc_max, z, efeito, invalidas, status in obj.conversao:
+                if fc is None:
+                    lines.append(f"| {nome} | - | - | - | - | {invalidas} | {status} |")
+                else:
+                    lines.append(
+                        f"| {nome} | {fc:.3f} | {fc_min:.3f}-{fc_max:.3f} | {z:.4f} | "
+                        f"{efeito:+.2f}% | {invalidas} | {status} |"
+                    )
+            lines.append("Efeito P/T medios = variacao do volume corrigido se a conversao usasse P e T medios "
+                         "em vez dos valores horarios (informativo: mede a variacao de P e T no periodo, "
+                         "nao uma falha do medidor).")
         return "\n".join(lines)
     elif isinstance(obj, IncertezasData):
         lines = [
@@ -365,6 +613,16 @@ def formatar_dados_secao(obj, config: DistritoConfig = None) -> str:
         lines.append(f"  - Saida:   [{obj.banda_saida_min:,.0f} ; {obj.banda_saida_max:,.0f}] Nm3")
         lines.append(f"\nSobreposicao das bandas: {'SIM' if obj.bandas_sobrepoem else 'NAO'}")
         lines.append(f"Resultado: {obj.resultado}")
+        if obj.mc_amostras:
+            lines.append(f"\nMonte Carlo (GUM Suplemento 1, {obj.mc_amostras:,} sorteios):")
+            lines.append(f"  - Diferenca: {obj.mc_diferenca_media_pct:.2f}% +/- {obj.mc_diferenca_desvio_pct:.2f}% (1 desvio)")
+            lines.append(f"  - Intervalo de abrangencia 95%: [{obj.mc_intervalo_min_pct:.2f}% ; {obj.mc_intervalo_max_pct:.2f}%]")
+            lines.append(f"  - P(|diferenca| > {obj.mc_limite_pct:.1f}%): {obj.mc_prob_inaceitavel * 100:.2f}%")
+        if obj.diario_dias_completos:
+            lines.append(f"\nBalanco diario ({obj.diario_dias} dias de gas, {obj.diario_dias_completos} completos):")
+            lines.append(f"  - Diferenca diaria: media {obj.diario_dif_media_pct:.2f}%, desvio {obj.diario_dif_desvio_pct:.2f}%")
+            lines.append(f"  - Faixa: [{obj.diario_dif_min_pct:.2f}% ; {obj.diario_dif_max_pct:.2f}%]")
+            lines.append(f"  - Dias com bandas sobrepostas: {obj.diario_dias_sobrepoem} de {obj.diario_dias_completos}")
         return "\n".join(lines)
     else:
         return str(obj)
@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""
+Representação compacta dos dados horários dos clientes.
+
+Em vez de um DataFrame float64 com coluna de datas por cliente, todas as
+abas de clientes ficam numa única grade:
+
+    horas     int64   (H,)        hora desde a época (índice compartilhado)
+    valores   float32 (C, 3, H)   Volume_Nm3h, Pressao_bara, Temperatura_C
+    validade  uint8   (C, 3, ⌈H/8⌉) bitmask (np.packbits) dos valores válidos
+    clientes  pd.Categorical      aba de cada linha da grade (id categórico)
+
+Cerca de 12,4 bytes por cliente-hora contra 32 do DataFrame original, sem
+as cópias por gráfico. Posições inválidas também guardam NaN em ``valores``,
+de modo que ``frame(aba)`` devolve views float32 sem cópia para o código
+pandas existente; somas e médias devem ser acumuladas em float64
+(``resumos``/``soma``), já que float32 tem só ~7 dígitos significativos.
+
+``cubo`` vê a grade como cliente × coluna × dia × hora (``CuboHorario``)
+e guarda as reduções por hora do dia, por dia e do período (contagem,
+soma, soma dos quadrados, mínimo e máximo) usadas pelas análises de
+clientes. ``qualidade`` guarda, em carreiras (RLE), as horas faltantes,
+congeladas, negativas, fora de faixa e com carimbo duplicado de cada
+coluna (``qualidade_dados``).
+
+``ClientesHorarios`` é um Mapping aba -> {"nome", "dados", "sem_dados"},
+o mesmo formato que os consumidores usavam antes.
+
+Uso:
+    from dados_horarios import ClientesHorarios
+    clientes = ClientesHorarios.de_frames({"Cliente #1": df1, ...}, CLIENTES)
+    clientes["Cliente #1"]["dados"]        # DataFrame Data + 3 colunas float32
+    clientes.soma("Cliente #1")            # volume total em float64
+"""
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = ("Volume_Nm3h", "Pressao_bara", "Temperatura_C")
+NS_HORA = 3_600 * 10**9
+
+# Número de bits 1 de cada byte (popcount por tabela, sem desempacotar o bitmask)
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def horas_epoch(datas) -> np.ndarray:
+    """Datas (datetime64) -> horas desde a época (int64), truncando minutos."""
+    ns = np.asarray(datas, dtype="datetime64[ns]").view(np.int64)
+    return np.floor_divide(ns, NS_HORA)
+
+
+def _agrupar_por_hora(aba: str, horas: np.ndarray,
+                      valores: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Garante uma linha por hora: timestamps fora da hora cheia ou repetidos viram a média da hora.
+
+    Devolve também as horas que tinham mais de uma linha (para o índice de qualidade).
+    """
+    if horas.size < 2 or (np.all(np.diff(horas) > 0)):
+        return horas, valores, np.empty(0, dtype=np.int64)
+    logger.warning(f"{aba}: timestamps repetidos ou fora da hora cheia; usando a média por hora")
+    unicas, contagem = np.unique(horas, return_counts=True)
+    df = pd.DataFrame(valores.T, index=horas).groupby(level=0, sort=True).mean()
+    return df.index.to_numpy(np.int64), df.to_numpy(np.float64).T, unicas[contagem > 1]
+
+
+@dataclass
+class Marginal:
+    """Agregados float64 de uma redução do cubo: contagem, soma, soma dos quadrados, mín., máx."""
+    n: np.ndarray
+    soma: np.ndarray
+    somaq: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+    @classmethod
+    def de_valores(cls, x: np.ndarray, eixo) -> "Marginal":
+        """Reduz ``x`` (float32) ao longo de ``eixo``, acumulando em float64 sem copiar ``x`` inteiro."""
+        return cls(
+            n=np.count_nonzero(~np.isnan(x), axis=eixo),
+            soma=np.nansum(x, axis=eixo, dtype=np.float64),
+            somaq=np.nansum(np.square(x, dtype=np.float64), axis=eixo),
+            min=np.fmin.reduce(x, axis=eixo, initial=np.nan).astype(np.float64),
+            max=np.fmax.reduce(x, axis=eixo, initial=np.nan).astype(np.float64),
+        )
+
+    def reduzir(self, eixo) -> "Marginal":
+        """Combina as células ao longo de ``eixo`` (somas somam, extremos pelos extremos)."""
+        return Marginal(
+            n=self.n.sum(axis=eixo), soma=self.soma.sum(axis=eixo), somaq=self.somaq.sum(axis=eixo),
+            min=np.fmin.reduce(self.min, axis=eixo, initial=np.nan),
+            max=np.fmax.reduce(self.max, axis=eixo, initial=np.nan),
+        )
+
+    @property
+    def media(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 0, self.soma / self.n, np.nan)
+
+    @property
+    def desvio(self) -> np.ndarray:
+        """Desvio padrão amostral (ddof=1) a partir de soma e soma dos quadrados."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (self.somaq - self.soma * self.media) / (self.n - 1)
+            return np.where(self.n > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+
+
+@dataclass(eq=False)
+class CuboHorario:
+    """Cubo cliente × coluna × dia × hora dos dados horários.
+
+    O cubo (C, 3, D, 24) não é materializado: ``fatia(i, j)`` espalha uma
+    coluna de um cliente da grade compartilhada de ClientesHorarios
+    (referenciada, sem cópia) em dias corridos × 24 horas (dia e hora do
+    carimbo, como nos gráficos), com NaN na hora sem medição. As reduções
+    (``por_hora``: perfil por hora do dia; ``por_dia``; ``total``) são
+    calculadas fatia a fatia, uma vez, e reaproveitadas por todos os
+    gráficos e estatísticas de clientes.
+    """
+    d0: int
+    nd: int
+    horas: np.ndarray
+    valores: np.ndarray
+
+    @classmethod
+    def de_horas(cls, horas: np.ndarray, valores: np.ndarray) -> "CuboHorario":
+        if not horas.size:
+            return cls(d0=0, nd=0, horas=horas, valores=valores)
+        d0 = int(horas[0] // 24)
+        return cls(d0=d0, nd=int(horas[-1] // 24) - d0 + 1, horas=horas, valores=valores)
+
+    @property
+    def dias(self) -> np.ndarray:
+        """Dias do cubo como datetime64[D]."""
+        return (self.d0 + np.arange(self.nd)).astype("datetime64[D]")
+
+    def fatia(self, i: int, j: int) -> np.ndarray:
+        """Grade (D, 24) float32 do cliente ``i``, coluna ``j``; NaN onde não há medição."""
+        grade = np.full(self.nd * 24, np.nan, dtype=np.float32)
+        grade[self.horas - self.d0 * 24] = self.valores[i, j]
+        return grade.reshape(self.nd, 24)
+
+    def _reduzir_fatias(self, eixo: int) -> Marginal:
+        """Marginal (C, 3, ·) reduzindo cada fatia (D, 24) ao longo de ``eixo`` (0 = dias, 1 = horas)."""
+        c, k = self.valores.shape[:2]
+        forma = (c, k, 24 if eixo == 0 else self.nd)
+        campos = {
+            "n": np.zeros(forma, dtype=np.int64), "soma": np.zeros(forma), "somaq": np.zeros(forma),
+            "min": np.full(forma, np.nan), "max": np.full(forma, np.nan),
+        }
+        for i in range(c):
+            for j in range(k):
+                parte = Marginal.de_valores(self.fatia(i, j), eixo=eixo)
+                for nome, arr in campos.items():
+                    arr[i, j] = getattr(parte, nome)
+        return Marginal(**campos)
+
+    @cached_property
+    def por_dia(self) -> Marginal:
+        """Agregados (C, 3, D) de cada dia."""
+        return self._reduzir_fatias(eixo=1)
+
+    @cached_property
+    def por_hora(self) -> Marginal:
+        """Agregados (C, 3, 24) de cada hora do dia sobre todos os dias."""
+        return self._reduzir_fatias(eixo=0)
+
+    @cached_property
+    def total(self) -> Marginal:
+        """Agregados (C, 3) do período inteiro, combinando os dias."""
+        return self.por_dia.reduzir(eixo=2)
+
+    def media_movel(self, i: int, j: int, janela: int = 24, centrada: bool = False) -> np.ndarray:
+        """Média móvel (C=i, coluna j) em cada hora do cubo, NaN se a janela não estiver completa.
+
+        Mesmo critério de ``pd.Series.rolling(janela, center=centrada).mean()``,
+        por diferença de somas acumuladas (float64).
+        """
+        x = self.fatia(i, j).ravel().astype(np.float64)
+        validos = ~np.isnan(x)
+        soma = np.concatenate([[0.0], np.cumsum(np.where(validos, x, 0.0))])
+        n = np.concatenate([[0], np.cumsum(validos)])
+        fim = np.arange(1, x.size + 1) + ((janela - 1) // 2 if centrada else 0)
+        ini = fim - janela
+        dentro = (ini >= 0) & (fim <= x.size)
+        fim, ini = np.clip(fim, 0, x.size), np.clip(ini, 0, x.size)
+        completa = dentro & ((n[fim] - n[ini]) == janela)
+        with np.errstate(invalid="ignore"):
+            return np.where(completa, (soma[fim] - soma[ini]) / janela, np.nan)
+
+
+@dataclass(eq=False)
+class ClientesHorarios(Mapping):
+    """Dados horários de todos os clientes numa grade float32 compartilhada."""
+    horas: np.ndarray
+    valores: np.ndarray
+    validade: np.ndarray
+    clientes: pd.Categorical
+    nomes: dict[str, str] = field(default_factory=dict)
+    duplicadas: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def de_frames(cls, frames: dict[str, pd.DataFrame], nomes: dict[str, str],
+                  duplicadas: dict[str, np.ndarray] | None = None) -> "ClientesHorarios":
+        """Monta a grade a partir dos DataFrames parseados (Data + COLUNAS), um por aba.
+
+        ``duplicadas`` traz horas com carimbo repetido já agrupadas antes
+        (frames vindos do cache); as encontradas aqui são acrescentadas.
+        """
+        abas = list(frames)
+        duplicadas = dict(duplicadas or {})
+        series = {}
+        for aba, df in frames.items():
+            h = horas_epoch(df["Data"].to_numpy("datetime64[ns]"))
+            v = df[list(COLUNAS)].to_numpy(np.float64).T
+            ordem = np.argsort(h, kind="stable")
+            h, v, dup = _agrupar_por_hora(aba, h[ordem], v[:, ordem])
+            series[aba] = h, v
+            if dup.size or aba in duplicadas:
+                duplicadas[aba] = np.union1d(np.asarray(duplicadas.get(aba, []), dtype=np.int64), dup)
+
+        todas = [h for h, _ in series.values() if h.size]
+        horas = np.unique(np.concatenate(todas)) if todas else np.empty(0, dtype=np.int64)
+
+        valores = np.full((len(abas), len(COLUNAS), horas.size), np.nan, dtype=np.float32)
+        for i, aba in enumerate(abas):
+            h, v = series[aba]
+            valores[i][:, np.searchsorted(horas, h)] = v
+        validade = np.packbits(~np.isnan(valores), axis=-1)
+
+        return cls(
+            horas=horas,
+            valores=valores,
+            validade=validade,
+            clientes=pd.Categorical(abas, categories=abas),
+            nomes={aba: nomes.get(aba, aba) for aba in abas},
+            duplicadas={aba: d for aba, d in duplicadas.items() if aba in frames and d.size},
+        )
+
+    # ------------------------------------------------------------------
+    # Acesso
+    # ------------------------------------------------------------------
+    @cached_property
+    def datas(self) -> np.ndarray:
+        """Índice compartilhado como datetime64[ns] (calculado uma vez)."""
+        return (self.horas * NS_HORA).view("datetime64[ns]")
+
+    def indice(self, aba: str) -> int:
+        return self.clientes.categories.get_loc(aba)
+
+    def validos(self, aba: str, coluna: str = "Volume_Nm3h") -> np.ndarray:
+        """Máscara booleana (H,) dos valores válidos de uma coluna."""
+        bits = self.validade[self.indice(aba), COLUNAS.index(coluna)]
+        return np.unpackbits(bits, count=self.horas.size).astype(bool)
+
+    def contagem(self, aba: str, coluna: str = "Volume_Nm3h") -> int:
+        """Número de valores válidos (popcount do bitmask, sem desempacotar)."""
+        bits = self.validade[self.indice(aba), COLUNAS.index(coluna)]
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    def serie(self, aba: str, coluna: str = "Volume_Nm3h") -> np.ndarray:
+        """View float32 (H,) de uma coluna na grade compartilhada (NaN onde inválido)."""
+        return self.valores[self.indice(aba), COLUNAS.index(coluna)]
+
+    def _intervalo(self, aba: str) -> slice:
+        """Trecho da grade entre a primeira e a última hora com algum valor válido."""
+        algum = np.unpackbits(
+            np.bitwise_or.reduce(self.validade[self.indice(aba)], axis=0), count=self.horas.size,
+        )
+        pos = np.flatnonzero(algum)
+        return slice(pos[0], pos[-1] + 1) if pos.size else slice(0, 0)
+
+    def frame(self, aba: str) -> pd.DataFrame:
+        """DataFrame [Data, *COLUNAS] do cliente, com views float32 da grade (sem cópia)."""
+        i, trecho = self.indice(aba), self._intervalo(aba)
+        dados = {"Data": self.datas[trecho]}
+        for j, col in enumerate(COLUNAS):
+            dados[col] = self.valores[i, j, trecho]
+        return pd.DataFrame(dados, copy=False)
+
+    def sem_dados(self, aba: str) -> bool:
+        return self.contagem(aba, "Volume_Nm3h") == 0
+
+    def soma(self, aba: str, coluna: str = "Volume_Nm3h") -> float:
+        """Soma em float64 dos valores válidos (total do cubo)."""
+        return float(self.cubo.total.soma[self.indice(aba), COLUNAS.index(coluna)])
+
+    @cached_property
+    def cubo(self) -> CuboHorario:
+        """Cubo cliente × coluna × dia × hora (montado uma vez, ver ``CuboHorario``)."""
+        return CuboHorario.de_horas(self.horas, self.valores)
+
+    @cached_property
+    def qualidade(self):
+        """Índice RLE de lacunas e qualidade de cada coluna (ver qualidade_dados)."""
+        from qualidade_dados import qualidade_clientes
+        return qualidade_clientes(self.horas, self.valores, list(self), self.duplicadas)
+
+    def completude_pct(self, aba: str, coluna: str = "Volume_Nm3h") -> float | None:
+        """Percentual das horas com valor no período do cliente (consulta ao índice de qualidade)."""
+        return self.qualidade[f"{aba}/{coluna}"].completude_pct()
+
+    def media_movel(self, aba: str, coluna: str = "Volume_Nm3h", janela: int = 24,
+                    centrada: bool = False) -> np.ndarray:
+        """Média móvel alinhada às linhas de ``frame(aba)``, calculada no cubo."""
+        mm = self.cubo.media_movel(self.indice(aba), COLUNAS.index(coluna), janela, centrada)
+        return mm[self.horas[self._intervalo(aba)] - self.cubo.d0 * 24]
+
+    def resumos(self) -> list[dict]:
+        """Estatísticas de todos os clientes a partir dos totais do cubo (float64).
+
+        Cada dict: nome, sem_dados, vol_soma, vol_media, vol_min, vol_max,
+        press_media, temp_media, completude_pct (None quando não há valores).
+        """
+        t = self.cubo.total
+        media = t.media
+        vol, press, temp = (COLUNAS.index(col) for col in COLUNAS)
+
+        def _val(arr, i, j):
+            return float(arr[i, j]) if t.n[i, j] else None
+
+        resumos = []
+        for i, aba in enumerate(self.clientes.categories):
+            resumos.append({
+                "nome": self.nomes[aba],
+                "sem_dados": not t.n[i, vol],
+                "vol_soma": float(t.soma[i, vol]),
+                "vol_media": _val(media, i, vol),
+                "vol_min": _val(t.min, i, vol),
+                "vol_max": _val(t.max, i, vol),
+                "press_media": _val(media, i, press),
+                "temp_media": _val(media, i, temp),
+                "completude_pct": self.completude_pct(aba),
+            })
+        return resumos
+
+    def resumo(self, aba: str) -> dict:
+        """Estatísticas de um cliente (ver ``resumos``)."""
+        return self.resumos()[self.indice(aba)]
+
+    def longo(self) -> pd.DataFrame:
+        """Formato longo (Hora, Cliente categórico, *COLUNAS) só com as horas com algum valor."""
+        c, h = len(self.clientes), self.horas.size
+        algum = np.unpackbits(np.bitwise_or.reduce(self.validade, axis=1), axis=-1, count=h).astype(bool)
+        ci, hi = np.nonzero(algum)
+        df = pd.DataFrame({
+            "Hora": self.horas[hi],
+            "Cliente": pd.Categorical.from_codes(ci.astype(np.int16 if c < 2**15 else np.int32),
+                                                 categories=self.clientes.categories),
+        })
+        for j, col in enumerate(COLUNAS):
+            df[col] = self.valores[ci, j, hi]
+        return df
+
+    @property
+    def nbytes(self) -> int:
+        return self.horas.nbytes + self.valores.nbytes + self.validade.nbytes
+
+    # ------------------------------------------------------------------
+    # Mapping aba -> {"nome", "dados", "sem_dados"}
+    # ------------------------------------------------------------------
+    def __getitem__(self, aba: str) -> dict:
+        if aba not in self.nomes:
+            raise KeyError(aba)
+        return {"nome": self.nomes[aba], "dados": self.frame(aba), "sem_dados": self.sem_dados(aba)}
+
+    def __iter__(self):
+        return iter(self.clientes.categories)
+
+    def __len__(self) -> int:
+        return len(self.clientes.categories)
@@ -15,6 +15,8 @@ from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml.ns import qn, nsdecls
 from docx.oxml import parse_xml
 
+from variantes_graficos import variante
+
 # Equações LaTeX → OMML
 try:
     import latex2mathml.converter
@@ -621,13 +623,13 @@ class AuditReportBuilder:
         self.doc.add_paragraph("")
 
     def add_graph(self, filename: str, caption: str, width_inches: float = 5.5):
-        """Insere gráfico PNG com legenda centralizada."""
+        """Insere gráfico PNG (variante de impressão, se houver) com legenda centralizada."""
         path = os.path.join(self.graficos_dir, filename)
         if os.path.exists(path):
             p = self.doc.add_paragraph()
             p.alignment = WD_ALIGN_PARAGRAPH.CENTER
             run = p.add_run()
-            run.add_picture(path, width=Inches(width_inches))
+            run.add_picture(str(variante(path, "impressao")), width=Inches(width_inches))
 
             cap_p = self.doc.add_paragraph()
             cap_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -664,7 +666,7 @@ class AuditReportBuilder:
         self,
         title: str,
         introducao: str,
-        tabela: dict | None,
+        tabela: dict | list[dict] | None,
         metodologia_text: str,
         dados_text: str,
         graph_items: list,
@@ -687,7 +689,7 @@ class AuditReportBuilder:
         Args:
             title: Título do capítulo (ex: "2. Análise de Volumes de Entrada")
             introducao: Texto introdutório (sem heading)
-            tabela: dict com titulo, headers, rows (ou None)
+            tabela: dict com titulo, headers, rows, lista desses dicts (ou None)
             metodologia_text: Texto da Fundamentação Teórica
             dados_text: Texto da Análise dos Dados
             graph_items: Lista de (filename, caption) dos gráficos
@@ -708,8 +710,8 @@ class AuditReportBuilder:
                 self.add_diagram(filepath, caption)
 
         # 3. Tabela de dados
-        if tabela:
-            self.add_data_table(tabela["titulo"], tabela["headers"], tabela["rows"])
+        for t in ([tabela] if isinstance(tabela, dict) else tabela or []):
+            self.add_data_table(t["titulo"], t["headers"], t["rows"])
 
         # 4. Fundamentação Teórica
         if metodologia_text and metodologia_text.strip():
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Energia horária por cliente (E = Volume × PCS) e balanço energético do distrito.
+
+O PCS é medido na entrada, em geral uma vez por dia (ou em intervalos
+intradiários). Cada hora de cliente recebe o último PCS disponível no
+início da hora (junção "as-of"): um ``np.searchsorted`` sobre os carimbos
+ordenados do PCS, para todas as horas e clientes de uma vez, sem merge nem
+objetos por linha. Carimbos dos clientes marcam o fim da hora (ver
+balanco_temporal), então a hora que termina às 01:00 de D usa o PCS de D.
+
+    energia[c, h] = Volume_Nm3h[c, h] × PCS(h) / 10⁶   (Gcal)
+
+O balanço energético compara a energia de entrada (Concessionaria_Nm3d ×
+PCS_Conc_kcal, como em extrair_energia) com a soma das energias dos
+clientes; clientes sem dados horários entram com o volume de referência ×
+PCS médio.
+
+Uso:
+    from energia_clientes import calcular_energia_clientes
+    ec = calcular_energia_clientes(snapshot.clientes, snapshot.pcs)
+    ec.serie("Cliente #1")
+    balanco_energetico(entrada_gcal, ec.por_cliente(VOLUMES_REFERENCIA))
+"""
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dados_horarios import COLUNAS, ClientesHorarios, horas_epoch
+
+logger = logging.getLogger(__name__)
+
+# Idade máxima do PCS usado numa hora: cobre um dia sem medição de PCS
+TOLERANCIA_HORAS = 48
+
+
+def pcs_asof(
+    horas_fim: np.ndarray,
+    pcs_datas,
+    pcs_valores,
+    tolerancia_horas: int | None = TOLERANCIA_HORAS,
+) -> np.ndarray:
+    """PCS vigente em cada hora (junção as-of sobre arrays ordenados).
+
+    Args:
+        horas_fim: Horas desde a época dos carimbos de fim de hora (int64).
+        pcs_datas, pcs_valores: Medições de PCS (datas e kcal/m³), em qualquer ordem.
+        tolerancia_horas: Hora sem PCS mais recente que isso recebe NaN (None = sem limite).
+
+    Returns:
+        Array float64 com o PCS de cada hora (NaN sem PCS disponível).
+    """
+    h_pcs = horas_epoch(np.asarray(pcs_datas, dtype="datetime64[ns]"))
+    v_pcs = np.asarray(pcs_valores, dtype=np.float64)
+    ok = ~np.isnan(v_pcs)
+    h_pcs, v_pcs = h_pcs[ok], v_pcs[ok]
+    ordem = np.argsort(h_pcs, kind="stable")
+    h_pcs, v_pcs = h_pcs[ordem], v_pcs[ordem]
+
+    inicio = np.asarray(horas_fim, dtype=np.int64) - 1
+    if not h_pcs.size:
+        return np.full(inicio.shape, np.nan)
+    pos = np.searchsorted(h_pcs, inicio, side="right") - 1
+    idx = np.maximum(pos, 0)
+    valido = pos >= 0
+    if tolerancia_horas is not None:
+        valido &= inicio - h_pcs[idx] <= tolerancia_horas
+    return np.where(valido, v_pcs[idx], np.nan)
+
+
+@dataclass(eq=False)
+class EnergiaClientes:
+    """Energia horária (C, H) em Gcal na grade compartilhada dos clientes."""
+    clientes: ClientesHorarios
+    pcs: np.ndarray
+    energia_gcal: np.ndarray
+
+    @property
+    def totais_gcal(self) -> np.ndarray:
+        """Energia total (C,) de cada cliente, em float64."""
+        return np.nansum(self.energia_gcal, axis=1)
+
+    def serie(self, aba: str) -> pd.DataFrame:
+        """Data, Volume_Nm3h, PCS_kcal e Energia_Gcal do cliente (só horas com energia)."""
+        i = self.clientes.indice(aba)
+        ok = ~np.isnan(self.energia_gcal[i])
+        return pd.DataFrame({
+            "Data": self.clientes.datas[ok],
+            "Volume_Nm3h": self.clientes.serie(aba)[ok],
+            "PCS_kcal": self.pcs[ok],
+            "Energia_Gcal": self.energia_gcal[i, ok],
+        })
+
+    def horas_sem_pcs(self) -> int:
+        """Horas com volume medido mas sem PCS vigente (ficam fora da energia)."""
+        vol = self.clientes.valores[:, COLUNAS.index("Volume_Nm3h")]
+        return int(np.count_nonzero(~np.isnan(vol) & np.isnan(self.pcs)[None, :]))
+
+    def por_cliente(self, referencias: dict[str, float] | None = None,
+                    pcs_medio: float | None = None) -> dict[str, float]:
+        """Energia total (Gcal) por nome de cliente.
+
+        Clientes sem dados horários entram com o volume de referência
+        (``referencias``, Nm³) × ``pcs_medio`` (padrão: média do PCS vigente).
+        """
+        referencias = referencias or {}
+        if pcs_medio is None:
+            pcs_medio = float(np.nanmean(self.pcs)) if np.any(~np.isnan(self.pcs)) else 0.0
+        totais = self.totais_gcal
+        energia = {}
+        for i, aba in enumerate(self.clientes):
+            nome = self.clientes.nomes[aba]
+            if self.clientes.sem_dados(aba):
+                energia[nome] = referencias.get(nome, 0) * pcs_medio / 1e6
+            else:
+                energia[nome] = float(totais[i])
+        return energia
+
+
+def balanco_energetico(entrada_gcal: float, energia_clientes: dict[str, float]) -> dict:
+    """Energia de entrada vs soma das energias dos clientes.
+
+    Returns:
+        dict com clientes [(nome, gcal, participação %)] em ordem decrescente,
+        saida_gcal, diferenca_gcal e diferenca_pct.
+    """
+    saida = sum(energia_clientes.values())
+    return {
+        "clientes": [(nome, e, e / saida * 100 if saida else 0.0)
+                     for nome, e in sorted(energia_clientes.items(), key=lambda x: x[1], reverse=True)],
+        "saida_gcal": saida,
+        "diferenca_gcal": entrada_gcal - saida,
+        "diferenca_pct": (entrada_gcal - saida) / entrada_gcal * 100 if entrada_gcal else 0.0,
+    }
+
+
+def calcular_energia_clientes(
+    clientes: ClientesHorarios,
+    pcs: pd.DataFrame,
+    coluna_pcs: str = "PCS_Conc_kcal",
+    tolerancia_horas: int | None = TOLERANCIA_HORAS,
+) -> EnergiaClientes:
+    """Energia horária de todos os clientes com o PCS da entrada (aba de PCS)."""
+    pcs_h = pcs_asof(clientes.horas, pcs["Data"].to_numpy("datetime64[ns]"),
+                     pcs[coluna_pcs].to_numpy(np.float64), tolerancia_horas)
+    vol = clientes.valores[:, COLUNAS.index("Volume_Nm3h")]
+    energia = vol * (pcs_h / 1e6)[None, :]
+    ec = EnergiaClientes(clientes=clientes, pcs=pcs_h, energia_gcal=energia)
+    sem_pcs = ec.horas_sem_pcs()
+    if sem_pcs:
+        logger.warning(f"  Energia por cliente: {sem_pcs} horas com volume sem PCS vigente")
+    return ec
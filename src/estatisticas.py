@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Estatísticas descritivas das séries do distrito.
+
+- ``resumir``: kernel vetorizado que calcula, de uma vez para várias
+  colunas, contagem, NaN, soma, mínimo, máximo, média, variância e máximo
+  absoluto. Usado por todos os ``extrair_*``.
+- ``Agregado`` / ``Correlacao``: acumuladores online (Welford) e
+  combináveis, para séries lidas em blocos ou em partições: usados pela
+  extração incremental para incorporar apenas as linhas novas de cada série.
+
+Uso:
+    from estatisticas import resumir
+    r = resumir(df[["Concessionaria_Nm3d", "Dif_Pct_Calc"]])
+    r["Concessionaria_Nm3d"]["media"], r["Dif_Pct_Calc"]["absmax"]
+"""
+import math
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+CAMPOS = ("n", "nulos", "soma", "min", "max", "media", "variancia", "desvio", "absmax")
+
+
+@dataclass
+class Resumo:
+    """Estatísticas por coluna (um array de tamanho k por campo), ver ``resumir``."""
+    nomes: list
+    n: np.ndarray
+    nulos: np.ndarray
+    soma: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    media: np.ndarray
+    variancia: np.ndarray
+    absmax: np.ndarray
+
+    @property
+    def desvio(self) -> np.ndarray:
+        return np.sqrt(self.variancia)
+
+    def __getitem__(self, nome) -> dict:
+        """Estatísticas de uma coluna como floats (min/max/média NaN se não houver valores)."""
+        i = self.nomes.index(nome)
+        return {campo: (int if campo in ("n", "nulos") else float)(getattr(self, campo)[i])
+                for campo in CAMPOS}
+
+
+def resumir(dados, nomes: list | None = None) -> Resumo:
+    """Estatísticas de várias colunas numa única chamada vetorizada.
+
+    Args:
+        dados: DataFrame (uma estatística por coluna), array 2D (k, n) com uma
+            série por linha, ou dict nome -> array 1D (mesmo comprimento).
+        nomes: Rótulos das séries quando ``dados`` é um array.
+
+    As colunas são copiadas uma vez para um bloco contíguo (k, n); cada
+    redução percorre o eixo contíguo e acumula em float64 (também para
+    entradas float32). NaN são ignorados. A variância é amostral (ddof=1),
+    calculada em duas passadas como em ``pd.Series.std``, e o máximo
+    absoluto sai de max(|min|, |max|) sem nova passada.
+    """
+    if isinstance(dados, pd.DataFrame):
+        nomes = list(dados.columns)
+        x = np.ascontiguousarray(dados.to_numpy(np.float64).T)
+    elif isinstance(dados, dict):
+        nomes = list(dados)
+        x = np.vstack([np.asarray(v) for v in dados.values()]) if dados else np.empty((0, 0))
+    else:
+        x = np.atleast_2d(np.asarray(dados))
+        nomes = list(nomes) if nomes is not None else list(range(x.shape[0]))
+    if x.dtype.kind != "f":
+        x = x.astype(np.float64)
+    x = np.ascontiguousarray(x)
+
+    validos = ~np.isnan(x)
+    n = validos.sum(axis=1)
+    soma = np.where(validos, x, 0).sum(axis=1, dtype=np.float64)
+    vazia = n == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(vazia, np.nan, soma / np.maximum(n, 1))
+        desvios = np.where(validos, (media[:, None] - x) ** 2, 0)
+        variancia = np.where(n > 1, desvios.sum(axis=1, dtype=np.float64) / (n - 1), np.nan)
+    mn = np.where(validos, x, np.inf).min(axis=1, initial=np.inf).astype(np.float64)
+    mx = np.where(validos, x, -np.inf).max(axis=1, initial=-np.inf).astype(np.float64)
+    mn[vazia] = np.nan
+    mx[vazia] = np.nan
+    absmax = np.fmax(np.abs(mn), np.abs(mx))
+
+    return Resumo(
+        nomes=nomes, n=n, nulos=x.shape[1] - n, soma=soma, min=mn, max=mx,
+        media=media, variancia=variancia, absmax=absmax,
+    )
+
+
+@dataclass
+class Agregado:
+    """Estatísticas de uma série, acumuladas bloco a bloco (NaN ignorados).
+
+    Média e variância pelo método de Welford na forma por blocos de Chan
+    et al.: cada bloco é resumido por ``resumir`` (n, média, M2) e combinado
+    ao estado sem guardar a série. ``combinar`` junta agregados de partições
+    distintas (outros processos, outros arquivos) com o mesmo resultado de
+    processar a série inteira, a menos de arredondamento.
+    """
+    n: int = 0
+    media: float = math.nan
+    m2: float = 0.0
+    soma: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    absmax: float = 0.0
+
+    @classmethod
+    def de_valores(cls, valores) -> "Agregado":
+        return cls().atualizar(valores)
+
+    def atualizar(self, valores) -> "Agregado":
+        r = resumir(np.asarray(valores, dtype=np.float64).reshape(1, -1))
+        n = int(r.n[0])
+        if n:
+            m2 = float(r.variancia[0]) * (n - 1) if n > 1 else 0.0
+            self.combinar(Agregado(
+                n=n, media=float(r.media[0]), m2=m2, soma=float(r.soma[0]),
+                min=float(r.min[0]), max=float(r.max[0]), absmax=float(r.absmax[0]),
+            ))
+        return self
+
+    def combinar(self, outro: "Agregado") -> "Agregado":
+        """Incorpora ``outro`` (fórmula de Chan para média e M2)."""
+        if outro.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.media, self.m2 = outro.n, outro.media, outro.m2
+        else:
+            n = self.n + outro.n
+            delta = outro.media - self.media
+            self.media += delta * outro.n / n
+            self.m2 += outro.m2 + delta * delta * self.n * outro.n / n
+            self.n = n
+        self.soma += outro.soma
+        self.min = min(self.min, outro.min)
+        self.max = max(self.max, outro.max)
+        self.absmax = max(self.absmax, outro.absmax)
+        return self
+
+    def __add__(self, outro: "Agregado") -> "Agregado":
+        return Agregado(**asdict(self)).combinar(outro)
+
+    @property
+    def variancia(self) -> float:
+        """Variância amostral (ddof=1), como ``pd.Series.std``."""
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def desvio(self) -> float:
+        return math.sqrt(self.variancia)
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        if self.n == 0:
+            d.update(media=None, min=None, max=None)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Agregado":
+        d = dict(d)
+        if d.get("n", 0) == 0:
+            d.update(media=math.nan, min=math.inf, max=-math.inf)
+        return cls(**d)
+
+
+@dataclass
+class Correlacao:
+    """Coeficiente de Pearson acumulável (pares completos), via co-momento.
+
+    Guarda médias, somas de quadrados dos desvios (M2) e o co-momento
+    C = Σ(x - x̄)(y - ȳ), combinados por bloco como em ``Agregado``.
+    """
+    n: int = 0
+    media_x: float = 0.0
+    media_y: float = 0.0
+    m2_x: float = 0.0
+    m2_y: float = 0.0
+    c_xy: float = 0.0
+
+    def atualizar(self, x, y) -> "Correlacao":
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ok = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[ok], y[ok]
+        if x.size:
+            mx, my = x.mean(), y.mean()
+            dx, dy = x - mx, y - my
+            self.combinar(Correlacao(
+                n=int(x.size), media_x=float(mx), media_y=float(my),
+                m2_x=float(np.dot(dx, dx)), m2_y=float(np.dot(dy, dy)), c_xy=float(np.dot(dx, dy)),
+            ))
+        return self
+
+    def combinar(self, outro: "Correlacao") -> "Correlacao":
+        if outro.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.media_x, self.media_y = outro.n, outro.media_x, outro.media_y
+            self.m2_x, self.m2_y, self.c_xy = outro.m2_x, outro.m2_y, outro.c_xy
+            return self
+        n = self.n + outro.n
+        fator = self.n * outro.n / n
+        dx = outro.media_x - self.media_x
+        dy = outro.media_y - self.media_y
+        self.m2_x += outro.m2_x + dx * dx * fator
+        self.m2_y += outro.m2_y + dy * dy * fator
+        self.c_xy += outro.c_xy + dx * dy * fator
+        self.media_x += dx * outro.n / n
+        self.media_y += dy * outro.n / n
+        self.n = n
+        return self
+
+    def __add__(self, outro: "Correlacao") -> "Correlacao":
+        return Correlacao(**asdict(self)).combinar(outro)
+
+    @property
+    def r(self) -> float:
+        if self.n < 2 or self.m2_x <= 0 or self.m2_y <= 0:
+            return math.nan
+        return self.c_xy / math.sqrt(self.m2_x * self.m2_y)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Correlacao":
+        return cls(**d)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Extração incremental: incorpora apenas os dias novos desde a última execução.
+
+Para cada ponto de medição guarda a última data já ingerida (marca d'água)
+e agregados acumulados (estatisticas.Agregado / Correlacao). A cada novo
+arquivo, só as linhas posteriores à marca são processadas e somadas aos
+agregados; as dataclasses VolumesEntrada, PCSData, EnergiaData,
+PerfisClientes e BalancoMassa são remontadas a partir deles, sem reler o
+histórico. O balanço diário guarda entrada, saída e cobertura por dia de
+gás; só os dias ainda incompletos são recalculados a cada arquivo.
+Assume-se que as linhas anteriores à marca não mudaram; para reprocessar
+tudo, apague o arquivo de estado.
+
+Uso:
+    from extracao_incremental import extrair_incremental
+    dados = extrair_incremental("planilha_do_mes.xlsx")
+"""
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+from balanco_temporal import COBERTURA_MINIMA, _bandas, balanco_diario
+from correcao_ptz import GRANDEZAS, grandezas_ptz, resumir_conversao
+from dados_distrito import EnergiaData, PCSData, VolumesEntrada
+from dados_horarios import horas_epoch
+from energia_clientes import balanco_energetico, pcs_asof
+from estatisticas import Agregado, Correlacao
+from extrator_dados import (
+    _campos_energia_clientes, _montar_balanco, _montar_config, _montar_perfis, extrair_incertezas,
+)
+from graph_generator import VOLUMES_REFERENCIA, WorkbookSnapshot, carregar_snapshot
+
+logger = logging.getLogger(__name__)
+
+ESTADO_DEFAULT = CACHE_DIR / "estado_incremental.json"
+VERSAO_ESTADO = 6
+
+
+def _energia_calc(vol: pd.DataFrame, pcs: pd.DataFrame) -> pd.DataFrame:
+    """E = Volume × PCS nas datas presentes nas duas séries (mesmo merge de extrair_energia)."""
+    df = pd.merge(
+        vol[["Data", "Concessionaria_Nm3d"]], pcs[["Data", "PCS_Conc_kcal"]],
+        on="Data", how="inner",
+    )
+    df["E_Conc"] = df["Concessionaria_Nm3d"] * df["PCS_Conc_kcal"]
+    df["E_Conc_Gcal"] = df["E_Conc"] / 1e6
+    return df
+
+
+class EstadoIncremental:
+    """Marcas d'água por ponto + agregados acumulados, serializáveis em JSON."""
+
+    def __init__(self, raw: dict | None = None):
+        raw = raw or {}
+        self.marcas: dict[str, pd.Timestamp] = {
+            k: pd.Timestamp(v) for k, v in raw.get("marcas", {}).items()
+        }
+        self.data_min = pd.Timestamp(raw["data_min"]) if raw.get("data_min") else None
+        self.linhas: dict[str, int] = dict(raw.get("linhas", {}))
+        self.agregados: dict[str, Agregado] = {
+            k: Agregado.from_dict(v) for k, v in raw.get("agregados", {}).items()
+        }
+        self.correlacoes: dict[str, Correlacao] = {
+            k: Correlacao.from_dict(v) for k, v in raw.get("correlacoes", {}).items()
+        }
+        # Dia de gás -> [entrada, saída medida, cobertura] (clientes sem dados somados em ``dados``)
+        self.diario: dict[str, list] = dict(raw.get("diario", {}))
+
+    def to_dict(self) -> dict:
+        return {
+            "versao": VERSAO_ESTADO,
+            "marcas": {k: v.isoformat() for k, v in self.marcas.items()},
+            "data_min": self.data_min.isoformat() if self.data_min is not None else None,
+            "linhas": self.linhas,
+            "agregados": {k: v.to_dict() for k, v in self.agregados.items()},
+            "correlacoes": {k: v.to_dict() for k, v in self.correlacoes.items()},
+            "diario": self.diario,
+        }
+
+    def agg(self, chave: str) -> Agregado:
+        return self.agregados.setdefault(chave, Agregado())
+
+    def corr(self, chave: str) -> Correlacao:
+        return self.correlacoes.setdefault(chave, Correlacao())
+
+    def _novas(self, df: pd.DataFrame, ponto: str, avancar: bool = True) -> pd.DataFrame:
+        """Linhas com Data posterior à marca do ponto (e avança a marca)."""
+        marca = self.marcas.get(ponto)
+        novas = df if marca is None else df[df["Data"] > marca]
+        if avancar and len(novas):
+            self.marcas[ponto] = novas["Data"].max()
+        return novas
+
+    # ------------------------------------------------------------------
+    # Incorporação das linhas novas
+    # ------------------------------------------------------------------
+    def incorporar(self, snapshot: WorkbookSnapshot) -> int:
+        """Soma aos agregados as linhas novas do snapshot. Retorna quantas foram incorporadas."""
+        total = 0
+
+        # Volumes de entrada
+        vol = self._novas(snapshot.volumes, "vol_entrada")
+        self.agg("volumes.conc").atualizar(vol["Concessionaria_Nm3d"])
+        self.agg("volumes.dif_pct").atualizar(vol["Dif_Pct_Calc"])
+        if len(vol):
+            dmin = vol["Data"].min()
+            self.data_min = dmin if self.data_min is None else min(self.data_min, dmin)
+        total += len(vol)
+
+        # PCS (diferença apenas onde as duas medições existem: NaN se propaga)
+        pcs = self._novas(snapshot.pcs, "pcs_entrada")
+        self.agg("pcs.conc").atualizar(pcs["PCS_Conc_kcal"])
+        self.agg("pcs.dif_pct").atualizar(
+            (pcs["PCS_Conc_kcal"] - pcs["PCS_Transp_kcal"]) / pcs["PCS_Conc_kcal"] * 100
+        )
+        total += len(pcs)
+
+        # Energia: datas novas presentes em volumes e PCS
+        ene = self._novas(_energia_calc(
+            self._filtrar(snapshot.volumes, "energia"),
+            self._filtrar(snapshot.pcs, "energia"),
+        ), "energia")
+        self.agg("energia.e_gcal").atualizar(ene["E_Conc_Gcal"])
+        self.corr("energia.vol_e").atualizar(ene["Concessionaria_Nm3d"], ene["E_Conc_Gcal"])
+
+        # Validação contra a aba "Energia Ent"
+        if snapshot.energia is not None and len(snapshot.energia):
+            calc = _energia_calc(
+                self._filtrar(snapshot.volumes, "energia_planilha"),
+                self._filtrar(snapshot.pcs, "energia_planilha"),
+            )
+            merged = self._novas(pd.merge(
+                calc[["Data", "E_Conc"]], snapshot.energia[["Data", "E_Plan"]],
+                on="Data", how="inner",
+            ), "energia_planilha")
+            self.agg("energia.dif_plan").atualizar(merged["E_Conc"] - merged["E_Plan"])
+            self.agg("energia.e_plan").atualizar(merged["E_Plan"])
+
+        # Clientes
+        for aba, info in snapshot.clientes.items():
+            df = self._novas(info["dados"], aba)
+            self.linhas[aba] = self.linhas.get(aba, 0) + len(df)
+            self.agg(f"{aba}.vol").atualizar(df["Volume_Nm3h"])
+            self.agg(f"{aba}.press").atualizar(df["Pressao_bara"])
+            self.agg(f"{aba}.temp").atualizar(df["Temperatura_C"])
+            # Horas com algum valor: delimitam o período comum usado na completude
+            h = horas_epoch(df["Data"].to_numpy("datetime64[ns]"))
+            algum = df[["Volume_Nm3h", "Pressao_bara", "Temperatura_C"]].notna().any(axis=1).to_numpy()
+            self.agg(f"{aba}.horas").atualizar(h[algum])
+            pcs_h = pcs_asof(h, snapshot.pcs["Data"].to_numpy("datetime64[ns]"),
+                             snapshot.pcs["PCS_Conc_kcal"].to_numpy(np.float64))
+            self.agg(f"{aba}.energia").atualizar(df["Volume_Nm3h"].to_numpy(np.float64) * pcs_h / 1e6)
+            ptz = grandezas_ptz(df["Volume_Nm3h"], df["Pressao_bara"], df["Temperatura_C"])
+            for k, x in ptz.items():
+                self.agg(f"{aba}.ptz.{k}").atualizar(x)
+            total += len(df)
+
+        # Balanço diário: dias já completos ficam como estão; os demais são recalculados
+        diario = balanco_diario(snapshot.volumes, snapshot.clientes, u_entrada=0.0, u_saida=0.0)
+        for data, ent, sai, cob in zip(diario["Data"], diario["Entrada_Nm3"],
+                                       diario["Saida_Nm3"], diario["Cobertura"]):
+            chave = data.strftime("%Y-%m-%d")
+            atual = self.diario.get(chave)
+            if atual is None or atual[0] is None or atual[2] < COBERTURA_MINIMA:
+                self.diario[chave] = [None if pd.isna(ent) else float(ent), float(sai), float(cob)]
+
+        return total
+
+    def _filtrar(self, df: pd.DataFrame, ponto: str) -> pd.DataFrame:
+        return self._novas(df, ponto, avancar=False)
+
+    # ------------------------------------------------------------------
+    # Remontagem das dataclasses
+    # ------------------------------------------------------------------
+    def dados(self, snapshot: WorkbookSnapshot) -> dict:
+        """Mesmo dict de ``extrair_todos``, montado a partir dos agregados."""
+        conc = self.agg("volumes.conc")
+        dif_vol = self.agg("volumes.dif_pct")
+        volumes = VolumesEntrada(
+            vol_medio_nm3d=conc.media,
+            vol_min_nm3d=conc.min,
+            vol_max_nm3d=conc.max,
+            vol_desvio_nm3d=conc.desvio,
+            vol_medio_m3h=conc.media / 24,
+            vol_min_m3h=conc.min / 24,
+            vol_max_m3h=conc.max / 24,
+            vol_total_nm3=conc.soma,
+            dif_conc_transp_media_pct=dif_vol.media / 100,
+            dif_conc_transp_max_pct=dif_vol.absmax / 100,
+        )
+
+        pcs_c = self.agg("pcs.conc")
+        dif_pcs = self.agg("pcs.dif_pct")
+        pcs = PCSData(
+            media_kcal=pcs_c.media,
+            min_kcal=pcs_c.min,
+            max_kcal=pcs_c.max,
+            desvio_padrao=pcs_c.desvio,
+            dif_conc_transp_media_pct=dif_pcs.media,
+            dif_conc_transp_max_pct=dif_pcs.absmax,
+        )
+
+        e = self.agg("energia.e_gcal")
+        dif_plan = self.agg("energia.dif_plan")
+        e_plan = self.agg("energia.e_plan")
+        dif_calc_plan_kcal = dif_plan.media if dif_plan.n else 0.0
+        dif_calc_plan_pct = 0.0
+        if e_plan.n and e_plan.media != 0:
+            dif_calc_plan_pct = dif_calc_plan_kcal / e_plan.media * 100
+        energia_cli = {}
+        for aba, info in snapshot.clientes.items():
+            nome = info["nome"]
+            if self.linhas.get(aba, 0) == 0 or self.agg(f"{aba}.vol").n == 0:
+                energia_cli[nome] = VOLUMES_REFERENCIA.get(nome, 0) * pcs_c.media / 1e6
+            else:
+                energia_cli[nome] = self.agg(f"{aba}.energia").soma
+        energia = EnergiaData(
+            media_gcal_dia=e.media,
+            min_gcal_dia=e.min,
+            max_gcal_dia=e.max,
+            total_gcal=e.soma,
+            dif_calculado_planilha_kcal=dif_calc_plan_kcal,
+            dif_calculado_planilha_pct=dif_calc_plan_pct,
+            correlacao_vol_energia=self.corr("energia.vol_e").r,
+            **_campos_energia_clientes(balanco_energetico(e.soma, energia_cli)),
+        )
+
+        # Período comum dos clientes (primeira à última hora com algum valor)
+        horas = [self.agg(f"{aba}.horas") for aba in snapshot.clientes]
+        horas = [h for h in horas if h.n]
+        periodo = max(h.max for h in horas) - min(h.min for h in horas) + 1 if horas else 0
+
+        resumos = []
+        conversao = []
+        volumes_clientes = {}
+        for aba, info in snapshot.clientes.items():
+            nome = info["nome"]
+            vol = self.agg(f"{aba}.vol")
+            press = self.agg(f"{aba}.press")
+            temp = self.agg(f"{aba}.temp")
+            sem_dados = self.linhas.get(aba, 0) == 0 or vol.n == 0
+            resumos.append({
+                "nome": nome,
+                "sem_dados": sem_dados,
+                "vol_soma": vol.soma,
+                "vol_media": vol.media if vol.n else None,
+                "vol_min": vol.min if vol.n else None,
+                "vol_max": vol.max if vol.n else None,
+                "press_media": press.media if press.n else None,
+                "temp_media": temp.media if temp.n else None,
+                "completude_pct": vol.n / periodo * 100 if periodo else None,
+            })
+            volumes_clientes[nome] = VOLUMES_REFERENCIA.get(nome, 0) if sem_dados else vol.soma
+            if not sem_dados:
+                conversao.append(resumir_conversao(
+                    nome, vol.n, {k: self.agg(f"{aba}.ptz.{k}") for k in GRANDEZAS}))
+
+        incertezas = extrair_incertezas()
+        diario = None
+        if self.diario:
+            # Clientes sem dados horários: volume de referência rateado pelos dias
+            ref = sum(VOLUMES_REFERENCIA.get(r["nome"], 0) for r in resumos if r["sem_dados"])
+            dias = sorted(self.diario)
+            ent, sai, cob = zip(*(self.diario[d] for d in dias))
+            diario = _bandas(pd.DataFrame({
+                "Data": pd.to_datetime(dias),
+                "Entrada_Nm3": [float("nan") if e is None else e for e in ent],
+                "Saida_Nm3": [s + ref / len(dias) for s in sai],
+                "Cobertura": cob,
+            }), incertezas.u_entrada_rss_pct / 100, incertezas.u_saida_rss_pct / 100)
+        return {
+            "config": _montar_config(self.data_min, self.marcas["vol_entrada"]),
+            2: volumes,
+            3: pcs,
+            4: energia,
+            5: _montar_perfis(resumos, conversao),
+            6: incertezas,
+            7: _montar_balanco(conc.soma, volumes_clientes, incertezas, diario),
+        }
+
+
+def carregar_estado(path: str | Path = ESTADO_DEFAULT) -> EstadoIncremental:
+    """Carrega o estado salvo; estado vazio se não existir ou for de outra versão."""
+    path = Path(path)
+    if path.exists():
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        if raw.get("versao") == VERSAO_ESTADO:
+            return EstadoIncremental(raw)
+        logger.warning(f"Estado incremental de versão diferente ignorado: {path}")
+    return EstadoIncremental()
+
+
+def salvar_estado(estado: EstadoIncremental, path: str | Path = ESTADO_DEFAULT):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(estado.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def extrair_incremental(
+    fonte: WorkbookSnapshot | str | Path,
+    estado_path: str | Path = ESTADO_DEFAULT,
+) -> dict:
+    """Incorpora as linhas novas de ``fonte`` ao estado salvo e devolve os dados atualizados."""
+    snapshot = carregar_snapshot(fonte)
+    estado = carregar_estado(estado_path)
+    novas = estado.incorporar(snapshot)
+    salvar_estado(estado, estado_path)
+    logger.info(f"  Incremental: {novas} linhas novas incorporadas")
+    return estado.dados(snapshot)
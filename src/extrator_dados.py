@@ -1,30 +1,39 @@
 # -*- coding: utf-8 -*-
 """
 Extração dinâmica de dados estatísticos a partir do Excel do distrito.
-Reutiliza os loaders de graph_generator.py e preenche as dataclasses de dados_distrito.py.
+Reutiliza o WorkbookSnapshot de graph_generator.py e preenche as dataclasses de dados_distrito.py.
 
 Uso:
     from extrator_dados import extrair_todos
-    dados = extrair_todos("caminho/para/excel.xlsx")
+    dados = extrair_todos("caminho/para/excel.xlsx")  # ou um WorkbookSnapshot
     # dados = {2: VolumesEntrada(...), 3: PCSData(...), ...}
 """
 import json
 import logging
 import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import asdict
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import numpy as np
 import pandas as pd
 
 from graph_generator import (
-    _load_volumes, _load_pcs, _load_clientes,
+    WorkbookSnapshot, carregar_snapshot,
     CLIENTES, INCERTEZAS, VOLUMES_REFERENCIA,
 )
+from estatisticas import Correlacao, resumir
+from monte_carlo import simular_balanco
+from balanco_temporal import balanco_diario, resumir_diario
+from indice_balanco import IndiceBalanco, construir_indice
+from energia_clientes import balanco_energetico, calcular_energia_clientes
+from correcao_ptz import ConversaoCliente, conversao_clientes
 from dados_distrito import (
     DistritoConfig, VolumesEntrada, PCSData, EnergiaData,
-    PerfisClientes, ClienteInfo, IncertezasData, BalancoMassa,
+    PerfisClientes, ClienteInfo, IncertezasData, BalancoMassa, TabelaClientes,
 )
 
 logger = logging.getLogger(__name__)
@@ -36,8 +45,10 @@ logger = logging.getLogger(__name__)
 
 def extrair_config(df_vol: pd.DataFrame) -> DistritoConfig:
     """Extrai metadados do período a partir do DataFrame de volumes."""
-    data_min = df_vol["Data"].min()
-    data_max = df_vol["Data"].max()
+    return _montar_config(df_vol["Data"].min(), df_vol["Data"].max())
+
+
+def _montar_config(data_min: pd.Timestamp, data_max: pd.Timestamp) -> DistritoConfig:
     dias = (data_max - data_min).days + 1
     return DistritoConfig(
         periodo_inicio=data_min.strftime("%d/%m/%Y"),
@@ -50,148 +61,172 @@ def extrair_config(df_vol: pd.DataFrame) -> DistritoConfig:
     )
 
 
-def extrair_volumes(excel_path: str | Path) -> VolumesEntrada:
+def extrair_volumes(snapshot: WorkbookSnapshot) -> VolumesEntrada:
     """Extrai estatísticas de volumes de entrada."""
-    df = _load_volumes(excel_path)
-    conc = df["Concessionaria_Nm3d"]
+    r = resumir(snapshot.volumes[["Concessionaria_Nm3d", "Dif_Pct_Calc"]])
+    conc, dif = r["Concessionaria_Nm3d"], r["Dif_Pct_Calc"]
     return VolumesEntrada(
-        vol_medio_nm3d=float(conc.mean()),
-        vol_min_nm3d=float(conc.min()),
-        vol_max_nm3d=float(conc.max()),
-        vol_desvio_nm3d=float(conc.std()),
-        vol_medio_m3h=float(conc.mean() / 24),
-        vol_min_m3h=float(conc.min() / 24),
-        vol_max_m3h=float(conc.max() / 24),
-        vol_total_nm3=float(conc.sum()),
-        dif_conc_transp_media_pct=float(df["Dif_Pct_Calc"].mean() / 100),
-        dif_conc_transp_max_pct=float(df["Dif_Pct_Calc"].abs().max() / 100),
+        vol_medio_nm3d=conc["media"],
+        vol_min_nm3d=conc["min"],
+        vol_max_nm3d=conc["max"],
+        vol_desvio_nm3d=conc["desvio"],
+        vol_medio_m3h=conc["media"] / 24,
+        vol_min_m3h=conc["min"] / 24,
+        vol_max_m3h=conc["max"] / 24,
+        vol_total_nm3=conc["soma"],
+        dif_conc_transp_media_pct=dif["media"] / 100,
+        dif_conc_transp_max_pct=dif["absmax"] / 100,
     )
 
 
-def extrair_pcs(excel_path: str | Path) -> PCSData:
+def extrair_pcs(snapshot: WorkbookSnapshot) -> PCSData:
     """Extrai estatísticas do PCS."""
-    df = _load_pcs(excel_path)
-    pcs_conc = df["PCS_Conc_kcal"].dropna()
-    pcs_transp = df["PCS_Transp_kcal"].dropna()
+    df = snapshot.pcs
+    conc = df["PCS_Conc_kcal"].to_numpy(np.float64)
+    transp = df["PCS_Transp_kcal"].to_numpy(np.float64)
     # Diferença percentual entre concessionária e transportadora
-    df_clean = df.dropna(subset=["PCS_Conc_kcal", "PCS_Transp_kcal"])
-    dif_pct = ((df_clean["PCS_Conc_kcal"] - df_clean["PCS_Transp_kcal"]) / df_clean["PCS_Conc_kcal"] * 100)
+    # (NaN quando falta qualquer uma das medições, ignorado pelo kernel)
+    r = resumir({"conc": conc, "dif_pct": (conc - transp) / conc * 100})
+    pcs_conc, dif_pct = r["conc"], r["dif_pct"]
     return PCSData(
-        media_kcal=float(pcs_conc.mean()),
-        min_kcal=float(pcs_conc.min()),
-        max_kcal=float(pcs_conc.max()),
-        desvio_padrao=float(pcs_conc.std()),
-        dif_conc_transp_media_pct=float(dif_pct.mean()),
-        dif_conc_transp_max_pct=float(dif_pct.abs().max()),
+        media_kcal=pcs_conc["media"],
+        min_kcal=pcs_conc["min"],
+        max_kcal=pcs_conc["max"],
+        desvio_padrao=pcs_conc["desvio"],
+        dif_conc_transp_media_pct=dif_pct["media"],
+        dif_conc_transp_max_pct=dif_pct["absmax"],
     )
 
 
-def extrair_energia(excel_path: str | Path) -> EnergiaData:
+def extrair_energia(snapshot: WorkbookSnapshot) -> EnergiaData:
     """Extrai estatísticas de energia (E = Volume × PCS)."""
-    df_vol = _load_volumes(excel_path)[["Data", "Concessionaria_Nm3d", "Transportadora_Nm3d"]]
+    df_vol = snapshot.volumes[["Data", "Concessionaria_Nm3d", "Transportadora_Nm3d"]]
     df_vol.columns = ["Data", "Vol_Conc", "Vol_Transp"]
-    df_pcs = _load_pcs(excel_path)[["Data", "PCS_Conc_kcal", "PCS_Transp_kcal"]]
+    df_pcs = snapshot.pcs[["Data", "PCS_Conc_kcal", "PCS_Transp_kcal"]]
     df_pcs.columns = ["Data", "PCS_Conc", "PCS_Transp"]
 
     df = pd.merge(df_vol, df_pcs, on="Data", how="inner")
     df["E_Conc"] = df["Vol_Conc"] * df["PCS_Conc"]  # kcal
     df["E_Transp"] = df["Vol_Transp"] * df["PCS_Transp"]
     df["E_Conc_Gcal"] = df["E_Conc"] / 1e6
+    e = resumir(df[["E_Conc_Gcal"]])["E_Conc_Gcal"]
 
-    # Tentar ler a aba de energia da planilha para validação
-    # Colunas: Data, Vol Conc m3, PC Conc kcal/m3, Energia Conc kcal, Vol Transp m3
+    # Validação contra a aba de energia da planilha (se disponível)
     dif_calc_plan_kcal = 0.0
     dif_calc_plan_pct = 0.0
-    try:
-        df_ene = pd.read_excel(excel_path, sheet_name="Energia Ent", header=1, usecols="B:F")
-        cols = list(df_ene.columns)
-        df_ene.columns = ["Data", "Vol_Plan", "PCS_Plan", "E_Plan", "Vol_Transp_Plan"]
-        df_ene["Data"] = pd.to_datetime(df_ene["Data"], errors="coerce")
-        df_ene["E_Plan"] = pd.to_numeric(df_ene["E_Plan"], errors="coerce")
-        df_ene = df_ene.dropna(subset=["Data", "E_Plan"])
-        if len(df_ene) > 0:
-            merged = pd.merge(
-                df[["Data", "E_Conc"]],
-                df_ene[["Data", "E_Plan"]],
-                on="Data", how="inner",
-            )
-            if len(merged) > 0:
-                dif_calc_plan_kcal = float((merged["E_Conc"] - merged["E_Plan"]).mean())
-                e_mean = merged["E_Plan"].mean()
-                if e_mean != 0:
-                    dif_calc_plan_pct = float(dif_calc_plan_kcal / e_mean * 100)
-    except Exception:
-        pass
+    df_ene = snapshot.energia
+    if df_ene is not None and len(df_ene) > 0:
+        merged = pd.merge(
+            df[["Data", "E_Conc"]],
+            df_ene[["Data", "E_Plan"]],
+            on="Data", how="inner",
+        )
+        if len(merged) > 0:
+            r = resumir({
+                "dif": (merged["E_Conc"] - merged["E_Plan"]).to_numpy(),
+                "e_plan": merged["E_Plan"].to_numpy(np.float64),
+            })
+            dif_calc_plan_kcal = r["dif"]["media"]
+            e_mean = r["e_plan"]["media"]
+            if e_mean != 0:
+                dif_calc_plan_pct = float(dif_calc_plan_kcal / e_mean * 100)
 
     # Correlação entre volume e energia calculada
-    corr = float(df["Vol_Conc"].corr(df["E_Conc_Gcal"]))
+    corr = Correlacao().atualizar(df["Vol_Conc"], df["E_Conc_Gcal"]).r
+
+    # Energia horária por cliente (PCS vigente em cada hora) vs energia de entrada
+    ec = calcular_energia_clientes(snapshot.clientes, snapshot.pcs)
+    pcs_medio = resumir(snapshot.pcs[["PCS_Conc_kcal"]])["PCS_Conc_kcal"]["media"]
+    balanco = balanco_energetico(e["soma"], ec.por_cliente(VOLUMES_REFERENCIA, pcs_medio))
 
     return EnergiaData(
-        media_gcal_dia=float(df["E_Conc_Gcal"].mean()),
-        min_gcal_dia=float(df["E_Conc_Gcal"].min()),
-        max_gcal_dia=float(df["E_Conc_Gcal"].max()),
-        total_gcal=float(df["E_Conc_Gcal"].sum()),
+        media_gcal_dia=e["media"],
+        min_gcal_dia=e["min"],
+        max_gcal_dia=e["max"],
+        total_gcal=e["soma"],
         dif_calculado_planilha_kcal=dif_calc_plan_kcal,
         dif_calculado_planilha_pct=dif_calc_plan_pct,
         correlacao_vol_energia=corr,
+        **_campos_energia_clientes(balanco),
     )
 
 
-def extrair_perfis(excel_path: str | Path) -> PerfisClientes:
-    """Extrai perfis estatísticos dos clientes."""
-    dados_clientes = _load_clientes(excel_path)
+def _campos_energia_clientes(balanco: dict) -> dict:
+    """Campos energia_* de EnergiaData a partir de energia_clientes.balanco_energetico."""
+    return {
+        "energia_clientes": [(nome, round(gcal, 2), round(pct, 2)) for nome, gcal, pct in balanco["clientes"]],
+        "energia_saida_gcal": round(balanco["saida_gcal"], 2),
+        "energia_dif_gcal": round(balanco["diferenca_gcal"], 2),
+        "energia_dif_pct": round(balanco["diferenca_pct"], 3),
+    }
 
-    # Calcular volumes totais para participação
-    volumes_totais = {}
-    for aba, info in dados_clientes.items():
-        nome = info["nome"]
-        if info["sem_dados"]:
-            volumes_totais[nome] = VOLUMES_REFERENCIA.get(nome, 0)
-        else:
-            volumes_totais[nome] = float(info["dados"]["Volume_Nm3h"].sum())
-    soma_total = sum(volumes_totais.values())
-
-    clientes_info = []
-    for aba, info in dados_clientes.items():
-        nome = info["nome"]
-        df = info["dados"]
-        vol_total = volumes_totais[nome]
-
-        if info["sem_dados"] or df["Volume_Nm3h"].dropna().empty:
-            clientes_info.append(ClienteInfo(
-                nome=nome,
-                vol_total_mm3=round(vol_total / 1e6, 2),
-                vol_medio_nm3h=0,
-                vol_min_nm3h=0,
-                vol_max_nm3h=0,
-                press_media_bara=None,
-                temp_media_c=None,
-                fator_carga=None,
-                participacao_pct=round(vol_total / soma_total * 100, 2) if soma_total else 0,
-                incerteza_pct=INCERTEZAS.get(nome, 0) * 100,
-            ))
-        else:
-            vol = df["Volume_Nm3h"].dropna()
-            press = df["Pressao_bara"].dropna()
-            temp = df["Temperatura_C"].dropna()
-            vol_max = float(vol.max()) if len(vol) > 0 else 1
-            fator = float(vol.mean() / vol_max) if vol_max > 0 else None
-            clientes_info.append(ClienteInfo(
-                nome=nome,
-                vol_total_mm3=round(vol_total / 1e6, 2),
-                vol_medio_nm3h=round(float(vol.mean())),
-                vol_min_nm3h=round(float(vol.min())),
-                vol_max_nm3h=round(float(vol.max())),
-                press_media_bara=round(float(press.mean()), 2) if len(press) > 0 else None,
-                temp_media_c=round(float(temp.mean()), 2) if len(temp) > 0 else None,
-                fator_carga=round(fator, 3) if fator is not None else None,
-                participacao_pct=round(vol_total / soma_total * 100, 2) if soma_total else 0,
-                incerteza_pct=INCERTEZAS.get(nome, 0) * 100,
-            ))
-
-    # Ordenar por participação decrescente
-    clientes_info.sort(key=lambda c: c.participacao_pct, reverse=True)
-    return PerfisClientes(clientes=clientes_info)
+
+def extrair_perfis(snapshot: WorkbookSnapshot, resumos: list[dict] | None = None) -> PerfisClientes:
+    """Extrai perfis estatísticos dos clientes e a verificação da conversão PTZ.
+
+    ``resumos``: resultado de ``snapshot.clientes.resumos()`` já calculado (opcional).
+    """
+    if resumos is None:
+        resumos = snapshot.clientes.resumos()
+    return _montar_perfis(resumos, conversao_clientes(snapshot.clientes))
+
+
+def _campos_conversao(conversao: list[ConversaoCliente]) -> list[tuple]:
+    """Tuplas de PerfisClientes.conversao a partir de correcao_ptz.conversao_clientes."""
+    def _r(x, casas):
+        return round(x, casas) if x is not None else None
+    return [
+        (c.nome, _r(c.fc_medio, 4), _r(c.fc_min, 4), _r(c.fc_max, 4), _r(c.z_medio, 5),
+         _r(c.efeito_pt_medios_pct, 3), c.horas_invalidas, c.status)
+        for c in conversao
+    ]
+
+
+def _arredondar(valores: np.ndarray, casas: int | None = None) -> list:
+    """round() do Python elemento a elemento (mesmo resultado de antes; np.round difere nos empates)."""
+    return [None if v != v else round(v, casas) for v in valores.tolist()]
+
+
+def _montar_perfis(resumos: list[dict], conversao: list[ConversaoCliente] | None = None) -> PerfisClientes:
+    """Monta PerfisClientes (colunar) a partir das estatísticas de cada cliente.
+
+    Cada resumo: nome, sem_dados, vol_soma, vol_media, vol_min, vol_max,
+    press_media, temp_media, completude_pct (None quando não há valores). ``conversao``
+    traz a verificação PTZ dos clientes com dados horários.
+    """
+    def _col(chave):
+        return np.array([np.nan if r.get(chave) is None else r[chave] for r in resumos], dtype=np.float64)
+
+    nomes = [r["nome"] for r in resumos]
+    sem_dados = np.array([r["sem_dados"] for r in resumos], dtype=bool)
+    referencia = np.array([VOLUMES_REFERENCIA.get(nome, 0) for nome in nomes], dtype=np.float64)
+    # Clientes sem dados entram com o volume de referência (participação e balanço)
+    vol_total = np.where(sem_dados, referencia, _col("vol_soma"))
+    soma_total = vol_total.sum()
+    participacao = vol_total / soma_total * 100 if soma_total else np.zeros(len(resumos))
+
+    media, vmin, vmax = (np.where(sem_dados, 0.0, _col(k)) for k in ("vol_media", "vol_min", "vol_max"))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fator = np.where(~sem_dados & (vmax > 0), media / vmax, np.nan)
+
+    clientes = TabelaClientes({
+        "nome": nomes,
+        "vol_total_mm3": _arredondar(vol_total / 1e6, 2),
+        "vol_medio_nm3h": _arredondar(media),
+        "vol_min_nm3h": _arredondar(vmin),
+        "vol_max_nm3h": _arredondar(vmax),
+        "press_media_bara": _arredondar(np.where(sem_dados, np.nan, _col("press_media")), 2),
+        "temp_media_c": _arredondar(np.where(sem_dados, np.nan, _col("temp_media")), 2),
+        "fator_carga": _arredondar(fator, 3),
+        "participacao_pct": _arredondar(participacao, 2),
+        "incerteza_pct": [INCERTEZAS.get(nome, 0) * 100 for nome in nomes],
+        "completude_pct": _arredondar(_col("completude_pct"), 2),
+    }).ordenar("participacao_pct")
+
+    # Verificação PTZ na mesma ordem (participação decrescente)
+    ordem = {nome: i for i, nome in enumerate(clientes.nomes)}
+    conversao = sorted(conversao or [], key=lambda c: ordem.get(c.nome, len(ordem)))
+    return PerfisClientes(clientes=clientes, conversao=_campos_conversao(conversao))
 
 
 def extrair_incertezas() -> IncertezasData:
@@ -219,20 +254,82 @@ def extrair_incertezas() -> IncertezasData:
     )
 
 
-def extrair_balanco(excel_path: str | Path, incertezas: IncertezasData) -> BalancoMassa:
-    """Extrai dados do balanço de massa."""
-    df_vol = _load_volumes(excel_path)
-    vol_entrada = float(df_vol["Concessionaria_Nm3d"].sum())
-    dados_clientes = _load_clientes(excel_path)
+def extrair_balanco(
+    snapshot: WorkbookSnapshot,
+    incertezas: IncertezasData,
+    resumos: list[dict] | None = None,
+) -> BalancoMassa:
+    """Extrai dados do balanço de massa (``resumos`` como em ``extrair_perfis``)."""
+    vol_entrada = resumir(snapshot.volumes[["Concessionaria_Nm3d"]])["Concessionaria_Nm3d"]["soma"]
+    if resumos is None:
+        resumos = snapshot.clientes.resumos()
 
     volumes_clientes = {}
-    for aba, info in dados_clientes.items():
-        nome = info["nome"]
-        if info["sem_dados"]:
+    for r in resumos:
+        nome = r["nome"]
+        if r["sem_dados"]:
             volumes_clientes[nome] = VOLUMES_REFERENCIA.get(nome, 0)
         else:
-            volumes_clientes[nome] = float(info["dados"]["Volume_Nm3h"].sum())
+            volumes_clientes[nome] = r["vol_soma"]
+    return _montar_balanco(vol_entrada, volumes_clientes, incertezas,
+                           extrair_balanco_diario(snapshot, incertezas))
+
+
+def extrair_balanco_diario(snapshot: WorkbookSnapshot, incertezas: IncertezasData) -> pd.DataFrame:
+    """Balanço por dia de gás (ver balanco_temporal.balanco_diario)."""
+    return balanco_diario(
+        snapshot.volumes, snapshot.clientes,
+        u_entrada=incertezas.u_entrada_rss_pct / 100,
+        u_saida=incertezas.u_saida_rss_pct / 100,
+        referencias=VOLUMES_REFERENCIA,
+    )
+
+
+def extrair_indice_balanco(snapshot: WorkbookSnapshot, incertezas: IncertezasData) -> IndiceBalanco:
+    """Índice de somas acumuladas para consultas de balanço por intervalo (ver indice_balanco)."""
+    return construir_indice(
+        snapshot.volumes, snapshot.pcs, snapshot.clientes,
+        u_entrada=incertezas.u_entrada_rss_pct / 100,
+        u_saida=incertezas.u_saida_rss_pct / 100,
+        referencias=VOLUMES_REFERENCIA,
+    )
+
+
+def _campos_diario(diario: pd.DataFrame) -> dict:
+    """Campos diario_* de BalancoMassa a partir do DataFrame de balanco_diario."""
+    r = resumir_diario(diario)
+
+    def _opt(v):
+        return None if math.isnan(v) else round(v, 3)
+
+    serie = [
+        (data.strftime("%Y-%m-%d"),
+         None if math.isnan(ent) else round(ent), round(sai),
+         _opt(dif), bool(sob), bool(completo))
+        for data, ent, sai, dif, sob, completo in zip(
+            diario["Data"], diario["Entrada_Nm3"], diario["Saida_Nm3"],
+            diario["Dif_Pct"], diario["Sobrepoe"], r["completos"],
+        )
+    ]
+    return {
+        "diario_dias": r["dias"],
+        "diario_dias_completos": r["dias_completos"],
+        "diario_dias_sobrepoem": r["dias_sobrepoem"],
+        "diario_dif_media_pct": _opt(r["dif_media_pct"]),
+        "diario_dif_desvio_pct": _opt(r["dif_desvio_pct"]),
+        "diario_dif_min_pct": _opt(r["dif_min_pct"]),
+        "diario_dif_max_pct": _opt(r["dif_max_pct"]),
+        "diario_serie": serie,
+    }
 
+
+def _montar_balanco(
+    vol_entrada: float,
+    volumes_clientes: dict,
+    incertezas: IncertezasData,
+    diario: pd.DataFrame | None = None,
+) -> BalancoMassa:
+    """Monta BalancoMassa a partir do volume de entrada, dos volumes por cliente e do balanço diário."""
     vol_saida_total = sum(volumes_clientes.values())
     diferenca = vol_entrada - vol_saida_total
     diferenca_pct = (diferenca / vol_entrada * 100) if vol_entrada else 0
@@ -251,6 +348,15 @@ def extrair_balanco(excel_path: str | Path, incertezas: IncertezasData) -> Balan
         for nome, vol in sorted(volumes_clientes.items(), key=lambda x: x[1], reverse=True)
     ]
 
+    # Propagação completa (Monte Carlo), com cada incerteza sobre o volume do seu medidor
+    mc = simular_balanco(
+        vol_entrada,
+        volumes_clientes,
+        u_entrada={"Tramo 101": incertezas.tramo_101_pct / 100, "Tramo 501": incertezas.tramo_501_pct / 100},
+        u_saida={nome: u / 100 for nome, u in incertezas.incertezas_clientes},
+        limite_pct=incertezas.limite_apropriacao_pct,
+    )
+
     return BalancoMassa(
         vol_entrada_nm3=round(vol_entrada),
         vol_saida_total_nm3=round(vol_saida_total),
@@ -265,6 +371,14 @@ def extrair_balanco(excel_path: str | Path, incertezas: IncertezasData) -> Balan
         bandas_sobrepoem=sobrepoe,
         resultado="ACEITAVEL" if sobrepoe else "INACEITAVEL",
         volumes_saida=volumes_saida,
+        mc_amostras=mc.n_amostras,
+        mc_diferenca_media_pct=round(mc.media_pct, 3),
+        mc_diferenca_desvio_pct=round(mc.desvio_pct, 3),
+        mc_intervalo_min_pct=round(mc.intervalo_pct[0], 3),
+        mc_intervalo_max_pct=round(mc.intervalo_pct[1], 3),
+        mc_limite_pct=mc.limite_pct,
+        mc_prob_inaceitavel=round(mc.prob_inaceitavel, 4),
+        **(_campos_diario(diario) if diario is not None else {}),
     )
 
 
@@ -272,9 +386,79 @@ def extrair_balanco(excel_path: str | Path, incertezas: IncertezasData) -> Balan
 # Orquestrador
 # ---------------------------------------------------------------------------
 
-def extrair_todos(excel_path: str | Path) -> dict:
+SECOES = (2, 3, 4, 5, 6, 7)
+TAREFAS_SECAO = {2: "volumes", 3: "pcs", 4: "energia", 5: "perfis", 6: "incertezas", 7: "balanco"}
+
+
+def _cronometrar(fn: Callable, *args) -> tuple[object, float]:
+    t0 = time.perf_counter()
+    return fn(*args), time.perf_counter() - t0
+
+
+def _executar_tarefas(
+    tarefas: dict[str, tuple[Callable, tuple[str, ...]]],
+    max_workers: int | None = None,
+    on_progress: Callable | None = None,
+) -> tuple[dict, dict]:
+    """Executa um grafo de tarefas num ThreadPoolExecutor.
+
+    ``tarefas``: nome -> (função, dependências). Cada tarefa é submetida assim
+    que as suas dependências terminam e recebe os resultados delas, na ordem
+    declarada. As threads compartilham o snapshot (as abas são carregadas sob
+    lock, uma vez) e o grosso do trabalho é NumPy/pandas, que liberam o GIL.
+
+    Returns:
+        (resultados, segundos) — ambos indexados pelo nome da tarefa.
+    """
+    pendentes = dict(tarefas)
+    resultados, segundos = {}, {}
+    max_workers = max_workers or min(len(tarefas), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        rodando = {}
+        while pendentes or rodando:
+            for nome, (fn, deps) in list(pendentes.items()):
+                if all(d in resultados for d in deps):
+                    del pendentes[nome]
+                    rodando[pool.submit(_cronometrar, fn, *(resultados[d] for d in deps))] = nome
+            if not rodando:
+                raise ValueError(f"Dependências não satisfeitas: {sorted(pendentes)}")
+            prontos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+            for fut in prontos:
+                nome = rodando.pop(fut)
+                resultados[nome], segundos[nome] = fut.result()
+                if on_progress:
+                    on_progress({"type": "substep_complete", "step": "data_extraction",
+                                 "substep": nome, "seconds": round(segundos[nome], 3)})
+    return resultados, segundos
+
+
+def extrair_todos(
+    fonte: WorkbookSnapshot | str | Path,
+    incremental: bool = False,
+    secoes: list[int] | None = None,
+    on_progress: Callable | None = None,
+    max_workers: int | None = None,
+) -> dict:
     """Extrai todos os dados do Excel e retorna dict de dataclasses.
 
+    As seções rodam em paralelo (``_executar_tarefas``): cada uma depende só
+    das abas que lê, exceto o balanço, que espera as incertezas e os volumes
+    dos clientes (resumos compartilhados com os perfis).
+
+    Args:
+        fonte: WorkbookSnapshot já carregado ou caminho do Excel (lido uma única vez).
+        incremental: Incorpora apenas as linhas posteriores à última execução
+            (ver extracao_incremental) em vez de recalcular todo o histórico.
+            Extrai sempre todas as seções, numa única tarefa.
+        secoes: Extrair apenas estas seções (ex.: [3]); as abas são lidas sob
+            demanda, então só as necessárias são parseadas. None = todas.
+            Não pode ser combinado com ``incremental`` (ValueError).
+        on_progress: Callback opcional; recebe um evento ``substep_complete``
+            (substep, seconds) ao fim de cada tarefa (no modo incremental, um
+            único evento com substep "incremental").
+        max_workers: Threads do pool (None = uma por tarefa, até os núcleos; 1 = sequencial).
+            Ignorado no modo incremental.
+
     Returns:
         {
             "config": DistritoConfig,
@@ -286,40 +470,67 @@ def extrair_todos(excel_path: str | Path) -> dict:
             7: BalancoMassa,
         }
     """
+    if incremental:
+        if secoes:
+            raise ValueError("A extração incremental não aceita 'secoes': ela atualiza todas as seções")
+        from extracao_incremental import extrair_incremental
+        dados, segundos = _cronometrar(extrair_incremental, fonte)
+        if on_progress:
+            on_progress({"type": "substep_complete", "step": "data_extraction",
+                         "substep": "incremental", "seconds": round(segundos, 3)})
+        return dados
+
     logger.info("Extraindo dados do Excel...")
-    excel_path = str(excel_path)
+    snapshot = carregar_snapshot(fonte)
+    secoes = set(secoes or SECOES)
+
+    # tarefa -> (função, dependências)
+    grafo = {
+        "config": (lambda: extrair_config(snapshot.volumes), ()),
+        "volumes": (lambda: extrair_volumes(snapshot), ()),
+        "pcs": (lambda: extrair_pcs(snapshot), ()),
+        "energia": (lambda: extrair_energia(snapshot), ()),
+        "clientes": (lambda: snapshot.clientes.resumos(), ()),
+        "perfis": (lambda resumos: extrair_perfis(snapshot, resumos), ("clientes",)),
+        "incertezas": (extrair_incertezas, ()),
+        "balanco": (lambda incertezas, resumos: extrair_balanco(snapshot, incertezas, resumos),
+                    ("incertezas", "clientes")),
+    }
+    necessarias = {"config"} | {TAREFAS_SECAO[s] for s in secoes}
+    for nome in list(necessarias):
+        necessarias.update(grafo[nome][1])
+    resultados, segundos = _executar_tarefas(
+        {nome: grafo[nome] for nome in grafo if nome in necessarias}, max_workers, on_progress,
+    )
 
-    df_vol = _load_volumes(excel_path)
-    config = extrair_config(df_vol)
+    config = resultados["config"]
     logger.info(f"  Período: {config.periodo_inicio} a {config.periodo_fim} ({config.dias} dias)")
-
-    volumes = extrair_volumes(excel_path)
-    logger.info(f"  Volumes: total={volumes.vol_total_nm3:,.0f} Nm³")
-
-    pcs = extrair_pcs(excel_path)
-    logger.info(f"  PCS: média={pcs.media_kcal:,.2f} kcal/m³")
-
-    energia = extrair_energia(excel_path)
-    logger.info(f"  Energia: total={energia.total_gcal:,.0f} Gcal")
-
-    perfis = extrair_perfis(excel_path)
-    logger.info(f"  Clientes: {len(perfis.clientes)} perfis")
-
-    incertezas = extrair_incertezas()
-    logger.info(f"  Incertezas: entrada={incertezas.u_entrada_rss_pct:.2f}%, saída={incertezas.u_saida_rss_pct:.2f}%")
-
-    balanco = extrair_balanco(excel_path, incertezas)
-    logger.info(f"  Balanço: diferença={balanco.diferenca_pct:.2f}%, resultado={balanco.resultado}")
-
-    return {
-        "config": config,
-        2: volumes,
-        3: pcs,
-        4: energia,
-        5: perfis,
-        6: incertezas,
-        7: balanco,
-    }
+    dados = {"config": config}
+    dados.update({s: resultados[TAREFAS_SECAO[s]] for s in SECOES if s in secoes})
+
+    def _t(secao: int) -> str:
+        return f" [{segundos[TAREFAS_SECAO[secao]]:.2f} s]"
+
+    if 2 in dados:
+        logger.info(f"  Volumes: total={dados[2].vol_total_nm3:,.0f} Nm³{_t(2)}")
+    if 3 in dados:
+        logger.info(f"  PCS: média={dados[3].media_kcal:,.2f} kcal/m³{_t(3)}")
+    if 4 in dados:
+        logger.info(f"  Energia: total={dados[4].total_gcal:,.0f} Gcal{_t(4)}")
+    if 5 in dados:
+        logger.info(f"  Clientes: {len(dados[5].clientes)} perfis{_t(5)}")
+    if 6 in dados:
+        incertezas = dados[6]
+        logger.info(f"  Incertezas: entrada={incertezas.u_entrada_rss_pct:.2f}%, "
+                    f"saída={incertezas.u_saida_rss_pct:.2f}%{_t(6)}")
+    if 7 in dados:
+        balanco = dados[7]
+        logger.info(f"  Balanço: diferença={balanco.diferenca_pct:.2f}%, resultado={balanco.resultado}{_t(7)}")
+        if balanco.diario_dias_completos:
+            logger.info(f"  Balanço diário: {balanco.diario_dias_completos} dias completos, "
+                        f"diferença média={balanco.diario_dif_media_pct:.2f}%")
+
+    return dados
 
 
 # ---------------------------------------------------------------------------
@@ -330,6 +541,8 @@ def _serialize(obj):
     """Converte dataclass para dict serializável."""
     if hasattr(obj, "__dataclass_fields__"):
         d = asdict(obj)
+        if isinstance(obj, PerfisClientes):
+            d["clientes"] = obj.clientes.para_json()  # colunar: uma lista por campo
         d["__class__"] = type(obj).__name__
         return d
     return obj
@@ -362,14 +575,21 @@ def carregar_json(path: str | Path) -> dict:
     for key, d in raw.items():
         cls_name = d.pop("__class__", None)
         if cls_name == "PerfisClientes":
-            # Reconstruct ClienteInfo list
-            d["clientes"] = [ClienteInfo(**c) for c in d["clientes"]]
+            # Colunar (uma lista por campo) ou lista de ClienteInfo (JSONs anteriores)
+            clientes = d["clientes"]
+            d["clientes"] = (TabelaClientes(clientes) if isinstance(clientes, dict)
+                             else TabelaClientes.de_linhas(ClienteInfo(**c) for c in clientes))
+            d["conversao"] = [tuple(x) for x in d.get("conversao", [])]
             result[key if key == "config" else int(key)] = PerfisClientes(**d)
         elif cls_name == "IncertezasData":
             d["incertezas_clientes"] = [tuple(x) for x in d["incertezas_clientes"]]
             result[key if key == "config" else int(key)] = IncertezasData(**d)
+        elif cls_name == "EnergiaData":
+            d["energia_clientes"] = [tuple(x) for x in d.get("energia_clientes", [])]
+            result[key if key == "config" else int(key)] = EnergiaData(**d)
         elif cls_name == "BalancoMassa":
             d["volumes_saida"] = [tuple(x) for x in d["volumes_saida"]]
+            d["diario_serie"] = [tuple(x) for x in d.get("diario_serie", [])]
             result[key if key == "config" else int(key)] = BalancoMassa(**d)
         elif cls_name in CLASS_MAP:
             result[key if key == "config" else int(key)] = CLASS_MAP[cls_name](**d)
@@ -386,16 +606,23 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 
     parser = argparse.ArgumentParser(description="Extrair dados do Excel do distrito")
-    parser.add_argument("--excel", required=True, help="Caminho do Excel")
+    parser.add_argument("--excel", required=True,
+                        help="Caminho do Excel ou da exportação SCADA (diretório/CSV/Parquet)")
     parser.add_argument("--output", default=None, help="Caminho JSON de saída")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Incorporar apenas os dias novos desde a última execução")
+    parser.add_argument("--secoes", type=int, nargs="+", default=None,
+                        help="Extrair apenas estas seções (ex.: --secoes 2 3)")
     args = parser.parse_args()
+    if args.incremental and args.secoes:
+        parser.error("--secoes não pode ser usado com --incremental")
 
-    dados = extrair_todos(args.excel)
+    dados = extrair_todos(args.excel, incremental=args.incremental, secoes=args.secoes)
 
     if args.output:
         salvar_json(dados, args.output)
     else:
         from dados_distrito import formatar_dados_secao
-        for key in [2, 3, 4, 5, 6, 7]:
+        for key in [k for k in SECOES if k in dados]:
             print(f"\n{'='*60}")
             print(formatar_dados_secao(dados[key]))
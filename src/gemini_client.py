@@ -63,14 +63,14 @@ class GeminiAuditClient:
         if include_pdf and self._pdf_file:
             contents.append(self._pdf_file)
 
-        # 2. Imagens PNG inline
+        # 2. Imagens inline (PNG ou WebP)
         for img_path in image_paths:
             p = Path(img_path)
             if p.exists():
                 contents.append(
                     types.Part.from_bytes(
                         data=p.read_bytes(),
-                        mime_type="image/png",
+                        mime_type="image/webp" if p.suffix.lower() == ".webp" else "image/png",
                     )
                 )
                 logger.debug(f"  Imagem anexada: {p.name} ({p.stat().st_size / 1024:.0f} KB)")
@@ -23,6 +23,7 @@ CINZA_CLARO = RGBColor(0xF5, 0xF5, 0xF5)
 BRANCO = RGBColor(0xFF, 0xFF, 0xFF)
 
 from config import GRAFICOS_DIR as _GRAFICOS_PATH, PRESENT_DIR
+from variantes_graficos import variante
 GRAFICOS_DIR = str(_GRAFICOS_PATH)
 
 def add_background(slide, color):
@@ -180,10 +181,10 @@ def add_result_box(slide, left, top, width, height, label, value,
 
 
 def add_image(slide, left, top, width, filename):
-    """Adiciona imagem PNG ao slide se o arquivo existir."""
+    """Adiciona imagem PNG (variante de impressão, se houver) ao slide se o arquivo existir."""
     path = os.path.join(GRAFICOS_DIR, filename)
     if os.path.exists(path):
-        slide.shapes.add_picture(path, Inches(left), Inches(top), Inches(width))
+        slide.shapes.add_picture(str(variante(path, 'impressao')), Inches(left), Inches(top), Inches(width))
         return True
     else:
         # Placeholder com borda quando imagem não existe
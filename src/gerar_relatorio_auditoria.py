@@ -44,8 +44,13 @@ from config import (
     GRAFICOS_DIR, CACHE_DIR, METODOLOGIA_DIR, DIAGRAMAS_DIR,
     REPORTS_DIR, NOTEBOOKS_DIR, COLABS_PDF_DIR, NOTEBOOK_LIST, DATA_DIR, EXCEL_DEFAULT,
 )
-from graph_generator import gerar_todos_graficos
-from extrator_dados import extrair_todos, salvar_json, carregar_json
+from graph_generator import GENERATORS, carregar_snapshot, gerar_todos_graficos
+from extrator_dados import (
+    extrair_todos, salvar_json, carregar_json, extrair_incertezas, extrair_indice_balanco,
+)
+from indice_balanco import INDICE_DEFAULT
+from memo_fase0 import ManifestoFase0, impressoes_fase0
+from variantes_graficos import variante
 
 OUTPUT_DEFAULT = "Relatorio_Auditoria_Distrito.docx"
 
@@ -198,7 +203,7 @@ def generate_subcall(
     # Gerar via API
     sys_prompt, sec_prompt, image_files = prompt_fn(*prompt_args)
 
-    # Converter nomes de arquivos em caminhos completos
+    # Converter nomes de arquivos em caminhos completos (gráficos na variante do LLM)
     image_paths = []
     for f in image_files:
         p = Path(f)
@@ -207,7 +212,7 @@ def generate_subcall(
         else:
             full = GRAFICOS_DIR / f
             if full.exists():
-                image_paths.append(str(full))
+                image_paths.append(str(variante(full, "llm")))
 
     text = client.analyze_section(
         sys_prompt, sec_prompt, image_paths,
@@ -223,8 +228,12 @@ def generate_subcall(
 # GERAÇÃO DE CAPÍTULOS
 # =====================================================================
 
-def generate_chapter_1(client, resume=False, montar=False, on_progress=None) -> ChapterResult:
-    """Capítulo 1: Visão Geral (caso especial — conteúdo + síntese)."""
+def generate_chapter_1(client, resume=False, montar=False, on_progress=None,
+                       perfis: PerfisClientes | None = None) -> ChapterResult:
+    """Capítulo 1: Visão Geral (caso especial — conteúdo + síntese).
+
+    ``perfis`` (capítulo 5 extraído) alimenta a completude dos dados por cliente.
+    """
     logger.info("  [Cap 1] Visão Geral do Distrito e Dados Disponíveis")
     ch = ChapterResult(chapter_num=1, titulo=CHAPTER_CONFIG[1]["titulo"])
 
@@ -233,7 +242,7 @@ def generate_chapter_1(client, resume=False, montar=False, on_progress=None) ->
     metodologia = load_metodologia(1)
     ch.conteudo_cap1 = generate_subcall(
         client, "cap1_a_conteudo",
-        prompt_secao1_conteudo, (metodologia,),
+        prompt_secao1_conteudo, (metodologia, perfis),
         thinking_level="high",
         resume=resume, montar=montar, on_progress=on_progress,
     )
@@ -351,9 +360,10 @@ def assemble_docx(chapters: dict, resumo: str, conclusoes: str, output: str = OU
                 for fname in config["diagram_files"]
             ]
 
-        # Preparar tabela
+        # Preparar tabela(s): tabela_key pode ser uma chave ou uma lista delas
         tabela_key = config.get("tabela_key")
-        tabela = tabelas.get(tabela_key) if tabela_key else None
+        chaves = tabela_key if isinstance(tabela_key, list) else [tabela_key] if tabela_key else []
+        tabela = [tabelas[k] for k in chaves if k in tabelas] or None
 
         # Para Cap 1 (caso especial): conteúdo vai no campo metodologia
         if config.get("special"):
@@ -416,15 +426,90 @@ def parse_args():
                        help="Retomar geração usando cache de sub-chamadas anteriores")
     parser.add_argument("--montar", action="store_true",
                        help="Apenas montar DOCX a partir do cache (sem chamadas API)")
+    parser.add_argument("--dados", default=None,
+                       help="Fonte de dados: Excel, ou exportação SCADA (diretório/CSV/Parquet)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Extração incremental: processar apenas os dias novos desde a última execução")
     return parser.parse_args()
 
 
+def executar_fase0(
+    excel_path: Path,
+    reusar: bool = False,
+    incremental: bool = False,
+    on_progress=None,
+) -> dict:
+    """Extração de dados e gráficos (Fase 0), memoizada por impressão digital.
+
+    Com ``reusar``, cada saída (extração e cada grupo de gráficos) cuja
+    impressão digital (workbook, código e constantes) bate com a do
+    manifesto é reaproveitada; as demais são refeitas. O snapshot é
+    preguiçoso: se tudo for reaproveitado, o Excel nem é aberto.
+    """
+    data_json_path = CACHE_DIR / "extracted_data.json"
+    manifesto = ManifestoFase0.carregar()
+    impressoes = impressoes_fase0(excel_path)
+    snapshot = carregar_snapshot(excel_path)
+
+    # 0a. Extração de dados (Excel ou SCADA, lido uma única vez)
+    _emit(on_progress, "step_start", step="data_extraction")
+    if reusar and manifesto.valido("extracao", impressoes["extracao"], CACHE_DIR):
+        extracted_data = carregar_json(str(data_json_path))
+        logger.info("  Extração reaproveitada (impressão digital inalterada)")
+    else:
+        extracted_data = extrair_todos(snapshot, incremental=incremental, on_progress=on_progress)
+        salvar_json(extracted_data, str(data_json_path))
+        extrair_indice_balanco(snapshot, extrair_incertezas()).salvar(INDICE_DEFAULT)
+        manifesto.registrar("extracao", impressoes["extracao"], [data_json_path.name, INDICE_DEFAULT.name])
+        manifesto.salvar()
+    _emit(on_progress, "step_complete", step="data_extraction")
+
+    # 0b. Geração de gráficos (apenas os grupos com impressão diferente)
+    pendentes = []
+    for grupo, _, _ in GENERATORS:
+        if reusar and manifesto.valido(f"grafico:{grupo}", impressoes[f"grafico:{grupo}"], GRAFICOS_DIR):
+            _emit(on_progress, "step_start", step=f"graphs_{grupo}")
+            _emit(on_progress, "step_complete", step=f"graphs_{grupo}")
+        else:
+            pendentes.append(grupo)
+    reaproveitados = sum(len(manifesto.arquivos(f"grafico:{g}"))
+                         for g, _, _ in GENERATORS if g not in pendentes)
+
+    reusados_cache = []  # PNGs não redesenhados pelo cache de renderização
+
+    def _graph_progress(info):
+        reusados_cache.extend(info.get("reused", []))
+        chave = f"grafico:{info['group']}"
+        if info.get("error"):
+            manifesto.invalidar(chave)
+        else:
+            manifesto.registrar(chave, impressoes[chave], info["files"])
+        step_id = f"graphs_{info['group']}"
+        _emit(on_progress, "step_start", step=step_id)
+        _emit(on_progress, "step_complete", step=step_id)
+
+    gerados = []
+    if pendentes:
+        gerados = gerar_todos_graficos(
+            snapshot,
+            output_dir=str(GRAFICOS_DIR),
+            on_progress=_graph_progress,
+            grupos=pendentes,
+        )
+        manifesto.salvar()
+    reaproveitados += len(reusados_cache)
+    logger.info(f"  Gráficos gerados: {len(gerados) - len(reusados_cache)} PNGs ({reaproveitados} reaproveitados)")
+    return extracted_data
+
+
 def run_pipeline(
     api_key: str,
     output: str = OUTPUT_DEFAULT,
     resume: bool = False,
     montar: bool = False,
     on_progress=None,
+    fonte_dados: str | Path | None = None,
+    incremental: bool = False,
 ):
     """
     Executa o pipeline completo de geração do relatório.
@@ -435,6 +520,9 @@ def run_pipeline(
         resume: Retomar usando cache existente
         montar: Apenas montar DOCX a partir do cache (sem chamadas API)
         on_progress: Callback opcional chamado a cada etapa com um dict de evento
+        fonte_dados: Excel ou exportação SCADA (diretório/CSV/Parquet).
+            Se None, usa o Excel padrão em DATA_DIR.
+        incremental: Extração incremental (apenas linhas novas desde a última execução)
     """
     start_time = time.time()
 
@@ -457,7 +545,7 @@ def run_pipeline(
     # ================================================================
     # FASE 0: EXTRAÇÃO DE DADOS + GERAÇÃO DE GRÁFICOS
     # ================================================================
-    excel_path = DATA_DIR / EXCEL_DEFAULT
+    excel_path = Path(fonte_dados) if fonte_dados else DATA_DIR / EXCEL_DEFAULT
     extracted_data = None
     data_json_path = CACHE_DIR / "extracted_data.json"
 
@@ -468,24 +556,9 @@ def run_pipeline(
         logger.info("=" * 60)
         _emit(on_progress, "phase_start", phase=0, phase_name="Extração de Dados e Gráficos")
 
-        # 0a. Extração de dados do Excel
-        _emit(on_progress, "step_start", step="data_extraction")
-        extracted_data = extrair_todos(str(excel_path))
-        salvar_json(extracted_data, str(data_json_path))
-        _emit(on_progress, "step_complete", step="data_extraction")
-
-        # 0b. Geração de gráficos
-        def _graph_progress(info):
-            step_id = f"graphs_{info['group']}"
-            _emit(on_progress, "step_start", step=step_id)
-            _emit(on_progress, "step_complete", step=step_id)
-
-        gerados = gerar_todos_graficos(
-            excel_path=str(excel_path),
-            output_dir=str(GRAFICOS_DIR),
-            on_progress=_graph_progress,
+        extracted_data = executar_fase0(
+            excel_path, reusar=resume or montar, incremental=incremental, on_progress=on_progress,
         )
-        logger.info(f"  Gráficos gerados: {len(gerados)} PNGs")
         _emit(on_progress, "phase_complete", phase=0)
     else:
         logger.warning(f"  Excel não encontrado: {excel_path}")
@@ -517,6 +590,7 @@ def run_pipeline(
 
     # Preparar dados de cada capítulo (antes de lançar threads)
     cap1_met = load_metodologia(1)
+    cap1_perfis = extracted_data[5] if extracted_data and 5 in extracted_data else None
     cap_data = {}
     for n in range(2, 8):
         # Usar dados dinâmicos se disponíveis, senão hardcoded
@@ -550,7 +624,7 @@ def run_pipeline(
     with ThreadPoolExecutor(max_workers=19) as pool:
         futs = []
         # Cap 1A
-        futs.append(pool.submit(_pcall, "cap1_a_conteudo", prompt_secao1_conteudo, (cap1_met,), "high"))
+        futs.append(pool.submit(_pcall, "cap1_a_conteudo", prompt_secao1_conteudo, (cap1_met, cap1_perfis), "high"))
         # Cap 2-7: A, B, C
         for n in range(2, 8):
             cd = cap_data[n]
@@ -671,6 +745,8 @@ def main():
         output=args.output,
         resume=args.resume,
         montar=args.montar,
+        fonte_dados=args.dados,
+        incremental=args.incremental,
     )
 
 
@@ -18,6 +18,7 @@ if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
 from config import PROJECT_ROOT, GRAFICOS_DIR, DIAGRAMAS_DIR, OUTPUTS_DIR
+from variantes_graficos import variante
 
 from docx import Document
 from docx.shared import Inches, Pt, Cm, RGBColor
@@ -622,7 +623,7 @@ def secao_exemplos(doc):
         ("incertezas_barras.png", "Figura 10 — Incertezas combinadas por ponto de medição"),
     ]
     for arquivo, legenda in graficos:
-        adicionar_imagem(doc, GRAFICOS_DIR / arquivo, legenda)
+        adicionar_imagem(doc, variante(GRAFICOS_DIR / arquivo, "impressao"), legenda)
 
     # 5.2 Diagramas
     doc.add_heading('5.2 Diagramas Gerados pela IA', level=2)
@@ -4,10 +4,17 @@ Gerador de gráficos a partir do Excel de dados do distrito.
 Extraído dos notebooks Jupyter 02-07 para execução standalone.
 
 Uso:
-    from graph_generator import gerar_todos_graficos
-    gerados = gerar_todos_graficos(excel_path, output_dir)
+    from graph_generator import WorkbookSnapshot, gerar_todos_graficos
+    snapshot = WorkbookSnapshot.from_excel(excel_path)
+    gerados = gerar_todos_graficos(snapshot, output_dir)
 """
 import logging
+import os
+import threading
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
 from pathlib import Path
 from typing import Callable
 
@@ -21,6 +28,14 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 
+from amostragem import lttb
+from cache_planilha import chave_cache, carregar_abas, salvar_abas
+from config import USAR_PROCESSOS
+from dados_horarios import NS_HORA, ClientesHorarios, horas_epoch
+from leitores_excel import LeitorExcel, abrir_leitor
+from qualidade_dados import COMPLETUDE_ALERTA_PCT
+from variantes_graficos import gerar_variantes, variantes_atualizadas
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -56,8 +71,22 @@ SAVE_KW = dict(dpi=150, bbox_inches="tight")
 # ---------------------------------------------------------------------------
 # Data loaders
 # ---------------------------------------------------------------------------
-def _load_volumes(excel_path: str | Path) -> pd.DataFrame:
-    df = pd.read_excel(excel_path, sheet_name="Vol Entrada Gas", header=1, usecols="B:F")
+ExcelSource = str | Path | LeitorExcel
+
+# Incrementar sempre que o parsing/normalização das abas mudar:
+# invalida as entradas do cache Parquet (cache_planilha.py).
+LOADER_VERSION = "3"
+
+
+def _ler_aba(excel: ExcelSource, aba: str, header: int, usecols: str) -> pd.DataFrame:
+    """Lê uma aba pelo backend do leitor (ou abre um leitor só para ela)."""
+    if isinstance(excel, LeitorExcel):
+        return excel.ler(aba, header=header, usecols=usecols)
+    with abrir_leitor(excel) as leitor:
+        return leitor.ler(aba, header=header, usecols=usecols)
+
+
+def _parse_volumes(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = ["Data", "Concessionaria_Nm3d", "Transportadora_Nm3d", "Dif_Abs", "Dif_Pct"]
     df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
     for col in ["Concessionaria_Nm3d", "Transportadora_Nm3d"]:
@@ -69,8 +98,7 @@ def _load_volumes(excel_path: str | Path) -> pd.DataFrame:
     return df
 
 
-def _load_pcs(excel_path: str | Path) -> pd.DataFrame:
-    df = pd.read_excel(excel_path, sheet_name="PCS Ent ", header=1, usecols="B:F")
+def _parse_pcs(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = ["Data", "PCS_Conc_kcal", "PCS_Transp_kcal", "Dif_Abs", "Dif_Pct"]
     df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
     for col in ["PCS_Conc_kcal", "PCS_Transp_kcal"]:
@@ -78,32 +106,405 @@ def _load_pcs(excel_path: str | Path) -> pd.DataFrame:
     return df.dropna(subset=["Data"]).reset_index(drop=True)
 
 
-def _load_clientes(excel_path: str | Path) -> dict:
-    dados = {}
-    for aba, nome in CLIENTES.items():
-        df = pd.read_excel(excel_path, sheet_name=aba, header=2, usecols="B:E")
-        df.columns = ["Data", "Volume_Nm3h", "Pressao_bara", "Temperatura_C"]
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
-        for col in ["Volume_Nm3h", "Pressao_bara", "Temperatura_C"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        df = df.dropna(subset=["Data"]).reset_index(drop=True)
-        sem_dados = len(df) == 0 or df["Volume_Nm3h"].dropna().empty
-        dados[aba] = {"nome": nome, "dados": df, "sem_dados": sem_dados}
-    return dados
+def _parse_energia(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = ["Data", "Vol_Plan", "PCS_Plan", "E_Plan", "Vol_Transp_Plan"]
+    df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+    df["E_Plan"] = pd.to_numeric(df["E_Plan"], errors="coerce")
+    return df.dropna(subset=["Data", "E_Plan"]).reset_index(drop=True)
+
+
+def _load_volumes(excel: ExcelSource) -> pd.DataFrame:
+    return _parse_volumes(_ler_aba(excel, "Vol Entrada Gas", header=1, usecols="B:F"))
+
+
+def _load_pcs(excel: ExcelSource) -> pd.DataFrame:
+    return _parse_pcs(_ler_aba(excel, "PCS Ent ", header=1, usecols="B:F"))
+
+
+def _load_energia(excel: ExcelSource) -> pd.DataFrame | None:
+    """Aba "Energia Ent" (opcional, usada apenas para validar o cálculo)."""
+    # Colunas: Data, Vol Conc m3, PC Conc kcal/m3, Energia Conc kcal, Vol Transp m3
+    try:
+        return _parse_energia(_ler_aba(excel, "Energia Ent", header=1, usecols="B:F"))
+    except Exception as e:
+        logger.warning(f"Aba 'Energia Ent' indisponível: {e}")
+        return None
+
+
+COLUNAS_CLIENTE = ["Volume_Nm3h", "Pressao_bara", "Temperatura_C"]
+
+# Número mínimo de abas de clientes para compensar o custo de subir o pool
+# (cada processo reabre e indexa o workbook). Com as 7 abas da planilha do
+# distrito o pool é mais lento que a leitura em série (~0,54 s contra ~0,48 s).
+PARALELO_MIN_ABAS = 32
+
+
+def _parse_cliente(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = ["Data"] + COLUNAS_CLIENTE
+    df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+    for col in COLUNAS_CLIENTE:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.dropna(subset=["Data"]).reset_index(drop=True)
+
+
+def _load_clientes(excel: ExcelSource) -> ClientesHorarios:
+    if not isinstance(excel, LeitorExcel):
+        with abrir_leitor(excel) as leitor:
+            return _load_clientes(leitor)
+    frames = {aba: _parse_cliente(excel.ler(aba, header=2, usecols="B:E")) for aba in CLIENTES}
+    return ClientesHorarios.de_frames(frames, CLIENTES)
+
+
+def _worker_cliente(excel_path: str, backend: str, aba: str) -> tuple[str, str, int]:
+    """Parseia uma aba de cliente num processo do pool.
+
+    O resultado volta por memória compartilhada: um bloco com as datas
+    (int64, ns) seguidas das 3 colunas de medição (float32, o mesmo tipo
+    da grade de ClientesHorarios), sem pickle dos dados. O processo pai é dono do bloco e faz o unlink.
+    """
+    with abrir_leitor(excel_path, backend) as leitor:
+        df = _parse_cliente(leitor.ler(aba, header=2, usecols="B:E"))
+    n = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8 + len(COLUNAS_CLIENTE) * n * 4))
+    datas = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+    valores = np.ndarray((len(COLUNAS_CLIENTE), n), dtype=np.float32, buffer=shm.buf, offset=n * 8)
+    datas[:] = df["Data"].to_numpy("datetime64[ns]").view(np.int64)
+    valores[:] = df[COLUNAS_CLIENTE].to_numpy(np.float64).T
+    del datas, valores
+    shm.close()
+    # O bloco sobrevive a este processo: quem libera é o pai (unlink). O
+    # registro vai para o resource tracker do pai, compartilhado com o pool.
+    return aba, shm.name, n
+
+
+def _frame_compartilhado(nome_shm: str, n: int) -> pd.DataFrame:
+    """Lê (e libera) o bloco de memória compartilhada de ``_worker_cliente``."""
+    shm = shared_memory.SharedMemory(name=nome_shm)
+    try:
+        datas = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+        valores = np.ndarray((len(COLUNAS_CLIENTE), n), dtype=np.float32, buffer=shm.buf, offset=n * 8)
+        df = pd.DataFrame({"Data": datas.view("datetime64[ns]").copy()})
+        for i, col in enumerate(COLUNAS_CLIENTE):
+            df[col] = valores[i].copy()
+        del datas, valores
+    finally:
+        shm.close()
+        shm.unlink()
+    return df
+
+
+def _liberar_bloco(nome_shm: str):
+    try:
+        shm = shared_memory.SharedMemory(name=nome_shm)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _load_clientes_paralelo(excel_path: str | Path, backend: str, max_workers: int | None = None) -> ClientesHorarios:
+    """Mesmo resultado de ``_load_clientes``, com uma aba por tarefa num ProcessPoolExecutor."""
+    abas = list(CLIENTES)
+    max_workers = max_workers or min(len(abas), os.cpu_count() or 1)
+    frames, lidos = {}, set()
+    # Tracker do pai já ativo: os workers (fork ou spawn) registram nele os
+    # blocos que criam, em vez de num tracker próprio que os apagaria ao sair
+    resource_tracker.ensure_running()
+    futs = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futs = [pool.submit(_worker_cliente, str(excel_path), backend, aba) for aba in abas]
+            for fut in futs:
+                aba, nome_shm, n = fut.result()
+                lidos.add(nome_shm)
+                frames[aba] = _frame_compartilhado(nome_shm, n)
+    finally:
+        # Se uma aba falhou, os blocos das que já terminaram não foram lidos
+        for fut in futs:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                _, nome_shm, _ = fut.result()
+                if nome_shm not in lidos:
+                    _liberar_bloco(nome_shm)
+    return ClientesHorarios.de_frames({aba: frames[aba] for aba in abas}, CLIENTES)
+
+
+def _carregar_clientes(leitor: LeitorExcel) -> ClientesHorarios:
+    """Carrega as abas de clientes em paralelo quando compensa; senão, em série."""
+    if USAR_PROCESSOS and (os.cpu_count() or 1) > 1 and len(CLIENTES) >= PARALELO_MIN_ABAS:
+        try:
+            return _load_clientes_paralelo(leitor.path, leitor.backend)
+        except Exception as e:
+            logger.warning(f"Carga paralela de clientes indisponível ({e}); lendo em série")
+    return _load_clientes(leitor)
+
+
+# Conjuntos de dados do snapshot -> abas gravadas no cache Parquet
+ABA_DUPLICADAS = "clientes_duplicadas"  # horas com carimbo repetido (índice de qualidade)
+ABAS_CONJUNTO = {
+    "volumes": ["volumes"],
+    "pcs": ["pcs"],
+    "energia": ["energia"],
+    "clientes": list(CLIENTES) + [ABA_DUPLICADAS],
+}
+
+
+class _LeitorCompartilhado:
+    """Um leitor do workbook por snapshot, aberto no primeiro uso.
+
+    As leituras são serializadas (os backends não são seguros entre threads).
+    O leitor é fechado quando todos os conjuntos de ABAS_CONJUNTO foram
+    carregados (do Excel ou do cache) ou quando o snapshot é descartado.
+    """
+
+    def __init__(self, excel_path: str | Path):
+        self.excel_path = excel_path
+        self._pendentes = set(ABAS_CONJUNTO)
+        self._leitor: LeitorExcel | None = None
+        self._lock = threading.Lock()
+
+    def ler(self, carregar: Callable[[LeitorExcel], object]):
+        with self._lock:
+            if self._leitor is None:
+                self._leitor = abrir_leitor(self.excel_path)
+            return carregar(self._leitor)
+
+    def concluido(self, nome: str):
+        with self._lock:
+            self._pendentes.discard(nome)
+            if not self._pendentes:
+                self._fechar()
+
+    def close(self):
+        with self._lock:
+            self._fechar()
+
+    def _fechar(self):
+        if self._leitor is not None:
+            self._leitor.close()
+            self._leitor = None
+
+
+class WorkbookSnapshot:
+    """Abas usadas pelo pipeline, parseadas sob demanda e memoizadas.
+
+    Passado a todas as funções ``extrair_*`` e ``_dados_*`` dos gráficos no lugar
+    do caminho do Excel. Cada conjunto (volumes, pcs, energia, clientes) é
+    lido na primeira vez em que um extrator ou grupo de gráficos o acessa e
+    reaproveitado no resto da execução: gerar só o capítulo 3 lê apenas as
+    abas de volumes e PCS. Os DataFrames são compartilhados entre
+    consumidores e devem ser tratados como somente leitura. Os clientes
+    ficam na grade compacta de ClientesHorarios (float32 + bitmask, índice
+    horário único) e são carregados juntos, já que a grade é compartilhada.
+    """
+
+    def __init__(
+        self,
+        excel_path: str | Path,
+        volumes: pd.DataFrame | None = None,
+        pcs: pd.DataFrame | None = None,
+        clientes: ClientesHorarios | None = None,
+        energia: pd.DataFrame | None = None,
+        carregadores: dict[str, Callable] | None = None,
+    ):
+        self.excel_path = str(excel_path)
+        self._dados = {
+            nome: valor for nome, valor in
+            (("volumes", volumes), ("pcs", pcs), ("clientes", clientes), ("energia", energia))
+            if valor is not None
+        }
+        self._carregadores = carregadores or {}
+        self._locks = {nome: threading.Lock() for nome in ABAS_CONJUNTO}
+
+    def _obter(self, nome: str):
+        if nome in self._dados:
+            return self._dados[nome]
+        with self._locks[nome]:
+            if nome not in self._dados:
+                carregador = self._carregadores.get(nome)
+                self._dados[nome] = carregador() if carregador else None
+        return self._dados[nome]
+
+    @property
+    def volumes(self) -> pd.DataFrame:
+        return self._obter("volumes")
+
+    @property
+    def pcs(self) -> pd.DataFrame:
+        return self._obter("pcs")
+
+    @property
+    def energia(self) -> pd.DataFrame | None:
+        return self._obter("energia")
+
+    @property
+    def clientes(self) -> ClientesHorarios:
+        return self._obter("clientes")
+
+    @property
+    def qualidade(self):
+        """Índice de lacunas/qualidade dos clientes e das séries diárias (ver qualidade_dados)."""
+        if getattr(self, "_qualidade", None) is None:
+            from qualidade_dados import qualidade_diaria
+            self._qualidade = (
+                self.clientes.qualidade
+                | qualidade_diaria(self.volumes, ["Concessionaria_Nm3d", "Transportadora_Nm3d"], "volumes")
+                | qualidade_diaria(self.pcs, ["PCS_Conc_kcal", "PCS_Transp_kcal"], "pcs")
+            )
+        return self._qualidade
+
+    @property
+    def carregados(self) -> list[str]:
+        """Conjuntos já lidos (na ordem em que foram acessados)."""
+        return list(self._dados)
+
+    def carregar_tudo(self) -> "WorkbookSnapshot":
+        for nome in ABAS_CONJUNTO:
+            self._obter(nome)
+        return self
+
+    @classmethod
+    def from_excel(cls, excel_path: str | Path, usar_cache: bool = True) -> "WorkbookSnapshot":
+        """Snapshot preguiçoso do workbook: nenhuma aba é lida até ser acessada.
+
+        Com ``usar_cache``, cada conjunto é reaproveitado do cache Parquet quando
+        o mesmo arquivo (mesmo SHA-256) já foi parseado por esta versão dos
+        loaders; senão é lido do Excel e gravado no cache. Todos os conjuntos
+        lidos do Excel compartilham um único leitor (o workbook é aberto e
+        indexado uma vez por snapshot).
+        """
+        chave = chave_cache(excel_path, LOADER_VERSION) if usar_cache else None
+        compartilhado = _LeitorCompartilhado(excel_path)
+
+        def _carregador(nome: str, carregar: Callable[[LeitorExcel], object]) -> Callable:
+            def _carregar():
+                abas = carregar_abas(chave, ABAS_CONJUNTO[nome]) if chave else None
+                if abas is not None:
+                    valor = _de_abas(nome, abas)
+                else:
+                    valor = compartilhado.ler(carregar)
+                    logger.info(f"Aba(s) lida(s) do Excel: {nome}")
+                    if chave and valor is not None:
+                        salvar_abas(chave, _para_abas(nome, valor))
+                compartilhado.concluido(nome)
+                return valor
+            return _carregar
+
+        snapshot = cls(excel_path, carregadores={
+            "volumes": _carregador("volumes", _load_volumes),
+            "pcs": _carregador("pcs", _load_pcs),
+            "energia": _carregador("energia", _load_energia),
+            "clientes": _carregador("clientes", _carregar_clientes),
+        })
+        weakref.finalize(snapshot, compartilhado.close)
+        return snapshot
+
+    @classmethod
+    def from_abas(cls, excel_path: str | Path, abas: dict[str, pd.DataFrame]) -> "WorkbookSnapshot":
+        """Reconstrói o snapshot a partir do dict produzido por ``abas()``."""
+        clientes = {aba: abas[aba] for aba in [*CLIENTES, ABA_DUPLICADAS] if aba in abas}
+        return cls(
+            excel_path,
+            volumes=abas["volumes"],
+            pcs=abas["pcs"],
+            clientes=_de_abas("clientes", clientes),
+            energia=abas.get("energia"),
+        )
+
+    def abas(self) -> dict[str, pd.DataFrame]:
+        """DataFrames parseados, um por aba (chaves usadas pelo cache). Carrega tudo."""
+        abas = {}
+        for nome in ABAS_CONJUNTO:
+            valor = self._obter(nome)
+            if valor is not None:
+                abas.update(_para_abas(nome, valor))
+        return abas
+
+
+def _para_abas(nome: str, valor) -> dict[str, pd.DataFrame]:
+    if nome == "clientes":
+        abas = {aba: valor.frame(aba) for aba in valor}
+        dup = [(aba, h) for aba, horas in valor.duplicadas.items() for h in horas]
+        abas[ABA_DUPLICADAS] = pd.DataFrame({
+            "Aba": [aba for aba, _ in dup],
+            "Data": (np.array([h for _, h in dup], dtype=np.int64) * NS_HORA).view("datetime64[ns]"),
+        })
+        return abas
+    return {nome: valor}
+
+
+def _de_abas(nome: str, abas: dict[str, pd.DataFrame]):
+    if nome == "clientes":
+        abas = dict(abas)
+        dup = abas.pop(ABA_DUPLICADAS, None)
+        duplicadas = {}
+        if dup is not None and len(dup):
+            horas = horas_epoch(dup["Data"].to_numpy("datetime64[ns]"))
+            for aba in pd.unique(dup["Aba"]):
+                duplicadas[aba] = horas[(dup["Aba"] == aba).to_numpy()]
+        return ClientesHorarios.de_frames(abas, CLIENTES, duplicadas)
+    return abas[nome]
+
+
+FORMATOS_SCADA = (".csv", ".gz", ".parquet", ".pq")
+
+
+def carregar_snapshot(fonte: WorkbookSnapshot | str | Path) -> WorkbookSnapshot:
+    """Retorna ``fonte`` se já for um snapshot; caso contrário, carrega-o.
+
+    Diretórios e arquivos CSV/Parquet são lidos pela ingestão direta de
+    exportações do SCADA (ingestao_scada.py); demais caminhos, como Excel.
+    """
+    if isinstance(fonte, WorkbookSnapshot):
+        return fonte
+    path = Path(fonte)
+    if path.is_dir() or path.suffix.lower() in FORMATOS_SCADA:
+        from ingestao_scada import carregar_scada
+        return carregar_scada(path)
+    return WorkbookSnapshot.from_excel(path)
+
+
+# ---------------------------------------------------------------------------
+# Cada PNG tem uma função ``_dados_*(snapshot)`` que devolve o payload da
+# figura — só os arrays/DataFrames que ela plota, já parseados — e uma
+# função ``_fig_*`` (payload -> Figure); ambas são declaradas em GRAFICOS.
+# As figuras são independentes: podem ser desenhadas em qualquer processo.
+# ---------------------------------------------------------------------------
+
+def _visiveis(ax: plt.Axes, x, y) -> tuple:
+    """(x, y) reduzidos por LTTB à largura do eixo em pixels do PNG; inalterados se já couberem."""
+    largura = ax.get_window_extent().width * SAVE_KW["dpi"] / ax.figure.dpi
+    idx = lttb(x, y, int(largura))
+    if idx.size == len(y):
+        return x, y
+    return np.asarray(x)[idx], np.asarray(y)[idx]
 
 
 # ---------------------------------------------------------------------------
 # 1. Volumes de Entrada (NB02) — 4 gráficos
 # ---------------------------------------------------------------------------
-def gerar_graficos_volumes(excel_path: str | Path, out: Path) -> list[str]:
-    df = _load_volumes(excel_path)
-    gerados = []
+def _dados_vol_serie(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": snapshot.volumes[["Data", "Concessionaria_Nm3d", "Transportadora_Nm3d"]]}
+
+
+def _dados_vol_diferencas(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": snapshot.volumes[["Data", "Dif_Abs_Calc", "Dif_Pct_Calc"]]}
+
+
+def _dados_vol_histograma(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": snapshot.volumes[["Dif_Abs_Calc", "Dif_Pct_Calc"]]}
 
+
+def _dados_vol_boxplot(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": snapshot.volumes[["Mes", "Concessionaria_Nm3d"]]}
+
+
+def _fig_vol_serie(d: dict) -> plt.Figure:
     # 1.1 Série temporal
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(16, 6))
-    ax.plot(df["Data"], df["Concessionaria_Nm3d"] / 1000,
+    ax.plot(*_visiveis(ax, df["Data"], df["Concessionaria_Nm3d"] / 1000),
             label="Concessionária", color="#2196F3", linewidth=1.5, alpha=0.9)
-    ax.plot(df["Data"], df["Transportadora_Nm3d"] / 1000,
+    ax.plot(*_visiveis(ax, df["Data"], df["Transportadora_Nm3d"] / 1000),
             label="Transportadora", color="#FF5722", linewidth=1.5, alpha=0.7, linestyle="--")
     media = df["Concessionaria_Nm3d"].mean() / 1000
     ax.axhline(y=media, color="gray", linestyle=":", alpha=0.5, label=f"Média: {media:,.0f} mil Nm³/d")
@@ -113,10 +514,12 @@ def gerar_graficos_volumes(excel_path: str | Path, out: Path) -> list[str]:
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
     ax.xaxis.set_major_locator(mdates.MonthLocator())
     plt.xticks(rotation=45); plt.tight_layout()
-    fig.savefig(str(out / "vol_entrada_serie.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("vol_entrada_serie.png")
+    return fig
 
+
+def _fig_vol_diferencas(d: dict) -> plt.Figure:
     # 1.2 Diferenças
+    df = d["df"]
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 8), sharex=True)
     ax1.bar(df["Data"], df["Dif_Abs_Calc"], color="steelblue", alpha=0.7, width=1)
     ax1.axhline(y=0, color="red", linewidth=0.8)
@@ -129,10 +532,12 @@ def gerar_graficos_volumes(excel_path: str | Path, out: Path) -> list[str]:
     ax2.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
     ax2.xaxis.set_major_locator(mdates.MonthLocator())
     plt.xticks(rotation=45); plt.tight_layout()
-    fig.savefig(str(out / "vol_entrada_diferencas.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("vol_entrada_diferencas.png")
+    return fig
+
 
+def _fig_vol_histograma(d: dict) -> plt.Figure:
     # 1.3 Histograma
+    df = d["df"]
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 5))
     ax1.hist(df["Dif_Abs_Calc"], bins=30, color="steelblue", edgecolor="white", alpha=0.8)
     ax1.axvline(x=0, color="red", linewidth=1.5, linestyle="--")
@@ -145,10 +550,12 @@ def gerar_graficos_volumes(excel_path: str | Path, out: Path) -> list[str]:
     ax2.set_title("Distribuição da Diferença Percentual", fontweight="bold")
     ax2.set_xlabel("Diferença (%)"); ax2.set_ylabel("Frequência")
     plt.tight_layout()
-    fig.savefig(str(out / "vol_entrada_histograma.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("vol_entrada_histograma.png")
+    return fig
+
 
+def _fig_vol_boxplot(d: dict) -> plt.Figure:
     # 1.4 Boxplot mensal
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(14, 6))
     meses = df["Mes"].unique()
     dados_box = [df[df["Mes"] == m]["Concessionaria_Nm3d"].values / 1000 for m in meses]
@@ -158,23 +565,26 @@ def gerar_graficos_volumes(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_title("Distribuição Mensal dos Volumes de Entrada (Concessionária)", fontsize=14, fontweight="bold")
     ax.set_xlabel("Mês"); ax.set_ylabel("Volume (10³ Nm³/d)")
     ax.grid(True, alpha=0.3, axis="y"); plt.tight_layout()
-    fig.savefig(str(out / "vol_entrada_boxplot.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("vol_entrada_boxplot.png")
-
-    return gerados
+    return fig
 
 
 # ---------------------------------------------------------------------------
 # 2. PCS (NB03) — 2 gráficos
 # ---------------------------------------------------------------------------
-def gerar_graficos_pcs(excel_path: str | Path, out: Path) -> list[str]:
-    df = _load_pcs(excel_path)
-    gerados = []
+def _dados_pcs_serie(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": snapshot.pcs[["Data", "PCS_Conc_kcal", "PCS_Transp_kcal"]]}
+
+
+def _dados_pcs_histograma(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": snapshot.pcs[["PCS_Conc_kcal", "PCS_Transp_kcal"]]}
 
+
+def _fig_pcs_serie(d: dict) -> plt.Figure:
     # 2.1 Série temporal
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(16, 6))
-    ax.plot(df["Data"], df["PCS_Conc_kcal"], label="Concessionária", color="#4CAF50", linewidth=1.5, alpha=0.9)
-    ax.plot(df["Data"], df["PCS_Transp_kcal"], label="Transportadora", color="#FF9800", linewidth=1.5, alpha=0.7, linestyle="--")
+    ax.plot(*_visiveis(ax, df["Data"], df["PCS_Conc_kcal"]), label="Concessionária", color="#4CAF50", linewidth=1.5, alpha=0.9)
+    ax.plot(*_visiveis(ax, df["Data"], df["PCS_Transp_kcal"]), label="Transportadora", color="#FF9800", linewidth=1.5, alpha=0.7, linestyle="--")
     media = df["PCS_Conc_kcal"].mean()
     ax.axhline(y=media, color="gray", linestyle=":", alpha=0.5, label=f"Média: {media:,.0f} kcal/m³")
     ax.set_title("PCS de Entrada Diário - Concessionária vs Transportadora", fontsize=14, fontweight="bold")
@@ -183,10 +593,12 @@ def gerar_graficos_pcs(excel_path: str | Path, out: Path) -> list[str]:
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
     ax.xaxis.set_major_locator(mdates.MonthLocator())
     plt.xticks(rotation=45); plt.tight_layout()
-    fig.savefig(str(out / "pcs_serie.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("pcs_serie.png")
+    return fig
+
 
+def _fig_pcs_histograma(d: dict) -> plt.Figure:
     # 2.2 Histograma
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(12, 5))
     ax.hist(df["PCS_Conc_kcal"], bins=30, color="#4CAF50", edgecolor="white", alpha=0.7, label="Concessionária")
     ax.hist(df["PCS_Transp_kcal"], bins=30, color="#FF9800", edgecolor="white", alpha=0.5, label="Transportadora")
@@ -197,19 +609,17 @@ def gerar_graficos_pcs(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_title("Distribuição do PCS de Entrada", fontsize=14, fontweight="bold")
     ax.set_xlabel("PCS (kcal/m³)"); ax.set_ylabel("Frequência (dias)")
     ax.legend(); plt.tight_layout()
-    fig.savefig(str(out / "pcs_histograma.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("pcs_histograma.png")
-
-    return gerados
+    return fig
 
 
 # ---------------------------------------------------------------------------
 # 3. Energia (NB04) — 4 gráficos
 # ---------------------------------------------------------------------------
-def gerar_graficos_energia(excel_path: str | Path, out: Path) -> list[str]:
-    df_vol = _load_volumes(excel_path)[["Data", "Concessionaria_Nm3d", "Transportadora_Nm3d"]]
+def _energia_diaria(snapshot: WorkbookSnapshot) -> pd.DataFrame:
+    """Energia diária calculada (volume × PCS) da Concessionária e da Transportadora."""
+    df_vol = snapshot.volumes[["Data", "Concessionaria_Nm3d", "Transportadora_Nm3d"]]
     df_vol.columns = ["Data", "Vol_Conc_Nm3d", "Vol_Transp_Nm3d"]
-    df_pcs = _load_pcs(excel_path)[["Data", "PCS_Conc_kcal", "PCS_Transp_kcal"]]
+    df_pcs = snapshot.pcs[["Data", "PCS_Conc_kcal", "PCS_Transp_kcal"]]
     df_pcs.columns = ["Data", "PCS_Conc", "PCS_Transp"]
 
     df = pd.merge(df_vol, df_pcs, on="Data", how="inner")
@@ -219,12 +629,32 @@ def gerar_graficos_energia(excel_path: str | Path, out: Path) -> list[str]:
     df["Energia_Conc_Gcal"] = df["Energia_Conc_Calc"] / 1e6
     df["Energia_Transp_Gcal"] = df["Energia_Transp_Calc"] / 1e6
     df["Mes"] = df["Data"].dt.to_period("M").astype(str)
-    gerados = []
+    return df
+
+
+def _dados_energia_serie(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": _energia_diaria(snapshot)[["Data", "Energia_Conc_Gcal", "Energia_Transp_Gcal"]]}
+
+
+def _dados_energia_diferencas(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": _energia_diaria(snapshot)[["Data", "Dif_Energia_Abs"]]}
 
+
+def _dados_energia_mensal(snapshot: WorkbookSnapshot) -> dict:
+    df = _energia_diaria(snapshot)
+    return {"mensal": df.groupby("Mes").agg({"Energia_Conc_Gcal": "sum", "Energia_Transp_Gcal": "sum"}).reset_index()}
+
+
+def _dados_energia_scatter(snapshot: WorkbookSnapshot) -> dict:
+    return {"df": _energia_diaria(snapshot)[["Vol_Conc_Nm3d", "Energia_Conc_Gcal", "Energia_Conc_Calc", "PCS_Conc"]]}
+
+
+def _fig_energia_serie(d: dict) -> plt.Figure:
     # 3.1 Série temporal
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(16, 6))
-    ax.plot(df["Data"], df["Energia_Conc_Gcal"], label="Concessionária", color="#9C27B0", linewidth=1.5, alpha=0.9)
-    ax.plot(df["Data"], df["Energia_Transp_Gcal"], label="Transportadora", color="#FF9800", linewidth=1.5, alpha=0.7, linestyle="--")
+    ax.plot(*_visiveis(ax, df["Data"], df["Energia_Conc_Gcal"]), label="Concessionária", color="#9C27B0", linewidth=1.5, alpha=0.9)
+    ax.plot(*_visiveis(ax, df["Data"], df["Energia_Transp_Gcal"]), label="Transportadora", color="#FF9800", linewidth=1.5, alpha=0.7, linestyle="--")
     media = df["Energia_Conc_Gcal"].mean()
     ax.axhline(y=media, color="gray", linestyle=":", alpha=0.5, label=f"Média: {media:,.0f} Gcal/d")
     ax.set_title("Energia de Entrada Diária - Concessionária vs Transportadora", fontsize=14, fontweight="bold")
@@ -233,10 +663,12 @@ def gerar_graficos_energia(excel_path: str | Path, out: Path) -> list[str]:
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
     ax.xaxis.set_major_locator(mdates.MonthLocator())
     plt.xticks(rotation=45); plt.tight_layout()
-    fig.savefig(str(out / "energia_serie.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("energia_serie.png")
+    return fig
+
 
+def _fig_energia_diferencas(d: dict) -> plt.Figure:
     # 3.2 Diferenças
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(16, 5))
     ax.bar(df["Data"], df["Dif_Energia_Abs"] / 1e6, color="purple", alpha=0.6, width=1)
     ax.axhline(y=0, color="red", linewidth=0.8)
@@ -244,11 +676,12 @@ def gerar_graficos_energia(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_ylabel("Diferença (Gcal)"); ax.set_xlabel("Data"); ax.grid(True, alpha=0.3)
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
     plt.xticks(rotation=45); plt.tight_layout()
-    fig.savefig(str(out / "energia_diferencas.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("energia_diferencas.png")
+    return fig
 
+
+def _fig_energia_mensal(d: dict) -> plt.Figure:
     # 3.3 Mensal
-    mensal = df.groupby("Mes").agg({"Energia_Conc_Gcal": "sum", "Energia_Transp_Gcal": "sum"}).reset_index()
+    mensal = d["mensal"]
     fig, ax = plt.subplots(figsize=(14, 6))
     x = np.arange(len(mensal)); width = 0.35
     bars1 = ax.bar(x - width / 2, mensal["Energia_Conc_Gcal"] / 1000, width, label="Concessionária", color="#9C27B0", alpha=0.8)
@@ -260,10 +693,12 @@ def gerar_graficos_energia(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_xlabel("Mês"); ax.set_ylabel("Energia (Tcal)")
     ax.set_xticks(x); ax.set_xticklabels(mensal["Mes"])
     ax.legend(); ax.grid(True, alpha=0.3, axis="y"); plt.tight_layout()
-    fig.savefig(str(out / "energia_mensal.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("energia_mensal.png")
+    return fig
+
 
+def _fig_energia_scatter(d: dict) -> plt.Figure:
     # 3.4 Scatter
+    df = d["df"]
     fig, ax = plt.subplots(figsize=(10, 8))
     scatter = ax.scatter(df["Vol_Conc_Nm3d"] / 1000, df["Energia_Conc_Gcal"],
                          c=df["PCS_Conc"], cmap="RdYlGn", alpha=0.7, s=30, edgecolors="gray", linewidth=0.5)
@@ -280,127 +715,184 @@ def gerar_graficos_energia(excel_path: str | Path, out: Path) -> list[str]:
             fontsize=12, verticalalignment="top",
             bbox=dict(boxstyle="round", facecolor="wheat", alpha=0.5))
     plt.tight_layout()
-    fig.savefig(str(out / "energia_scatter.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("energia_scatter.png")
-
-    return gerados
+    return fig
 
 
 # ---------------------------------------------------------------------------
-# 4. Clientes (NB05) — 6 gráficos
+# 4. Clientes (NB05) — 7 gráficos
 # ---------------------------------------------------------------------------
-def gerar_graficos_clientes(excel_path: str | Path, out: Path) -> list[str]:
-    dados_clientes = _load_clientes(excel_path)
-    cores = plt.cm.Set2(np.linspace(0, 1, 7))
-    gerados = []
+def _por_cliente(snapshot: WorkbookSnapshot, montar: Callable[[ClientesHorarios, str, dict], dict]) -> list[dict]:
+    """Um item por cliente, na ordem das abas: ``montar`` para quem tem dados, senão só o nome."""
+    dados_clientes = snapshot.clientes
+    itens = []
+    for aba, info in dados_clientes.items():
+        item = {"nome": info["nome"], "sem_dados": info["sem_dados"]}
+        if not info["sem_dados"]:
+            item.update(montar(dados_clientes, aba, info))
+        itens.append(item)
+    return itens
 
+
+def _dados_clientes_serie(snapshot: WorkbookSnapshot) -> dict:
+    clientes = _por_cliente(snapshot, lambda dc, aba, info: {
+        "df": info["dados"][["Data", "Volume_Nm3h"]],
+        "mm": dc.media_movel(aba, janela=24, centrada=True),
+        "vol_total": dc.soma(aba) / 1e6,
+        "completude": dc.completude_pct(aba),
+    })
+    for c in clientes:
+        if c["sem_dados"]:
+            c["vol_ref"] = VOLUMES_REFERENCIA.get(c["nome"], 0)
+    return {"clientes": clientes}
+
+
+def _dados_clientes_perfil_horario(snapshot: WorkbookSnapshot) -> dict:
+    # Perfil por hora do dia já agregado no cubo (todos os dias de uma vez)
+    por_hora = snapshot.clientes.cubo.por_hora
+    return {"clientes": _por_cliente(snapshot, lambda dc, aba, info: {
+        "mean": por_hora.media[dc.indice(aba), 0], "std": por_hora.desvio[dc.indice(aba), 0],
+    })}
+
+
+def _dados_clientes_heatmap(snapshot: WorkbookSnapshot) -> dict | None:
+    dados_clientes = snapshot.clientes
+    if dados_clientes.sem_dados("Cliente #1"):
+        return None
+    return {"pivot": _pivot_hora_dia(dados_clientes, "Cliente #1")}
+
+
+def _dados_clientes_pressao_temp(snapshot: WorkbookSnapshot) -> dict:
+    return {"clientes": _por_cliente(snapshot, lambda dc, aba, info: {
+        "df": info["dados"][["Data", "Pressao_bara", "Temperatura_C"]],
+        "mm_p": dc.media_movel(aba, "Pressao_bara"),
+        "mm_t": dc.media_movel(aba, "Temperatura_C"),
+    })}
+
+
+def _dados_clientes_participacao(snapshot: WorkbookSnapshot) -> dict:
+    dados_clientes = snapshot.clientes
+    vol_total = {}
+    for aba, nome in dados_clientes.nomes.items():
+        if dados_clientes.sem_dados(aba):
+            vol_total[nome] = VOLUMES_REFERENCIA.get(nome, 0) / 1e6
+        else:
+            vol_total[nome] = dados_clientes.soma(aba) / 1e6
+    return {"vol_total": vol_total}
+
+
+def _dados_clientes_boxplot(snapshot: WorkbookSnapshot) -> dict:
+    return {"clientes": _por_cliente(snapshot, lambda dc, aba, info: {
+        "valores": dc.serie(aba)[dc.validos(aba)],
+    })}
+
+
+def _dados_clientes_heatmap_todos(snapshot: WorkbookSnapshot) -> dict:
+    return {"clientes": _por_cliente(snapshot, lambda dc, aba, info: {
+        "pivot": _pivot_hora_dia(dc, aba, compactar=False),
+    })}
+
+
+def _cores_clientes() -> np.ndarray:
+    return plt.cm.Set2(np.linspace(0, 1, 7))
+
+
+def _fig_clientes_serie(d: dict) -> plt.Figure:
     # 4.1 Séries temporais
+    cores = _cores_clientes()
     fig, axes = plt.subplots(4, 2, figsize=(18, 20)); axes = axes.flatten()
-    plot_idx = 0
-    for aba, info in dados_clientes.items():
+    for plot_idx, info in enumerate(d["clientes"]):
         ax = axes[plot_idx]
         if info["sem_dados"]:
-            vol_ref = VOLUMES_REFERENCIA.get(info["nome"], 0)
+            vol_ref = info["vol_ref"]
             ax.text(0.5, 0.5, f'{info["nome"]}\nSem dados horários\nVol. referência: {vol_ref:,.0f} Nm³',
                     ha="center", va="center", fontsize=12, transform=ax.transAxes,
                     bbox=dict(boxstyle="round", facecolor="lightyellow"))
             ax.set_title(f'{info["nome"]} (sem dados)', fontweight="bold", fontsize=11)
         else:
-            df = info["dados"]
-            ax.plot(df["Data"], df["Volume_Nm3h"], color=cores[plot_idx], alpha=0.5, linewidth=0.3)
-            mm = df["Volume_Nm3h"].rolling(window=24, center=True).mean()
-            ax.plot(df["Data"], mm, color="red", alpha=0.8, linewidth=1, label="MM 24h")
-            vol_total = df["Volume_Nm3h"].sum() / 1e6
-            ax.set_title(f'{info["nome"]} ({vol_total:.1f} Mm³)', fontweight="bold", fontsize=11)
+            df = info["df"]
+            ax.plot(*_visiveis(ax, df["Data"], df["Volume_Nm3h"]), color=cores[plot_idx], alpha=0.5, linewidth=0.3)
+            ax.plot(*_visiveis(ax, df["Data"], info["mm"]), color="red", alpha=0.8, linewidth=1, label="MM 24h")
+            completude = info["completude"]
+            incompleto = completude is not None and completude < COMPLETUDE_ALERTA_PCT
+            extra = f", {completude:.0f}% das horas" if incompleto else ""
+            ax.set_title(f'{info["nome"]} ({info["vol_total"]:.1f} Mm³{extra})', fontweight="bold", fontsize=11)
             ax.set_ylabel("Nm³/h"); ax.grid(True, alpha=0.3); ax.legend(fontsize=8)
             ax.xaxis.set_major_formatter(mdates.DateFormatter("%b"))
-        plot_idx += 1
     axes[-1].set_visible(False)
     fig.suptitle("Séries Temporais de Volume por Cliente (horário)", fontsize=16, fontweight="bold", y=1.01)
     plt.tight_layout()
-    fig.savefig(str(out / "clientes_serie.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("clientes_serie.png")
+    return fig
+
 
+def _fig_clientes_perfil_horario(d: dict) -> plt.Figure:
     # 4.2 Perfil horário
+    cores = _cores_clientes()
     fig, axes = plt.subplots(2, 4, figsize=(20, 10)); axes = axes.flatten()
-    plot_idx = 0
-    for aba, info in dados_clientes.items():
+    for plot_idx, info in enumerate(d["clientes"]):
         ax = axes[plot_idx]
         if info["sem_dados"]:
             ax.text(0.5, 0.5, "Sem dados", ha="center", va="center", fontsize=12, transform=ax.transAxes)
             ax.set_title(info["nome"] + " *", fontweight="bold", fontsize=10)
         else:
-            df = info["dados"].copy()
-            df["Hora"] = df["Data"].dt.hour
-            perfil = df.groupby("Hora")["Volume_Nm3h"].agg(["mean", "std"])
+            perfil = pd.DataFrame({"mean": info["mean"], "std": info["std"]})
             ax.fill_between(perfil.index, perfil["mean"] - perfil["std"],
                             perfil["mean"] + perfil["std"], alpha=0.2, color=cores[plot_idx])
             ax.plot(perfil.index, perfil["mean"], color=cores[plot_idx], linewidth=2, marker="o", markersize=3)
             ax.set_title(info["nome"], fontweight="bold", fontsize=10)
             ax.set_xlabel("Hora do dia"); ax.set_ylabel("Vol médio (Nm³/h)")
             ax.set_xticks(range(0, 24, 4)); ax.grid(True, alpha=0.3)
-        plot_idx += 1
     axes[-1].set_visible(False)
     fig.suptitle("Perfil Horário Médio por Cliente (faixa = ±1 desvio padrão)", fontsize=14, fontweight="bold")
     plt.tight_layout()
-    fig.savefig(str(out / "clientes_perfil_horario.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("clientes_perfil_horario.png")
+    return fig
 
-    # 4.3 Heatmap (Empresa A)
-    df_a = dados_clientes["Cliente #1"]["dados"].copy()
-    if not dados_clientes["Cliente #1"]["sem_dados"] and len(df_a) > 0:
-        df_a["Dia"] = df_a["Data"].dt.date
-        df_a["Hora"] = df_a["Data"].dt.hour
-        pivot = df_a.pivot_table(values="Volume_Nm3h", index="Hora", columns="Dia", aggfunc="mean")
-        fig, ax = plt.subplots(figsize=(20, 8))
-        step = max(1, len(pivot.columns) // 30)
-        sns.heatmap(pivot, ax=ax, cmap="YlOrRd", xticklabels=step, yticklabels=1,
-                    cbar_kws={"label": "Volume (Nm³/h)"})
-        ax.set_title("Empresa A - Mapa de Calor do Consumo (Hora × Dia)", fontsize=14, fontweight="bold")
-        ax.set_xlabel("Dia"); ax.set_ylabel("Hora do Dia")
-        plt.xticks(rotation=90, fontsize=7); plt.tight_layout()
-        fig.savefig(str(out / "clientes_heatmap.png"), **SAVE_KW); plt.close(fig)
-        gerados.append("clientes_heatmap.png")
 
+def _fig_clientes_heatmap(d: dict) -> plt.Figure:
+    # 4.3 Heatmap (Empresa A)
+    pivot = d["pivot"]
+    fig, ax = plt.subplots(figsize=(20, 8))
+    step = max(1, len(pivot.columns) // 30)
+    sns.heatmap(pivot, ax=ax, cmap="YlOrRd", xticklabels=step, yticklabels=1,
+                cbar_kws={"label": "Volume (Nm³/h)"})
+    ax.set_title("Empresa A - Mapa de Calor do Consumo (Hora × Dia)", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Dia"); ax.set_ylabel("Hora do Dia")
+    plt.xticks(rotation=90, fontsize=7); plt.tight_layout()
+    return fig
+
+
+def _fig_clientes_pressao_temp(d: dict) -> plt.Figure:
     # 4.4 Pressão e temperatura
     fig, axes = plt.subplots(4, 2, figsize=(18, 20)); axes = axes.flatten()
-    plot_idx = 0
-    for aba, info in dados_clientes.items():
+    for plot_idx, info in enumerate(d["clientes"]):
         ax = axes[plot_idx]
         if info["sem_dados"]:
             ax.text(0.5, 0.5, "Sem dados", ha="center", va="center", fontsize=12, transform=ax.transAxes)
             ax.set_title(info["nome"] + " *", fontweight="bold", fontsize=10)
         else:
-            df = info["dados"]
+            df = info["df"]
             c1 = "#2196F3"
-            ax.plot(df["Data"], df["Pressao_bara"], color=c1, alpha=0.4, linewidth=0.3)
-            ax.plot(df["Data"], df["Pressao_bara"].rolling(window=24).mean(), color=c1, linewidth=1.5, label="Pressão (MM 24h)")
+            ax.plot(*_visiveis(ax, df["Data"], df["Pressao_bara"]), color=c1, alpha=0.4, linewidth=0.3)
+            ax.plot(*_visiveis(ax, df["Data"], info["mm_p"]), color=c1, linewidth=1.5, label="Pressão (MM 24h)")
             ax.set_ylabel("Pressão (bara)", color=c1); ax.tick_params(axis="y", labelcolor=c1)
             ax2 = ax.twinx()
             c2 = "#F44336"
-            ax2.plot(df["Data"], df["Temperatura_C"], color=c2, alpha=0.4, linewidth=0.3)
-            ax2.plot(df["Data"], df["Temperatura_C"].rolling(window=24).mean(), color=c2, linewidth=1.5, label="Temp (MM 24h)")
+            ax2.plot(*_visiveis(ax2, df["Data"], df["Temperatura_C"]), color=c2, alpha=0.4, linewidth=0.3)
+            ax2.plot(*_visiveis(ax2, df["Data"], info["mm_t"]), color=c2, linewidth=1.5, label="Temp (MM 24h)")
             ax2.set_ylabel("Temperatura (°C)", color=c2); ax2.tick_params(axis="y", labelcolor=c2)
             ax.set_title(info["nome"], fontweight="bold", fontsize=11)
             ax.grid(True, alpha=0.2); ax.xaxis.set_major_formatter(mdates.DateFormatter("%b"))
             lines1, labels1 = ax.get_legend_handles_labels()
             lines2, labels2 = ax2.get_legend_handles_labels()
             ax.legend(lines1 + lines2, labels1 + labels2, fontsize=7, loc="upper right")
-        plot_idx += 1
     axes[-1].set_visible(False)
     fig.suptitle("Condições Operacionais: Pressão e Temperatura por Cliente", fontsize=16, fontweight="bold", y=1.01)
     plt.tight_layout()
-    fig.savefig(str(out / "clientes_pressao_temp.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("clientes_pressao_temp.png")
+    return fig
 
+
+def _fig_clientes_participacao(d: dict) -> plt.Figure:
     # 4.5 Participação
-    vol_total = {}
-    for aba, info in dados_clientes.items():
-        nome = info["nome"]
-        if info["sem_dados"]:
-            vol_total[nome] = VOLUMES_REFERENCIA.get(nome, 0) / 1e6
-        else:
-            vol_total[nome] = info["dados"]["Volume_Nm3h"].sum() / 1e6
+    vol_total = d["vol_total"]
     nomes = list(vol_total.keys()); volumes = list(vol_total.values())
     total = sum(volumes); pcts = [v / total * 100 for v in volumes]
     ordem = np.argsort(volumes)[::-1]
@@ -425,19 +917,19 @@ def gerar_graficos_clientes(excel_path: str | Path, out: Path) -> list[str]:
     for t in autotexts: t.set_fontsize(9)
     for t in texts: t.set_fontsize(8)
     plt.tight_layout()
-    fig.savefig(str(out / "clientes_participacao.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("clientes_participacao.png")
+    return fig
 
+
+def _fig_clientes_boxplot(d: dict) -> plt.Figure:
     # 4.6 Boxplot
+    cores = _cores_clientes()
     fig, ax = plt.subplots(figsize=(14, 7))
     box_data, box_labels, box_cores = [], [], []
-    color_idx = 0
-    for aba, info in dados_clientes.items():
+    for color_idx, info in enumerate(d["clientes"]):
         if not info["sem_dados"]:
-            box_data.append(info["dados"]["Volume_Nm3h"].dropna().values)
+            box_data.append(info["valores"])
             box_labels.append(info["nome"])
             box_cores.append(cores[color_idx])
-        color_idx += 1
     bp = ax.boxplot(box_data, labels=box_labels, patch_artist=True, vert=True,
                     showfliers=False, boxprops=dict(alpha=0.7),
                     medianprops=dict(color="red", linewidth=2))
@@ -446,28 +938,77 @@ def gerar_graficos_clientes(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_title("Distribuição de Volumes por Cliente (sem outliers)", fontsize=14, fontweight="bold")
     ax.set_ylabel("Volume (Nm³/h)"); ax.grid(True, alpha=0.3, axis="y")
     plt.xticks(rotation=30, ha="right"); plt.tight_layout()
-    fig.savefig(str(out / "clientes_boxplot.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("clientes_boxplot.png")
+    return fig
 
-    return gerados
+
+def _fig_clientes_heatmap_todos(d: dict) -> plt.Figure:
+    # 4.7 Heatmaps de todos os clientes (mesmo cubo, sem nova agregação)
+    fig, axes = plt.subplots(4, 2, figsize=(20, 22)); axes = axes.flatten()
+    for plot_idx, info in enumerate(d["clientes"]):
+        ax = axes[plot_idx]
+        if info["sem_dados"]:
+            ax.text(0.5, 0.5, "Sem dados", ha="center", va="center", fontsize=12, transform=ax.transAxes)
+            ax.set_title(info["nome"] + " *", fontweight="bold", fontsize=11)
+        else:
+            pivot = info["pivot"]
+            step = max(1, len(pivot.columns) // 12)
+            sns.heatmap(pivot, ax=ax, cmap="YlOrRd", xticklabels=step, yticklabels=4,
+                        cbar_kws={"label": "Nm³/h"})
+            ax.set_title(info["nome"], fontweight="bold", fontsize=11)
+            ax.set_xlabel(""); ax.set_ylabel("Hora do Dia")
+            ax.tick_params(axis="x", labelrotation=90, labelsize=7)
+    axes[-1].set_visible(False)
+    fig.suptitle("Mapas de Calor do Consumo por Cliente (Hora × Dia)", fontsize=16, fontweight="bold", y=1.01)
+    plt.tight_layout()
+    return fig
+
+
+def _pivot_hora_dia(dados_clientes: ClientesHorarios, aba: str, compactar: bool = True) -> pd.DataFrame:
+    """Volume Hora × Dia de um cliente (fatia do cubo).
+
+    ``compactar`` remove horas e dias sem nenhuma medição; sem ele todos os
+    clientes ficam no mesmo eixo de dias.
+    """
+    cubo = dados_clientes.cubo
+    pivot = pd.DataFrame(
+        cubo.fatia(dados_clientes.indice(aba), 0).T,
+        index=pd.Index(range(24), name="Hora"),
+        columns=pd.Index(pd.to_datetime(cubo.dias).date, name="Dia"),
+    )
+    return pivot.dropna(how="all").dropna(axis=1, how="all") if compactar else pivot
 
 
 # ---------------------------------------------------------------------------
 # 5. Incertezas (NB06) — 3 gráficos
 # ---------------------------------------------------------------------------
-def gerar_graficos_incertezas(excel_path: str | Path, out: Path) -> list[str]:
+def _incertezas_saida() -> tuple[list[str], list[float]]:
+    nomes = [k for k in INCERTEZAS if "Entrada" not in k]
+    return nomes, [INCERTEZAS[k] for k in nomes]
+
+
+def _dados_incertezas_barras(snapshot: WorkbookSnapshot) -> dict:
+    return {"incertezas": dict(INCERTEZAS)}
+
+
+def _dados_incertezas_rss(snapshot: WorkbookSnapshot) -> dict:
     inc_entrada = [INCERTEZAS["Entrada - Tramo 101 (Comgás 1)"],
                    INCERTEZAS["Entrada - Tramo 501 (Comgás 2)"]]
-    u_entrada = np.sqrt(np.sum(np.array(inc_entrada) ** 2))
+    _, inc_saidas = _incertezas_saida()
+    return {"u_entrada": np.sqrt(np.sum(np.array(inc_entrada) ** 2)),
+            "u_saida": np.sqrt(np.sum(np.array(inc_saidas) ** 2))}
 
-    inc_saidas_keys = [k for k in INCERTEZAS if "Entrada" not in k]
-    inc_saidas = [INCERTEZAS[k] for k in inc_saidas_keys]
-    u_saida = np.sqrt(np.sum(np.array(inc_saidas) ** 2))
-    gerados = []
 
+def _dados_incertezas_contribuicao(snapshot: WorkbookSnapshot) -> dict:
+    nomes, inc_saidas = _incertezas_saida()
+    contribuicoes = [(inc ** 2) / sum(x ** 2 for x in inc_saidas) * 100 for inc in inc_saidas]
+    return {"nomes": nomes, "contribuicoes": contribuicoes}
+
+
+def _fig_incertezas_barras(d: dict) -> plt.Figure:
     # 5.1 Barras horizontais
+    incertezas = d["incertezas"]
     fig, ax = plt.subplots(figsize=(12, 7))
-    pontos = list(INCERTEZAS.keys()); valores = [v * 100 for v in INCERTEZAS.values()]
+    pontos = list(incertezas.keys()); valores = [v * 100 for v in incertezas.values()]
     cores_inc = ["#2196F3" if "Entrada" in p else "#FF9800" for p in pontos]
     bars = ax.barh(pontos[::-1], valores[::-1], color=cores_inc[::-1], alpha=0.8, edgecolor="gray")
     for bar, val in zip(bars, valores[::-1]):
@@ -481,13 +1022,14 @@ def gerar_graficos_incertezas(excel_path: str | Path, out: Path) -> list[str]:
                        mpatches.Patch(facecolor="#FF9800", label="Saída")]
     ax.legend(handles=legend_elements + ax.get_legend_handles_labels()[0][:2], loc="lower right")
     ax.grid(True, alpha=0.3, axis="x"); plt.tight_layout()
-    fig.savefig(str(out / "incertezas_barras.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("incertezas_barras.png")
+    return fig
+
 
+def _fig_incertezas_rss(d: dict) -> plt.Figure:
     # 5.2 RSS combinada
     fig, ax = plt.subplots(figsize=(10, 6))
     cats = ["Entrada\n(combinada)", "Saídas\n(combinada)"]
-    u_vals = [u_entrada * 100, u_saida * 100]; cores_rss = ["#2196F3", "#FF9800"]
+    u_vals = [d["u_entrada"] * 100, d["u_saida"] * 100]; cores_rss = ["#2196F3", "#FF9800"]
     bars = ax.bar(cats, u_vals, color=cores_rss, alpha=0.8, width=0.5, edgecolor="gray", linewidth=1.5)
     for bar, val in zip(bars, u_vals):
         ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.1,
@@ -497,12 +1039,12 @@ def gerar_graficos_incertezas(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_ylabel("Incerteza (%)"); ax.legend()
     ax.grid(True, alpha=0.3, axis="y"); ax.set_ylim(0, max(u_vals) * 1.3)
     plt.tight_layout()
-    fig.savefig(str(out / "incertezas_rss.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("incertezas_rss.png")
+    return fig
 
+
+def _fig_incertezas_contribuicao(d: dict) -> plt.Figure:
     # 5.3 Contribuição
-    contribuicoes = [(inc ** 2) / sum(x ** 2 for x in inc_saidas) * 100 for inc in inc_saidas]
-    nomes_saida = inc_saidas_keys
+    nomes_saida, contribuicoes = d["nomes"], d["contribuicoes"]
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
     cores_contrib = plt.cm.Set2(np.linspace(0, 1, len(nomes_saida)))
     left = 0
@@ -518,68 +1060,98 @@ def gerar_graficos_incertezas(excel_path: str | Path, out: Path) -> list[str]:
     ax2.pie(contribuicoes, labels=nomes_saida, autopct="%1.1f%%", colors=cores_contrib, pctdistance=0.75)
     ax2.set_title("Contribuição na Incerteza Total das Saídas", fontweight="bold")
     plt.tight_layout()
-    fig.savefig(str(out / "incertezas_contribuicao.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("incertezas_contribuicao.png")
-
-    return gerados
+    return fig
 
 
 # ---------------------------------------------------------------------------
-# 6. Balanço de Massa (NB07) — 4 gráficos
+# 6. Balanço de Massa (NB07) — 5 gráficos
 # ---------------------------------------------------------------------------
-def gerar_graficos_balanco(excel_path: str | Path, out: Path) -> list[str]:
-    # Load data
-    df_vol = _load_volumes(excel_path)
-    vol_entrada = df_vol["Concessionaria_Nm3d"].sum()
-    dados_clientes = _load_clientes(excel_path)
-
-    volumes_clientes = {}
-    for aba, info in dados_clientes.items():
-        nome = info["nome"]
-        if info["sem_dados"]:
-            volumes_clientes[nome] = VOLUMES_REFERENCIA.get(nome, 0)
-        else:
-            volumes_clientes[nome] = info["dados"]["Volume_Nm3h"].sum()
-    vol_saida_total = sum(volumes_clientes.values())
-    diferenca = vol_entrada - vol_saida_total
-    diferenca_pct = (diferenca / vol_entrada) * 100
-
+def _incertezas_balanco() -> tuple[float, float]:
+    """Incertezas combinadas (RSS) da entrada e das saídas."""
     inc_entrada = [INCERTEZAS["Entrada - Tramo 101 (Comgás 1)"],
                    INCERTEZAS["Entrada - Tramo 501 (Comgás 2)"]]
     u_entrada = np.sqrt(sum(x ** 2 for x in inc_entrada))
     incertezas_clientes = {k: v for k, v in INCERTEZAS.items() if "Entrada" not in k}
     u_saida = np.sqrt(sum(v ** 2 for v in incertezas_clientes.values()))
+    return u_entrada, u_saida
 
-    entrada_min = vol_entrada * (1 - u_entrada)
-    entrada_max = vol_entrada * (1 + u_entrada)
-    saida_min = vol_saida_total * (1 - u_saida)
-    saida_max = vol_saida_total * (1 + u_saida)
-    sobrepoe = entrada_min <= saida_max and saida_min <= entrada_max
-    gerados = []
 
+def _volumes_clientes(snapshot: WorkbookSnapshot) -> dict[str, float]:
+    dados_clientes = snapshot.clientes
+    volumes_clientes = {}
+    for aba, nome in dados_clientes.nomes.items():
+        if dados_clientes.sem_dados(aba):
+            volumes_clientes[nome] = VOLUMES_REFERENCIA.get(nome, 0)
+        else:
+            volumes_clientes[nome] = dados_clientes.soma(aba)
+    return volumes_clientes
+
+
+def _dados_balanco_totais(snapshot: WorkbookSnapshot) -> dict:
+    """Totais do período e bandas de incerteza (barras, bandas e dashboard)."""
+    vol_entrada = snapshot.volumes["Concessionaria_Nm3d"].sum()
+    vol_saida_total = sum(_volumes_clientes(snapshot).values())
+    diferenca = vol_entrada - vol_saida_total
+    u_entrada, u_saida = _incertezas_balanco()
+
+    b = {
+        "vol_entrada": vol_entrada,
+        "vol_saida_total": vol_saida_total,
+        "diferenca": diferenca,
+        "diferenca_pct": (diferenca / vol_entrada) * 100,
+        "u_entrada": u_entrada,
+        "u_saida": u_saida,
+        "entrada_min": vol_entrada * (1 - u_entrada),
+        "entrada_max": vol_entrada * (1 + u_entrada),
+        "saida_min": vol_saida_total * (1 - u_saida),
+        "saida_max": vol_saida_total * (1 + u_saida),
+    }
+    b["sobrepoe"] = b["entrada_min"] <= b["saida_max"] and b["saida_min"] <= b["entrada_max"]
+    return b
+
+
+def _dados_balanco_waterfall(snapshot: WorkbookSnapshot) -> dict:
+    vol_entrada = snapshot.volumes["Concessionaria_Nm3d"].sum()
+    volumes_clientes = _volumes_clientes(snapshot)
+    return {"volumes_clientes": volumes_clientes, "vol_entrada": vol_entrada,
+            "diferenca": vol_entrada - sum(volumes_clientes.values())}
+
+
+def _dados_balanco_diario(snapshot: WorkbookSnapshot) -> dict:
+    from balanco_temporal import balanco_diario, resumir_diario
+    u_entrada, u_saida = _incertezas_balanco()
+    diario = balanco_diario(snapshot.volumes, snapshot.clientes, u_entrada, u_saida, VOLUMES_REFERENCIA)
+    completos = resumir_diario(diario)["completos"]
+    return {"d": diario[completos], "u_entrada": u_entrada, "u_saida": u_saida}
+
+
+def _fig_balanco_barras(b: dict) -> plt.Figure:
     # 6.1 Barras com erro
+    vol_entrada, vol_saida_total = b["vol_entrada"], b["vol_saida_total"]
     fig, ax = plt.subplots(figsize=(12, 8))
     cats = ["Entrada", "Saída Total"]; vals = [vol_entrada / 1e6, vol_saida_total / 1e6]
-    erros_b = [(vol_entrada - entrada_min) / 1e6, (vol_saida_total - saida_min) / 1e6]
-    erros_c = [(entrada_max - vol_entrada) / 1e6, (saida_max - vol_saida_total) / 1e6]
+    erros_b = [(vol_entrada - b["entrada_min"]) / 1e6, (vol_saida_total - b["saida_min"]) / 1e6]
+    erros_c = [(b["entrada_max"] - vol_entrada) / 1e6, (b["saida_max"] - vol_saida_total) / 1e6]
     cores_b = ["#2196F3", "#FF9800"]
     bars = ax.bar(cats, vals, color=cores_b, alpha=0.8, width=0.5, edgecolor="gray", linewidth=1.5)
     ax.errorbar(cats, vals, yerr=[erros_b, erros_c], fmt="none", color="black", linewidth=2, capsize=15, capthick=2)
-    for bar, val, inc in zip(bars, vals, [u_entrada, u_saida]):
+    for bar, val, inc in zip(bars, vals, [b["u_entrada"], b["u_saida"]]):
         ax.text(bar.get_x() + bar.get_width() / 2, val * 1.01,
                 f"{val:,.1f} Mm³\n(±{inc * 100:.2f}%)",
                 ha="center", va="bottom", fontsize=13, fontweight="bold")
-    ax.annotate(f"Diferença: {diferenca_pct:.2f}%\n({diferenca / 1e6:.2f} Mm³)",
+    ax.annotate(f"Diferença: {b['diferenca_pct']:.2f}%\n({b['diferenca'] / 1e6:.2f} Mm³)",
                 xy=(0.5, (vals[0] + vals[1]) / 2), fontsize=14, ha="center", va="center",
                 bbox=dict(boxstyle="round,pad=0.5", facecolor="lightyellow", edgecolor="orange"))
     ax.set_title("Balanço de Massa - Entrada vs Saída Total\n(com bandas de incerteza)", fontsize=14, fontweight="bold")
     ax.set_ylabel("Volume (Mm³)"); ax.grid(True, alpha=0.3, axis="y"); plt.tight_layout()
-    fig.savefig(str(out / "balanco_barras.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("balanco_barras.png")
+    return fig
 
+
+def _fig_balanco_waterfall(d: dict) -> plt.Figure:
     # 6.2 Waterfall
+    vol_entrada, diferenca = d["vol_entrada"], d["diferenca"]
     fig, ax = plt.subplots(figsize=(16, 8))
-    clientes_ord = sorted(volumes_clientes.items(), key=lambda x: x[1], reverse=True)
+    clientes_ord = sorted(d["volumes_clientes"].items(), key=lambda x: x[1], reverse=True)
     labels = ["Entrada"] + [c[0] for c in clientes_ord] + ["Diferença"]
     valores_wf = [vol_entrada / 1e6] + [-c[1] / 1e6 for c in clientes_ord] + [diferenca / 1e6]
     running = []; total_run = 0
@@ -598,10 +1170,14 @@ def gerar_graficos_balanco(excel_path: str | Path, out: Path) -> list[str]:
     ax.set_xticks(range(len(labels))); ax.set_xticklabels(labels, rotation=30, ha="right", fontsize=10)
     ax.set_title("Waterfall Chart - Decomposição do Balanço de Massa", fontsize=14, fontweight="bold")
     ax.set_ylabel("Volume (Mm³)"); ax.grid(True, alpha=0.3, axis="y"); plt.tight_layout()
-    fig.savefig(str(out / "balanco_waterfall.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("balanco_waterfall.png")
+    return fig
+
 
+def _fig_balanco_bandas(b: dict) -> plt.Figure:
     # 6.3 Bandas
+    entrada_min, entrada_max = b["entrada_min"], b["entrada_max"]
+    saida_min, saida_max = b["saida_min"], b["saida_max"]
+    vol_entrada, vol_saida_total = b["vol_entrada"], b["vol_saida_total"]
     fig, ax = plt.subplots(figsize=(14, 6))
     y_ent, y_sai, altura = 1.5, 0.5, 0.6
     ax.barh(y_ent, (entrada_max - entrada_min) / 1e6, left=entrada_min / 1e6, height=altura,
@@ -610,24 +1186,27 @@ def gerar_graficos_balanco(excel_path: str | Path, out: Path) -> list[str]:
     ax.barh(y_sai, (saida_max - saida_min) / 1e6, left=saida_min / 1e6, height=altura,
             color="#FF9800", alpha=0.3, edgecolor="#FF9800", linewidth=2, label="Banda Saída")
     ax.plot(vol_saida_total / 1e6, y_sai, "D", color="#FF9800", markersize=12, zorder=5)
-    if sobrepoe:
+    if b["sobrepoe"]:
         ov_min = max(entrada_min, saida_min) / 1e6; ov_max = min(entrada_max, saida_max) / 1e6
         ax.axvspan(ov_min, ov_max, alpha=0.2, color="green", label="Sobreposição")
     ax.text(vol_entrada / 1e6, y_ent + 0.4,
-            f"Entrada: {vol_entrada / 1e6:,.1f} Mm³ (±{u_entrada * 100:.2f}%)",
+            f"Entrada: {vol_entrada / 1e6:,.1f} Mm³ (±{b['u_entrada'] * 100:.2f}%)",
             ha="center", fontsize=11, fontweight="bold", color="#2196F3")
     ax.text(vol_saida_total / 1e6, y_sai - 0.4,
-            f"Saída: {vol_saida_total / 1e6:,.1f} Mm³ (±{u_saida * 100:.2f}%)",
+            f"Saída: {vol_saida_total / 1e6:,.1f} Mm³ (±{b['u_saida'] * 100:.2f}%)",
             ha="center", fontsize=11, fontweight="bold", color="#FF9800")
     ax.set_yticks([y_sai, y_ent]); ax.set_yticklabels(["Saídas", "Entrada"], fontsize=13)
     ax.set_xlabel("Volume (Mm³)", fontsize=12)
     ax.set_title("Bandas de Incerteza - Entrada vs Saídas", fontsize=14, fontweight="bold")
     ax.legend(loc="upper right"); ax.grid(True, alpha=0.3, axis="x"); ax.set_ylim(-0.2, 2.5)
     plt.tight_layout()
-    fig.savefig(str(out / "balanco_bandas.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("balanco_bandas.png")
+    return fig
+
 
+def _fig_balanco_dashboard(b: dict) -> plt.Figure:
     # 6.4 Dashboard
+    vol_entrada, vol_saida_total = b["vol_entrada"], b["vol_saida_total"]
+    diferenca, diferenca_pct, sobrepoe = b["diferenca"], b["diferenca_pct"], b["sobrepoe"]
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
     # Panel 1: Volumes
     ax = axes[0]
@@ -662,63 +1241,312 @@ def gerar_graficos_balanco(excel_path: str | Path, out: Path) -> list[str]:
             color=res_cor, transform=ax.transAxes)
     ax.text(0.5, 0.5, f"Balanço {res_txt}", ha="center", va="center", fontsize=14,
             fontweight="bold", transform=ax.transAxes)
-    ax.text(0.5, 0.35, f"Incerteza Entrada: ±{u_entrada * 100:.2f}%", ha="center",
+    ax.text(0.5, 0.35, f"Incerteza Entrada: ±{b['u_entrada'] * 100:.2f}%", ha="center",
             fontsize=11, transform=ax.transAxes)
-    ax.text(0.5, 0.22, f"Incerteza Saída: ±{u_saida * 100:.2f}%", ha="center",
+    ax.text(0.5, 0.22, f"Incerteza Saída: ±{b['u_saida'] * 100:.2f}%", ha="center",
             fontsize=11, transform=ax.transAxes)
     fig.suptitle("DASHBOARD - BALANÇO DE MASSA DO DISTRITO", fontsize=16, fontweight="bold", y=1.02)
     plt.tight_layout()
-    fig.savefig(str(out / "balanco_dashboard.png"), **SAVE_KW); plt.close(fig)
-    gerados.append("balanco_dashboard.png")
-
-    return gerados
+    return fig
+
+
+def _fig_balanco_diario(b: dict) -> plt.Figure:
+    # 6.5 Balanço diário
+    d, u_entrada, u_saida = b["d"], b["u_entrada"], b["u_saida"]
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 10), sharex=True, height_ratios=[3, 2])
+    ax1.fill_between(d["Data"], d["Entrada_Min"] / 1e3, d["Entrada_Max"] / 1e3,
+                     color="#2196F3", alpha=0.2, label=f"Banda Entrada (±{u_entrada * 100:.2f}%)")
+    ax1.fill_between(d["Data"], d["Saida_Min"] / 1e3, d["Saida_Max"] / 1e3,
+                     color="#FF9800", alpha=0.2, label=f"Banda Saída (±{u_saida * 100:.2f}%)")
+    ax1.plot(d["Data"], d["Entrada_Nm3"] / 1e3, color="#2196F3", linewidth=1.5, label="Entrada")
+    ax1.plot(d["Data"], d["Saida_Nm3"] / 1e3, color="#FF9800", linewidth=1.5, label="Saída")
+    ax1.set_title("Balanço de Massa Diário - Entrada vs Saída (dias completos)", fontsize=14, fontweight="bold")
+    ax1.set_ylabel("Volume (10³ Nm³/d)"); ax1.legend(loc="lower left"); ax1.grid(True, alpha=0.3)
+    cores_d = np.where(d["Sobrepoe"], "#4CAF50", "#F44336")
+    ax2.bar(d["Data"], d["Dif_Pct"], color=cores_d, alpha=0.8, width=1)
+    ax2.axhline(y=0, color="black", linewidth=0.8)
+    ax2.axhline(y=d["Dif_Pct"].mean(), color="gray", linestyle="--",
+                label=f'Média: {d["Dif_Pct"].mean():.2f}%')
+    ax2.set_title(f"Diferença Diária (%) - {int(d['Sobrepoe'].sum())} de {len(d)} dias com bandas sobrepostas",
+                  fontsize=13, fontweight="bold")
+    ax2.set_ylabel("Diferença (%)"); ax2.set_xlabel("Data"); ax2.legend(); ax2.grid(True, alpha=0.3)
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter("%b/%Y"))
+    ax2.xaxis.set_major_locator(mdates.MonthLocator())
+    plt.xticks(rotation=45); plt.tight_layout()
+    return fig
 
 
 # ---------------------------------------------------------------------------
 # Main entry point
 # ---------------------------------------------------------------------------
+# (id, rótulo, capítulo do relatório) de cada grupo de gráficos
 GENERATORS = [
-    ("volumes", "Volumes de Entrada", gerar_graficos_volumes),
-    ("pcs", "Poder Calorífico Superior", gerar_graficos_pcs),
-    ("energia", "Cálculo de Energia", gerar_graficos_energia),
-    ("clientes", "Perfis de Clientes", gerar_graficos_clientes),
-    ("incertezas", "Incertezas de Medição", gerar_graficos_incertezas),
-    ("balanco", "Balanço de Massa", gerar_graficos_balanco),
+    ("volumes", "Volumes de Entrada", 2),
+    ("pcs", "Poder Calorífico Superior", 3),
+    ("energia", "Cálculo de Energia", 4),
+    ("clientes", "Perfis de Clientes", 5),
+    ("incertezas", "Incertezas de Medição", 6),
+    ("balanco", "Balanço de Massa", 7),
 ]
 
 
+@dataclass(frozen=True)
+class Grafico:
+    """Declaração de um gráfico do relatório.
+
+    ``preparar`` lê do snapshot apenas os conjuntos listados em ``dados`` e
+    devolve o payload da figura (ou None quando ela não se aplica aos dados,
+    como o heatmap de um cliente sem medições); ``desenhar`` transforma o
+    payload na Figure. ``capitulo`` é o de CHAPTER_CONFIG cujo
+    ``graph_files`` lista o PNG.
+    """
+    id: str
+    grupo: str
+    capitulo: int
+    dados: tuple[str, ...]
+    preparar: Callable[[WorkbookSnapshot], dict | None]
+    desenhar: Callable[[dict], plt.Figure]
+
+    @property
+    def arquivo(self) -> str:
+        return f"{self.id}.png"
+
+
+_VOL, _PCS, _CLI = ("volumes",), ("pcs",), ("clientes",)
+
+# Na ordem de geração (grupos de GENERATORS; figuras na ordem dos capítulos)
+GRAFICOS = [
+    Grafico("vol_entrada_serie", "volumes", 2, _VOL, _dados_vol_serie, _fig_vol_serie),
+    Grafico("vol_entrada_diferencas", "volumes", 2, _VOL, _dados_vol_diferencas, _fig_vol_diferencas),
+    Grafico("vol_entrada_histograma", "volumes", 2, _VOL, _dados_vol_histograma, _fig_vol_histograma),
+    Grafico("vol_entrada_boxplot", "volumes", 2, _VOL, _dados_vol_boxplot, _fig_vol_boxplot),
+    Grafico("pcs_serie", "pcs", 3, _PCS, _dados_pcs_serie, _fig_pcs_serie),
+    Grafico("pcs_histograma", "pcs", 3, _PCS, _dados_pcs_histograma, _fig_pcs_histograma),
+    Grafico("energia_serie", "energia", 4, _VOL + _PCS, _dados_energia_serie, _fig_energia_serie),
+    Grafico("energia_diferencas", "energia", 4, _VOL + _PCS, _dados_energia_diferencas, _fig_energia_diferencas),
+    Grafico("energia_mensal", "energia", 4, _VOL + _PCS, _dados_energia_mensal, _fig_energia_mensal),
+    Grafico("energia_scatter", "energia", 4, _VOL + _PCS, _dados_energia_scatter, _fig_energia_scatter),
+    Grafico("clientes_serie", "clientes", 5, _CLI, _dados_clientes_serie, _fig_clientes_serie),
+    Grafico("clientes_perfil_horario", "clientes", 5, _CLI, _dados_clientes_perfil_horario, _fig_clientes_perfil_horario),
+    Grafico("clientes_heatmap", "clientes", 5, _CLI, _dados_clientes_heatmap, _fig_clientes_heatmap),
+    Grafico("clientes_pressao_temp", "clientes", 5, _CLI, _dados_clientes_pressao_temp, _fig_clientes_pressao_temp),
+    Grafico("clientes_participacao", "clientes", 5, _CLI, _dados_clientes_participacao, _fig_clientes_participacao),
+    Grafico("clientes_boxplot", "clientes", 5, _CLI, _dados_clientes_boxplot, _fig_clientes_boxplot),
+    Grafico("clientes_heatmap_todos", "clientes", 5, _CLI, _dados_clientes_heatmap_todos, _fig_clientes_heatmap_todos),
+    Grafico("incertezas_barras", "incertezas", 6, (), _dados_incertezas_barras, _fig_incertezas_barras),
+    Grafico("incertezas_rss", "incertezas", 6, (), _dados_incertezas_rss, _fig_incertezas_rss),
+    Grafico("incertezas_contribuicao", "incertezas", 6, (), _dados_incertezas_contribuicao, _fig_incertezas_contribuicao),
+    Grafico("balanco_barras", "balanco", 7, _VOL + _CLI, _dados_balanco_totais, _fig_balanco_barras),
+    Grafico("balanco_waterfall", "balanco", 7, _VOL + _CLI, _dados_balanco_waterfall, _fig_balanco_waterfall),
+    Grafico("balanco_bandas", "balanco", 7, _VOL + _CLI, _dados_balanco_totais, _fig_balanco_bandas),
+    Grafico("balanco_dashboard", "balanco", 7, _VOL + _CLI, _dados_balanco_totais, _fig_balanco_dashboard),
+    Grafico("balanco_diario", "balanco", 7, _VOL + _CLI, _dados_balanco_diario, _fig_balanco_diario),
+]
+REGISTRO = {g.id: g for g in GRAFICOS}
+
+
+def selecionar_graficos(grupos: list[str] | None = None, somente: list[str] | None = None) -> list[Grafico]:
+    """Gráficos dos ``grupos`` (ids de GENERATORS) e/ou com os ids (ou nomes de PNG) em ``somente``."""
+    ids = None
+    if somente:
+        ids = {Path(i.strip()).stem for i in somente if i.strip()}
+        desconhecidos = sorted(ids - REGISTRO.keys())
+        if desconhecidos:
+            raise ValueError(f"Gráficos desconhecidos: {', '.join(desconhecidos)}")
+    return [g for g in GRAFICOS if (not grupos or g.grupo in grupos) and (ids is None or g.id in ids)]
+
+
+def dados_necessarios(graficos: list[Grafico]) -> list[str]:
+    """Conjuntos do snapshot lidos para preparar ``graficos`` (na ordem de ABAS_CONJUNTO)."""
+    usados = {d for g in graficos for d in g.dados}
+    return [nome for nome in ABAS_CONJUNTO if nome in usados]
+
+
+def _renderizar(grafico_id: str, dados: dict, output_dir: str, usar_cache: bool = True) -> str:
+    """Desenha e salva um PNG e as suas variantes (num processo do pool ou no próprio processo)."""
+    grafico = REGISTRO[grafico_id]
+    fig = grafico.desenhar(dados)
+    try:
+        fig.savefig(str(Path(output_dir) / grafico.arquivo), **SAVE_KW)
+    finally:
+        plt.close(fig)
+    gerar_variantes(Path(output_dir) / grafico.arquivo, usar_cache=usar_cache)
+    return grafico.arquivo
+
+
+def _executar_local(fn: Callable, *args) -> Future:
+    fut = Future()
+    try:
+        fut.set_result(fn(*args))
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+
 def gerar_todos_graficos(
-    excel_path: str | Path,
+    fonte: WorkbookSnapshot | str | Path,
     output_dir: str | Path,
     on_progress: Callable | None = None,
+    grupos: list[str] | None = None,
+    max_workers: int | None = None,
+    usar_cache: bool = True,
+    somente: list[str] | None = None,
 ) -> list[str]:
-    """Generate all 23 graphs from Excel data.
+    """Generate all 25 graphs from Excel data.
+
+    Each chart declared in GRAFICOS has its data prepared in this process
+    (pre-parsed arrays from the snapshot) and is rendered as an independent
+    task in a ProcessPoolExecutor; workers never touch the Excel file.
+
+    With ``usar_cache``, figures whose fingerprint (plotted data, drawing
+    code, matplotlib version) is unchanged are not redrawn: they are kept
+    in place or copied from the render cache (cache_graficos.py), and
+    ``graficos_manifesto.json`` in ``output_dir`` records the origin of each PNG.
+
+    Every PNG also gets its per-consumer variants (LLM, print, web
+    thumbnail) in subfolders of ``output_dir``; see variantes_graficos.py.
 
     Args:
-        excel_path: Path to the district Excel file.
+        fonte: WorkbookSnapshot already parsed, or path to the district Excel file.
         output_dir: Directory to save PNG files.
-        on_progress: Optional callback(step_name, files_generated).
+        on_progress: Optional callback, called once per group when all of its
+            figures are done: {"group", "label", "files", "reused"[, "error"]}.
+        grupos: Only these groups (ids in GENERATORS).
+        max_workers: Rendering processes (None = one per core; 1 = in-process).
+        usar_cache: Reuse previously rendered PNGs with the same fingerprint.
+        somente: Only these charts (ids in GRAFICOS or PNG names). Sheets are
+            parsed on demand, so only the data the selected charts declare is read.
 
     Returns:
-        List of generated PNG filenames.
+        List of generated PNG filenames, in GRAFICOS order.
     """
+    from cache_graficos import (
+        COPIADO, INALTERADO, RENDERIZADO, ManifestoGraficos, guardar, impressao_grafico, limpar_cache, restaurar,
+    )
+
+    selecionados = selecionar_graficos(grupos, somente)
     out = Path(output_dir)
     out.mkdir(parents=True, exist_ok=True)
-    all_generated = []
-
-    for group_id, label, gen_func in GENERATORS:
-        logger.info(f"Gerando gráficos: {label}")
-        try:
-            files = gen_func(excel_path, out)
-            all_generated.extend(files)
-            logger.info(f"  -> {len(files)} gráficos gerados")
-            if on_progress:
-                on_progress({"group": group_id, "label": label, "files": files})
-        except Exception as e:
-            logger.error(f"Erro ao gerar gráficos de {label}: {e}")
-            if on_progress:
-                on_progress({"group": group_id, "label": label, "files": [], "error": str(e)})
-
+    snapshot = carregar_snapshot(fonte)
+    manifesto = ManifestoGraficos.carregar(out) if usar_cache else None
+    if somente:
+        logger.info(f"{len(selecionados)} gráfico(s) selecionado(s); "
+                    f"dados: {', '.join(dados_necessarios(selecionados)) or 'nenhum'}")
+
+    por_grupo: dict[str, list[Grafico]] = {}
+    for grafico in selecionados:
+        por_grupo.setdefault(grafico.grupo, []).append(grafico)
+    rotulos = {g: label for g, label, _ in GENERATORS}
+
+    max_workers = max_workers or os.cpu_count() or 1
+    paralelo = USAR_PROCESSOS and max_workers > 1
+    gerados: dict[str, list[str]] = {}
+    reaproveitados: dict[str, list[str]] = {}
+    erros: dict[str, str] = {}
+    tarefas: dict[Future, tuple[str, Grafico]] = {}
+    restantes: dict[str, int] = {}
+    impressoes: dict[str, str] = {}
+    ordem: dict[str, list[str]] = {}
+
+    def _concluir_grupo(grupo: str):
+        files = [f for f in ordem[grupo] if f in gerados[grupo]]
+        if grupo in erros:
+            logger.error(f"Erro ao gerar gráficos de {rotulos[grupo]}: {erros[grupo]}")
+        else:
+            logger.info(f"  -> {len(files)} gráficos gerados ({rotulos[grupo]})")
+        if on_progress:
+            evento = {"group": grupo, "label": rotulos[grupo], "files": files, "reused": reaproveitados[grupo]}
+            if grupo in erros:
+                evento["error"] = erros[grupo]
+            on_progress(evento)
+
+    def _coletar(futs):
+        for fut in futs:
+            grupo, grafico = tarefas.pop(fut)
+            try:
+                gerados[grupo].append(fut.result())
+                if manifesto is not None:
+                    impressao = impressoes[grafico.id]
+                    manifesto.registrar(grafico.arquivo, impressao, guardar(impressao, out / grafico.arquivo), RENDERIZADO)
+            except Exception as e:
+                erros.setdefault(grupo, f"{grafico.arquivo}: {e}")
+            restantes[grupo] -= 1
+            if not restantes[grupo]:
+                _concluir_grupo(grupo)
+
+    def _reaproveitar(grafico: Grafico, dados: dict) -> bool:
+        if manifesto is None:
+            return False
+        arquivo = grafico.arquivo
+        impressao = impressoes[grafico.id] = impressao_grafico(dados, grafico.desenhar, SAVE_KW)
+        if manifesto.inalterado(arquivo, impressao):
+            sha = manifesto.graficos[arquivo]["sha256"]
+            manifesto.registrar(arquivo, impressao, sha, INALTERADO)
+            if not variantes_atualizadas(out / arquivo):
+                gerar_variantes(out / arquivo, sha)
+        else:
+            sha = restaurar(impressao, out / arquivo)
+            if sha is None:
+                return False
+            manifesto.registrar(arquivo, impressao, sha, COPIADO)
+            gerar_variantes(out / arquivo, sha)
+        gerados[grafico.grupo].append(arquivo)
+        reaproveitados[grafico.grupo].append(arquivo)
+        return True
+
+    pool = None
+    try:
+        for group_id, graficos in por_grupo.items():
+            logger.info(f"Gerando gráficos: {rotulos[group_id]}")
+            gerados[group_id], reaproveitados[group_id], ordem[group_id] = [], [], []
+            pendentes = []
+            for grafico in graficos:
+                try:
+                    dados = grafico.preparar(snapshot)
+                except Exception as e:
+                    erros.setdefault(group_id, f"{grafico.arquivo}: {e}")
+                    continue
+                if dados is None:
+                    continue
+                ordem[group_id].append(grafico.arquivo)
+                if not _reaproveitar(grafico, dados):
+                    pendentes.append((grafico, dados))
+            restantes[group_id] = len(pendentes)
+            if not pendentes:
+                _concluir_grupo(group_id)
+                continue
+            # O pool só sobe quando há figuras a desenhar
+            if pool is None and paralelo:
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+            novas = []
+            for grafico, dados in pendentes:
+                if pool:
+                    fut = pool.submit(_renderizar, grafico.id, dados, str(out), usar_cache)
+                else:
+                    fut = _executar_local(_renderizar, grafico.id, dados, str(out), usar_cache)
+                tarefas[fut] = (group_id, grafico)
+                novas.append(fut)
+            if not pool:
+                _coletar(novas)
+        if pool:
+            _coletar(as_completed(list(tarefas)))
+    finally:
+        if pool:
+            pool.shutdown()
+
+    all_generated = [f for g in por_grupo for f in ordem[g] if f in gerados[g]]
+    if manifesto is not None:
+        # PNGs selecionados que deixaram de ser gerados saem do manifesto
+        for grafico in selecionados:
+            if grafico.arquivo not in gerados[grafico.grupo]:
+                manifesto.remover(grafico.arquivo)
+        manifesto.salvar()
+        n_reusados = sum(len(r) for r in reaproveitados.values())
+        if len(all_generated) > n_reusados:
+            limpar_cache()
+        if n_reusados:
+            logger.info(f"Cache de gráficos: {n_reusados} reaproveitados, "
+                        f"{len(all_generated) - n_reusados} renderizados")
     logger.info(f"Total: {len(all_generated)} gráficos gerados")
     return all_generated
 
@@ -733,6 +1561,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gerar gráficos do distrito")
     parser.add_argument("--excel", type=str, help="Caminho do Excel")
     parser.add_argument("--output", type=str, default=None, help="Diretório de saída")
+    parser.add_argument("--grupos", nargs="+", default=None,
+                        choices=[g for g, _, _ in GENERATORS], help="Gerar apenas estes grupos")
+    parser.add_argument("--only", type=str, default=None,
+                        help="Gerar apenas estes gráficos (ids separados por vírgula, ex.: energia_scatter,balanco_bandas)")
+    parser.add_argument("--sem-cache", action="store_true", help="Redesenhar mesmo os gráficos inalterados")
     args = parser.parse_args()
 
     from config import DATA_DIR, GRAFICOS_DIR, EXCEL_DEFAULT
@@ -740,5 +1573,6 @@ if __name__ == "__main__":
     excel = args.excel or str(DATA_DIR / EXCEL_DEFAULT)
     output = args.output or str(GRAFICOS_DIR)
 
-    gerados = gerar_todos_graficos(excel, output)
+    somente = args.only.split(",") if args.only else None
+    gerados = gerar_todos_graficos(excel, output, grupos=args.grupos, usar_cache=not args.sem_cache, somente=somente)
     print(f"\n{len(gerados)} gráficos gerados em {output}")
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de somas acumuladas para consultas de balanço em qualquer intervalo.
+
+Sobre a grade horária densa do período (uma posição por hora, t0 … t0+H)
+são guardadas as somas acumuladas (prefix sums, H + 1 posições) de:
+
+    entrada   volume de entrada (o volume diário rateado pelas 24 horas do dia)
+    energia   energia de entrada em Gcal (volume × PCS, também rateada)
+    clientes  volume horário de cada cliente (C, H + 1)
+    horas     horas medidas de cada cliente e da entrada (para a cobertura)
+
+A soma de qualquer intervalo [início, fim) — hora, dia, semana, mês ou
+personalizado — é a diferença de duas posições: O(1) no tamanho do
+intervalo, O(C) no número de clientes. As bandas seguem o capítulo 7:
+volume do intervalo × incerteza RSS relativa de entrada e de saída (as
+incertezas dos medidores são sistemáticas, então não há soma de
+variâncias hora a hora a acumular).
+
+Convenções: carimbos dos clientes marcam o fim da hora (ver
+balanco_temporal) e a hora ``i`` da grade é [t0 + i, t0 + i + 1). Clientes
+sem dados horários entram com o volume de referência rateado por hora.
+
+O índice é salvo em ``indice_balanco.npz`` ao lado de extracted_data.json.
+
+Uso:
+    from indice_balanco import carregar_indice
+    indice = carregar_indice()
+    indice.consultar("2025-06-01", "2025-07-01")["diferenca_pct"]
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+from dados_horarios import COLUNAS, ClientesHorarios, NS_HORA, horas_epoch
+
+logger = logging.getLogger(__name__)
+
+INDICE_DEFAULT = CACHE_DIR / "indice_balanco.npz"
+
+
+def _acumular(x: np.ndarray) -> np.ndarray:
+    """Soma acumulada com um zero à esquerda no último eixo (float64 ou int64)."""
+    forma = x.shape[:-1] + (1,)
+    return np.concatenate([np.zeros(forma, dtype=x.dtype), np.cumsum(x, axis=-1)], axis=-1)
+
+
+@dataclass(eq=False)
+class IndiceBalanco:
+    """Somas acumuladas horárias de entrada, energia e clientes (ver módulo)."""
+    t0: int
+    entrada: np.ndarray
+    energia: np.ndarray
+    horas_entrada: np.ndarray
+    clientes: np.ndarray
+    horas_clientes: np.ndarray
+    nomes: list[str]
+    u_entrada: float
+    u_saida: float
+    referencias: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def horas(self) -> int:
+        return self.entrada.size - 1
+
+    @property
+    def inicio(self) -> pd.Timestamp:
+        return pd.Timestamp(self.t0 * NS_HORA)
+
+    @property
+    def fim(self) -> pd.Timestamp:
+        return pd.Timestamp((self.t0 + self.horas) * NS_HORA)
+
+    def _posicao(self, quando) -> int:
+        """Posição na grade (0 … H) da hora que começa em ``quando`` (limitada ao período)."""
+        h = int(horas_epoch(np.array([pd.Timestamp(quando).to_datetime64()]))[0])
+        return min(max(h - self.t0, 0), self.horas)
+
+    def consultar(self, inicio=None, fim=None) -> dict:
+        """Balanço do intervalo [inicio, fim) (datas ou strings; None = limite do período).
+
+        Returns:
+            dict com inicio, fim, horas, entrada_nm3, saida_nm3, diferenca_nm3,
+            diferenca_pct, energia_gcal, bandas de entrada e saída,
+            bandas_sobrepoem, cobertura_entrada e volume/cobertura por cliente.
+        """
+        a = 0 if inicio is None else self._posicao(inicio)
+        b = self.horas if fim is None else self._posicao(fim)
+        if b < a:
+            raise ValueError("Fim do intervalo anterior ao início")
+        n = b - a
+
+        entrada = float(self.entrada[b] - self.entrada[a])
+        vols = self.clientes[:, b] - self.clientes[:, a]
+        horas = self.horas_clientes[:, b] - self.horas_clientes[:, a]
+        clientes = {}
+        for nome, v, h in zip(self.nomes, vols, horas):
+            if nome in self.referencias:
+                clientes[nome] = {"volume_nm3": self.referencias[nome] / self.horas * n,
+                                  "cobertura": 1.0 if n else 0.0, "referencia": True}
+            else:
+                clientes[nome] = {"volume_nm3": float(v), "cobertura": float(h / n) if n else 0.0,
+                                  "referencia": False}
+        saida = sum(c["volume_nm3"] for c in clientes.values())
+
+        entrada_min, entrada_max = entrada * (1 - self.u_entrada), entrada * (1 + self.u_entrada)
+        saida_min, saida_max = saida * (1 - self.u_saida), saida * (1 + self.u_saida)
+        return {
+            "inicio": (self.inicio + pd.Timedelta(hours=a)).isoformat(),
+            "fim": (self.inicio + pd.Timedelta(hours=b)).isoformat(),
+            "horas": n,
+            "entrada_nm3": entrada,
+            "saida_nm3": saida,
+            "diferenca_nm3": entrada - saida,
+            "diferenca_pct": (entrada - saida) / entrada * 100 if entrada else None,
+            "energia_gcal": float(self.energia[b] - self.energia[a]),
+            "banda_entrada": [entrada_min, entrada_max],
+            "banda_saida": [saida_min, saida_max],
+            "bandas_sobrepoem": bool(entrada_min <= saida_max and saida_min <= entrada_max),
+            "cobertura_entrada": float((self.horas_entrada[b] - self.horas_entrada[a]) / n) if n else 0.0,
+            "clientes": clientes,
+        }
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+    def salvar(self, path: str | Path = INDICE_DEFAULT):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"t0": self.t0, "nomes": self.nomes, "u_entrada": self.u_entrada,
+                "u_saida": self.u_saida, "referencias": self.referencias}
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, entrada=self.entrada, energia=self.energia, horas_entrada=self.horas_entrada,
+                     clientes=self.clientes, horas_clientes=self.horas_clientes,
+                     meta=np.array(json.dumps(meta, ensure_ascii=False)))
+        tmp.replace(path)
+        logger.info(f"Índice de balanço salvo em {path} ({self.horas} horas, {len(self.nomes)} clientes)")
+
+
+def construir_indice(
+    volumes: pd.DataFrame,
+    pcs: pd.DataFrame,
+    clientes: ClientesHorarios,
+    u_entrada: float,
+    u_saida: float,
+    referencias: dict[str, float] | None = None,
+) -> IndiceBalanco:
+    """Monta o índice a partir das abas parseadas (volumes, PCS e grade dos clientes).
+
+    Args:
+        u_entrada, u_saida: Incertezas RSS relativas (fração).
+        referencias: Volume de referência (Nm³) dos clientes sem dados horários.
+    """
+    referencias = referencias or {}
+    dias = horas_epoch(volumes["Data"].to_numpy("datetime64[ns]")) // 24
+    fim_clientes = clientes.horas - 1
+    inicios = [dias.min() * 24] if dias.size else []
+    fins = [dias.max() * 24 + 24] if dias.size else []
+    if fim_clientes.size:
+        inicios.append(fim_clientes.min())
+        fins.append(fim_clientes.max() + 1)
+    t0 = int(min(inicios)) if inicios else 0
+    h = int(max(fins)) - t0 if fins else 0
+
+    # Entrada e energia: valor diário rateado pelas 24 horas do dia
+    entrada = np.zeros(h)
+    energia = np.zeros(h)
+    medida = np.zeros(h, dtype=np.int64)
+    if dias.size:
+        pos = (dias * 24 - t0)[:, None] + np.arange(24)
+        vol = volumes["Concessionaria_Nm3d"].to_numpy(np.float64)
+        ok = ~np.isnan(vol)
+        entrada[pos[ok]] = (vol[ok] / 24)[:, None]
+        medida[pos[ok]] = 1
+        pcs_dia = pd.Series(pcs["PCS_Conc_kcal"].to_numpy(np.float64), index=pcs["Data"].to_numpy())
+        pcs_vol = pcs_dia.reindex(volumes["Data"].to_numpy()).to_numpy()
+        ok &= ~np.isnan(pcs_vol)
+        energia[pos[ok]] = (vol[ok] * pcs_vol[ok] / 1e6 / 24)[:, None]
+
+    # Clientes: cada carimbo (fim da hora) vai para a hora que ele encerra
+    c = len(clientes)
+    vol_cli = np.zeros((c, h))
+    horas_cli = np.zeros((c, h), dtype=np.int32)
+    if fim_clientes.size:
+        v = clientes.valores[:, COLUNAS.index("Volume_Nm3h")].astype(np.float64)
+        ok = ~np.isnan(v)
+        vol_cli[:, fim_clientes - t0] = np.where(ok, v, 0.0)
+        horas_cli[:, fim_clientes - t0] = ok
+
+    sem_dados = {clientes.nomes[aba]: referencias.get(clientes.nomes[aba], 0.0)
+                 for aba in clientes if clientes.sem_dados(aba)}
+    return IndiceBalanco(
+        t0=t0,
+        entrada=_acumular(entrada),
+        energia=_acumular(energia),
+        horas_entrada=_acumular(medida),
+        clientes=_acumular(vol_cli),
+        horas_clientes=_acumular(horas_cli),
+        nomes=[clientes.nomes[aba] for aba in clientes],
+        u_entrada=u_entrada,
+        u_saida=u_saida,
+        referencias=sem_dados,
+    )
+
+
+def carregar_indice(path: str | Path = INDICE_DEFAULT) -> IndiceBalanco:
+    """Lê o índice salvo por ``IndiceBalanco.salvar`` (FileNotFoundError se não existir)."""
+    with np.load(Path(path)) as z:
+        meta = json.loads(str(z["meta"]))
+        return IndiceBalanco(
+            t0=meta["t0"],
+            entrada=z["entrada"],
+            energia=z["energia"],
+            horas_entrada=z["horas_entrada"],
+            clientes=z["clientes"],
+            horas_clientes=z["horas_clientes"],
+            nomes=meta["nomes"],
+            u_entrada=meta["u_entrada"],
+            u_saida=meta["u_saida"],
+            referencias=meta["referencias"],
+        )
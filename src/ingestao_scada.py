@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Ingestão direta de exportações do SCADA/historiador (CSV ou Parquet),
+sem passar pelo layout de 14 abas do Excel.
+
+Produz o mesmo WorkbookSnapshot dos loaders do Excel, de modo que
+``extrair_todos``, ``gerar_todos_graficos`` e ``run_pipeline`` aceitam
+a exportação diretamente (ver ``graph_generator.carregar_snapshot``).
+
+Formatos aceitos:
+
+1. Diretório com um arquivo por ponto de medição (.csv, .csv.gz, .parquet):
+       vol_entrada      data, concessionaria_nm3d, transportadora_nm3d
+       pcs_entrada      data, pcs_conc_kcal, pcs_transp_kcal
+       energia_entrada  data, vol_plan, pcs_plan, e_plan, vol_transp_plan  (opcional)
+       cliente_<n>      data, volume_nm3h, pressao_bara, temperatura_c
+   ("cliente_1" corresponde à aba "Cliente #1"; nomes de colunas sem
+   distinção de maiúsculas.)
+
+2. Um único arquivo em formato longo com as colunas
+       ponto, data, grandeza, valor
+   onde ``ponto`` usa os mesmos nomes acima e ``grandeza`` o nome da coluna.
+
+Os arquivos são lidos em blocos de CHUNK_LINHAS linhas (``read_csv(chunksize)``
+ou ``ParquetFile.iter_batches``): cada bloco é convertido para arrays
+numéricos compactos (int64 para datas, float64 para valores) e descartado,
+então arquivos de vários anos entram com memória de leitura constante.
+
+Uso:
+    from ingestao_scada import carregar_scada
+    snapshot = carregar_scada("exportacao_scada/")
+"""
+import logging
+import re
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from dados_horarios import ClientesHorarios
+from graph_generator import (
+    CLIENTES, WorkbookSnapshot,
+    _parse_cliente, _parse_energia, _parse_pcs, _parse_volumes,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_LINHAS = 200_000
+
+# Ponto de medição -> colunas de medição (após "data"), na ordem dos loaders
+PONTOS = {
+    "vol_entrada": ["concessionaria_nm3d", "transportadora_nm3d"],
+    "pcs_entrada": ["pcs_conc_kcal", "pcs_transp_kcal"],
+    "energia_entrada": ["vol_plan", "pcs_plan", "e_plan", "vol_transp_plan"],
+}
+COLUNAS_CLIENTE = ["volume_nm3h", "pressao_bara", "temperatura_c"]
+COLUNAS_LONGO = ["ponto", "data", "grandeza", "valor"]
+
+_RE_CLIENTE = re.compile(r"^cliente_(\d+)$")
+
+
+def _aba_cliente(ponto: str) -> str | None:
+    """"cliente_3" -> "Cliente #3" (se o cliente estiver cadastrado)."""
+    m = _RE_CLIENTE.match(ponto)
+    if not m:
+        return None
+    aba = f"Cliente #{m.group(1)}"
+    return aba if aba in CLIENTES else None
+
+
+def _colunas_ponto(ponto: str) -> list[str] | None:
+    if ponto in PONTOS:
+        return PONTOS[ponto]
+    return COLUNAS_CLIENTE if _aba_cliente(ponto) else None
+
+
+def _nome_ponto(path: Path) -> str:
+    nome = path.name.lower()
+    for sufixo in (".csv.gz", ".csv", ".parquet", ".pq"):
+        if nome.endswith(sufixo):
+            return nome[: -len(sufixo)]
+    return path.stem.lower()
+
+
+# ---------------------------------------------------------------------------
+# Leitura em blocos
+# ---------------------------------------------------------------------------
+
+def _iterar_blocos(path: Path, colunas: list[str]) -> Iterator[pd.DataFrame]:
+    """Itera o arquivo em blocos, apenas com ``colunas`` (nomes em minúsculas)."""
+    desejadas = set(colunas)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        originais = [c for c in pf.schema_arrow.names if c.strip().lower() in desejadas]
+        for batch in pf.iter_batches(batch_size=CHUNK_LINHAS, columns=originais):
+            bloco = batch.to_pandas()
+            bloco.columns = [c.strip().lower() for c in bloco.columns]
+            yield bloco
+    else:
+        leitor = pd.read_csv(
+            path, chunksize=CHUNK_LINHAS,
+            usecols=lambda c: c.strip().lower() in desejadas,
+        )
+        for bloco in leitor:
+            bloco.columns = [c.strip().lower() for c in bloco.columns]
+            yield bloco
+
+
+def _datas_int64(serie: pd.Series) -> np.ndarray:
+    return pd.to_datetime(serie, errors="coerce").to_numpy("datetime64[ns]").view(np.int64)
+
+
+def _valores_float64(serie: pd.Series) -> np.ndarray:
+    return pd.to_numeric(serie, errors="coerce").to_numpy(np.float64)
+
+
+def _ler_ponto(path: Path, colunas: list[str]) -> pd.DataFrame:
+    """Lê um arquivo por ponto e devolve DataFrame [Data, *colunas] ordenado por data."""
+    partes: dict[str, list[np.ndarray]] = {c: [] for c in ["data"] + colunas}
+    for bloco in _iterar_blocos(path, ["data"] + colunas):
+        partes["data"].append(_datas_int64(bloco["data"]))
+        for col in colunas:
+            if col in bloco:
+                partes[col].append(_valores_float64(bloco[col]))
+            else:
+                partes[col].append(np.full(len(bloco), np.nan))
+    datas = np.concatenate(partes["data"]) if partes["data"] else np.array([], dtype=np.int64)
+    df = pd.DataFrame({"Data": datas.view("datetime64[ns]")})
+    for col in colunas:
+        df[col] = np.concatenate(partes[col]) if partes[col] else np.array([], dtype=np.float64)
+    return df.sort_values("Data", kind="stable").reset_index(drop=True)
+
+
+def _ler_longo(path: Path) -> dict[str, pd.DataFrame]:
+    """Lê o arquivo em formato longo e pivota cada ponto para [Data, *colunas]."""
+    # (ponto, grandeza) -> listas de arrays (datas, valores)
+    series: dict[tuple[str, str], tuple[list, list]] = {}
+    for bloco in _iterar_blocos(path, COLUNAS_LONGO):
+        pontos = bloco["ponto"].astype(str).str.strip().str.lower()
+        grandezas = bloco["grandeza"].astype(str).str.strip().str.lower()
+        datas = _datas_int64(bloco["data"])
+        valores = _valores_float64(bloco["valor"])
+        chaves = pd.MultiIndex.from_arrays([pontos, grandezas])
+        codigos, uniques = pd.factorize(chaves)
+        for i, chave in enumerate(uniques):
+            sel = codigos == i
+            d, v = series.setdefault(chave, ([], []))
+            d.append(datas[sel])
+            v.append(valores[sel])
+
+    frames = {}
+    for ponto in sorted({p for p, _ in series}):
+        colunas = _colunas_ponto(ponto)
+        if colunas is None:
+            logger.warning(f"Ponto desconhecido ignorado: {ponto}")
+            continue
+        colunas_ponto = []
+        for col in colunas:
+            if (ponto, col) in series:
+                d, v = series[(ponto, col)]
+                s = pd.Series(np.concatenate(v), index=np.concatenate(d).view("datetime64[ns]"), name=col)
+                colunas_ponto.append(s[~s.index.duplicated(keep="last")])
+            else:
+                colunas_ponto.append(pd.Series(dtype=np.float64, name=col))
+        df = pd.concat(colunas_ponto, axis=1).sort_index()
+        df.index.name = "Data"
+        frames[ponto] = df.reset_index()
+    return frames
+
+
+def _ler_diretorio(path: Path) -> dict[str, pd.DataFrame]:
+    frames = {}
+    for arquivo in sorted(path.iterdir()):
+        if not arquivo.is_file():
+            continue
+        ponto = _nome_ponto(arquivo)
+        colunas = _colunas_ponto(ponto)
+        if colunas is None:
+            continue
+        frames[ponto] = _ler_ponto(arquivo, colunas)
+        logger.info(f"  SCADA: {arquivo.name} ({len(frames[ponto])} linhas)")
+    return frames
+
+
+# ---------------------------------------------------------------------------
+# Montagem do snapshot
+# ---------------------------------------------------------------------------
+
+def _com_difs(df: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta as colunas Dif_Abs/Dif_Pct que a planilha traz prontas."""
+    df = df.iloc[:, :3].copy()
+    df["Dif_Abs"] = df.iloc[:, 1] - df.iloc[:, 2]
+    df["Dif_Pct"] = df["Dif_Abs"] / df.iloc[:, 1]
+    return df
+
+
+def carregar_scada(path: str | Path) -> WorkbookSnapshot:
+    """Monta um WorkbookSnapshot a partir de uma exportação CSV/Parquet do SCADA."""
+    path = Path(path)
+    logger.info(f"Ingestão SCADA: {path}")
+    frames = _ler_diretorio(path) if path.is_dir() else _ler_longo(path)
+
+    for obrigatorio in ("vol_entrada", "pcs_entrada"):
+        if obrigatorio not in frames:
+            raise ValueError(f"Exportação SCADA sem o ponto '{obrigatorio}': {path}")
+
+    frames_clientes = {}
+    for aba in CLIENTES:
+        ponto = f"cliente_{aba.split('#')[-1].strip()}"
+        df = frames.get(ponto)
+        if df is None:
+            df = pd.DataFrame(columns=["Data"] + COLUNAS_CLIENTE)
+        frames_clientes[aba] = _parse_cliente(df.copy())
+
+    energia = frames.get("energia_entrada")
+    return WorkbookSnapshot(
+        excel_path=str(path),
+        volumes=_parse_volumes(_com_difs(frames["vol_entrada"])),
+        pcs=_parse_pcs(_com_difs(frames["pcs_entrada"])),
+        clientes=ClientesHorarios.de_frames(frames_clientes, CLIENTES),
+        energia=_parse_energia(energia.copy()) if energia is not None else None,
+    )
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Backends de leitura de planilhas usados pelos loaders de graph_generator.py.
+
+- "calamine": leitor em Rust (python-calamine) via pandas; o mais rápido,
+  lê .xlsx, .xlsm, .xlsb, .xls e .ods.
+- "openpyxl_stream": openpyxl em modo ``read_only`` iterando linha a linha e
+  materializando apenas o intervalo de colunas pedido (ex.: B:F).
+- "pandas": ``pd.ExcelFile`` com o engine padrão do pandas para o formato.
+
+O backend é escolhido automaticamente pelo formato e tamanho do arquivo
+(ver ``escolher_backend``); pode ser forçado com a variável de ambiente
+EXCEL_BACKEND. Os loaders só enxergam ``LeitorExcel.ler()``.
+
+Uso:
+    from leitores_excel import abrir_leitor
+    with abrir_leitor(excel_path) as leitor:
+        df = leitor.ler("Vol Entrada Gas", header=1, usecols="B:F")
+"""
+import importlib.util
+import logging
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+logger = logging.getLogger(__name__)
+
+BACKEND_PADRAO = os.environ.get("EXCEL_BACKEND", "auto")
+
+# Acima deste tamanho, sem calamine, o .xlsx é lido em streaming.
+LIMIAR_STREAMING_MB = 20
+
+HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+
+BACKENDS = ("calamine", "openpyxl_stream", "pandas")
+
+
+def _intervalo_colunas(usecols: str) -> tuple[int, int]:
+    """Converte "B:F" em índices 1-based (2, 6)."""
+    inicio, _, fim = usecols.partition(":")
+    return column_index_from_string(inicio), column_index_from_string(fim or inicio)
+
+
+class LeitorExcel(ABC):
+    """Interface comum: um workbook aberto uma vez, lido aba a aba."""
+    backend = ""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+
+    @abstractmethod
+    def ler(self, aba: str, header: int, usecols: str) -> pd.DataFrame:
+        """Equivalente a ``pd.read_excel(path, sheet_name=aba, header=header, usecols=usecols)``."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LeitorPandas(LeitorExcel):
+    """``pd.ExcelFile`` com o engine indicado (None = padrão do pandas)."""
+
+    def __init__(self, path: str | Path, engine: str | None = None):
+        super().__init__(path)
+        self.backend = engine or "pandas"
+        self._xls = pd.ExcelFile(path, engine=engine)
+
+    def ler(self, aba: str, header: int, usecols: str) -> pd.DataFrame:
+        return pd.read_excel(self._xls, sheet_name=aba, header=header, usecols=usecols)
+
+    def close(self):
+        self._xls.close()
+
+
+class LeitorOpenpyxlStreaming(LeitorExcel):
+    """openpyxl ``read_only``: percorre as linhas sem carregar a planilha inteira."""
+    backend = "openpyxl_stream"
+
+    def __init__(self, path: str | Path):
+        super().__init__(path)
+        self._wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+    @staticmethod
+    def _valor(v):
+        # Mesma conversão do pandas: floats inteiros viram int
+        if isinstance(v, float) and v.is_integer():
+            return int(v)
+        return v
+
+    def ler(self, aba: str, header: int, usecols: str) -> pd.DataFrame:
+        ws = self._wb[aba]
+        ws.reset_dimensions()  # não confiar no <dimension> gravado no arquivo
+        min_col, max_col = _intervalo_colunas(usecols)
+        linhas = ws.iter_rows(min_row=header + 1, min_col=min_col, max_col=max_col, values_only=True)
+        cabecalho = next(linhas, None) or ()
+        dados = [tuple(self._valor(v) for v in linha) for linha in linhas]
+        while dados and all(v is None for v in dados[-1]):
+            dados.pop()
+        n_cols = max_col - min_col + 1
+        nomes = [
+            c if c is not None else f"Unnamed: {min_col - 1 + i}"
+            for i, c in enumerate((tuple(cabecalho) + (None,) * n_cols)[:n_cols])
+        ]
+        return pd.DataFrame(dados, columns=nomes)
+
+    def close(self):
+        self._wb.close()
+
+
+def escolher_backend(path: str | Path) -> str:
+    """Escolhe o backend pelo formato e tamanho do arquivo."""
+    if BACKEND_PADRAO in BACKENDS:
+        return BACKEND_PADRAO
+    if HAS_CALAMINE:
+        return "calamine"
+    ext = Path(path).suffix.lower()
+    if ext in (".xlsx", ".xlsm"):
+        tamanho_mb = Path(path).stat().st_size / (1024 * 1024)
+        return "openpyxl_stream" if tamanho_mb > LIMIAR_STREAMING_MB else "pandas"
+    # .xls (xlrd), .xlsb (pyxlsb), .ods (odf): engine padrão do pandas
+    return "pandas"
+
+
+def abrir_leitor(path: str | Path, backend: str | None = None) -> LeitorExcel:
+    """Abre o workbook com o backend indicado ou escolhido automaticamente."""
+    backend = backend or escolher_backend(path)
+    logger.info(f"Leitor Excel: {backend} ({Path(path).name})")
+    if backend == "calamine":
+        return LeitorPandas(path, engine="calamine")
+    if backend == "openpyxl_stream":
+        return LeitorOpenpyxlStreaming(path)
+    return LeitorPandas(path)
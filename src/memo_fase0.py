@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Memoização da Fase 0 (extração de dados e gráficos) por impressão digital.
+
+Cada saída da Fase 0 tem uma impressão digital (SHA-256) composta por:
+
+    dados        SHA-256 do workbook (ou de todos os arquivos da exportação SCADA)
+    código       fonte das funções e classes de que a saída depende, valor
+                 das constantes que elas leem e o nível superior (imports,
+                 constantes, registros) dos módulos envolvidos
+
+As saídas são a extração (extracted_data.json + indice_balanco.npz) e cada
+grupo de gráficos de GENERATORS. As dependências vêm de
+``cache_graficos.dependencias_fonte``, que segue as chamadas por todos os
+módulos de src/: a extração parte de ``extrair_todos`` e
+``extrair_indice_balanco``; cada grupo, da carga do snapshot e de
+``gerar_todos_graficos`` somadas às funções que preparam e desenham as
+suas figuras (declaradas em GRAFICOS). Não há lista de módulos a manter:
+um módulo novo entra na impressão assim que passa a ser chamado.
+Assim, alterar o gráfico de PCS só refaz os PNGs do grupo "pcs".
+
+As impressões e os arquivos produzidos ficam em ``fase0_manifesto.json``;
+uma saída com a mesma impressão e todos os arquivos presentes é
+reaproveitada sem abrir o Excel.
+
+Uso:
+    from memo_fase0 import ManifestoFase0
+    manifesto = ManifestoFase0.carregar()
+    impressoes = impressoes_fase0(excel_path)
+    if manifesto.valido("extracao", impressoes["extracao"], CACHE_DIR): ...
+"""
+import ast
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from cache_planilha import hash_arquivo
+from config import CACHE_DIR, SRC_DIR
+
+logger = logging.getLogger(__name__)
+
+MANIFESTO_DEFAULT = CACHE_DIR / "fase0_manifesto.json"
+VERSAO_MANIFESTO = 1
+
+
+def _sha(*partes: str | bytes) -> str:
+    h = hashlib.sha256()
+    for p in partes:
+        h.update(p.encode("utf-8") if isinstance(p, str) else p)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _fonte(modulo: str) -> str:
+    path = SRC_DIR / f"{modulo}.py"
+    return path.read_text(encoding="utf-8") if path.exists() else ""
+
+
+def hash_fonte_dados(path: str | Path) -> str:
+    """SHA-256 do workbook; para diretórios (SCADA), de todos os arquivos em ordem de nome."""
+    path = Path(path)
+    if not path.is_dir():
+        return hash_arquivo(path)
+    return _sha(*(f"{p.name}:{hash_arquivo(p)}" for p in sorted(path.iterdir()) if p.is_file()))
+
+
+def _nivel_modulo(modulo: str) -> str:
+    """Fonte das instruções de nível superior de ``modulo`` que não são def/class.
+
+    Cobre o que ``dependencias_fonte`` não vê: imports, objetos montados na
+    carga do módulo (registros, tabelas, estilo do matplotlib) e constantes
+    que não são valores puros.
+    """
+    return _sem_definicoes(_fonte(modulo))
+
+
+@lru_cache(maxsize=64)
+def _sem_definicoes(fonte: str) -> str:
+    linhas = fonte.splitlines(keepends=True)
+    return "".join(
+        "".join(linhas[no.lineno - 1:no.end_lineno])
+        for no in ast.parse(fonte).body
+        if not isinstance(no, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    )
+
+
+def _codigo(deps: list[tuple[str, str]]) -> list[str]:
+    """Fonte de cada dependência (sem repetição) e o nível superior dos módulos envolvidos."""
+    fontes: dict[str, str] = {}
+    for nome, fonte in deps:
+        fontes.setdefault(nome, fonte)
+    modulos = sorted({nome.split(".", 1)[0] for nome in fontes})
+    return list(fontes.values()) + [_nivel_modulo(m) for m in modulos]
+
+
+def impressoes_fase0(fonte_dados: str | Path) -> dict[str, str]:
+    """Impressão digital de cada saída: "extracao" e "grafico:<grupo>"."""
+    import graph_generator as gg
+    from cache_graficos import dependencias_fonte
+    from extrator_dados import extrair_indice_balanco, extrair_todos
+
+    dados = hash_fonte_dados(fonte_dados)
+    extracao = dependencias_fonte(extrair_todos) + dependencias_fonte(extrair_indice_balanco)
+    impressoes = {"extracao": _sha(dados, *_codigo(extracao))}
+
+    # Gráficos: carga do snapshot e geração (comuns) + preparação e desenho
+    # das figuras de cada grupo, com as auxiliares que elas usam
+    comum = dependencias_fonte(gg.carregar_snapshot) + dependencias_fonte(gg.gerar_todos_graficos)
+    grupos: dict[str, list[tuple[str, str]]] = {g: [] for g, _, _ in gg.GENERATORS}
+    for grafico in gg.GRAFICOS:
+        grupos[grafico.grupo] += dependencias_fonte(grafico.preparar) + dependencias_fonte(grafico.desenhar)
+    for grupo, deps in grupos.items():
+        impressoes[f"grafico:{grupo}"] = _sha(dados, *_codigo(comum + deps))
+    return impressoes
+
+
+@dataclass
+class ManifestoFase0:
+    """Impressão e arquivos produzidos de cada saída da Fase 0."""
+    saidas: dict[str, dict] = field(default_factory=dict)
+    path: Path = MANIFESTO_DEFAULT
+
+    @classmethod
+    def carregar(cls, path: str | Path = MANIFESTO_DEFAULT) -> "ManifestoFase0":
+        path = Path(path)
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path=path)
+        if raw.get("versao") != VERSAO_MANIFESTO:
+            return cls(path=path)
+        return cls(saidas=raw.get("saidas", {}), path=path)
+
+    def valido(self, saida: str, impressao: str, diretorio: str | Path) -> bool:
+        """True se ``saida`` foi gerada com ``impressao`` e todos os seus arquivos existem."""
+        registro = self.saidas.get(saida)
+        if not registro or registro.get("impressao") != impressao:
+            return False
+        return all((Path(diretorio) / f).exists() for f in registro.get("arquivos", []))
+
+    def arquivos(self, saida: str) -> list[str]:
+        return list(self.saidas.get(saida, {}).get("arquivos", []))
+
+    def registrar(self, saida: str, impressao: str, arquivos: list[str]):
+        self.saidas[saida] = {"impressao": impressao, "arquivos": list(arquivos)}
+
+    def invalidar(self, saida: str):
+        self.saidas.pop(saida, None)
+
+    def salvar(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"versao": VERSAO_MANIFESTO, "saidas": self.saidas},
+                                  indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
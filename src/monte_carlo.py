@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Propagação de incertezas do balanço de massa por Monte Carlo (GUM Suplemento 1).
+
+Cada medidor de INCERTEZAS recebe um erro relativo normal com desvio padrão
+u/k (u expandida, k = FATOR_ABRANGENCIA), opcionalmente correlacionado com
+os demais (CORRELACOES, via Cholesky). A cada sorteio:
+
+    entrada = V_entrada · (1 + Σ δ_tramo)        (mesmo modelo do RSS da entrada)
+    saída   = Σ V_cliente · (1 + δ_cliente)      (cada erro sobre o volume do seu cliente)
+    diferença = entrada − saída
+
+Os sorteios são gerados em blocos de BLOCO linhas × medidores com semente
+fixa (resultado reprodutível e independente do tamanho do bloco); média e
+desvio são acumulados com estatisticas.Agregado e os intervalos de
+abrangência saem dos quantis da amostra completa (float64, 8 bytes por
+sorteio). 10⁶ sorteios × 9 medidores levam cerca de 0,35 s.
+
+Uso:
+    from monte_carlo import simular_balanco
+    mc = simular_balanco(vol_entrada, {"Empresa A": 1.04e8, ...},
+                         u_entrada={"Tramo 101": 0.0106, ...},
+                         u_saida={"Empresa A": 0.0133, ...})
+    mc.intervalo_pct, mc.prob_inaceitavel
+"""
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from estatisticas import Agregado
+
+logger = logging.getLogger(__name__)
+
+N_AMOSTRAS = 1_000_000
+BLOCO = 100_000
+SEMENTE = 20250401
+FATOR_ABRANGENCIA = 2.0  # incertezas de INCERTEZAS tratadas como expandidas (≈95 %)
+
+# Coeficientes de correlação entre os erros relativos de pares de medidores
+# (nomes de INCERTEZAS); pares ausentes são independentes.
+CORRELACOES: dict[tuple[str, str], float] = {}
+
+
+@dataclass
+class ResultadoMonteCarlo:
+    """Distribuição da diferença entrada − saída obtida por ``simular_balanco``."""
+    n_amostras: int
+    semente: int
+    media_nm3: float
+    desvio_nm3: float
+    media_pct: float
+    desvio_pct: float
+    cobertura: float
+    intervalo_nm3: tuple[float, float]
+    intervalo_pct: tuple[float, float]
+    limite_pct: float
+    prob_inaceitavel: float
+
+    @property
+    def zero_no_intervalo(self) -> bool:
+        """Diferença nula compatível com as medições (análogo à sobreposição das bandas RSS)."""
+        return self.intervalo_pct[0] <= 0 <= self.intervalo_pct[1]
+
+
+def _fator_correlacao(nomes: list[str], correlacoes: dict[tuple[str, str], float]) -> np.ndarray | None:
+    """Fator de Cholesky da matriz de correlação (None se todos forem independentes)."""
+    if not correlacoes:
+        return None
+    idx = {nome: i for i, nome in enumerate(nomes)}
+    r = np.eye(len(nomes))
+    for (a, b), rho in correlacoes.items():
+        if a in idx and b in idx:
+            r[idx[a], idx[b]] = r[idx[b], idx[a]] = rho
+    try:
+        return np.linalg.cholesky(r)
+    except np.linalg.LinAlgError:
+        raise ValueError("Matriz de correlação entre medidores não é positiva definida")
+
+
+def simular_balanco(
+    vol_entrada: float,
+    volumes_saida: dict[str, float],
+    u_entrada: dict[str, float],
+    u_saida: dict[str, float],
+    correlacoes: dict[tuple[str, str], float] | None = None,
+    n_amostras: int = N_AMOSTRAS,
+    semente: int = SEMENTE,
+    bloco: int = BLOCO,
+    cobertura: float = 0.95,
+    limite_pct: float = 3.0,
+    fator_abrangencia: float = FATOR_ABRANGENCIA,
+) -> ResultadoMonteCarlo:
+    """Simula a diferença entrada − saída do balanço.
+
+    Args:
+        vol_entrada: Volume medido na entrada (Nm³).
+        volumes_saida: Volume medido por cliente (Nm³).
+        u_entrada: Incerteza expandida relativa de cada tramo de entrada (fração).
+        u_saida: Incerteza expandida relativa de cada cliente (fração); clientes
+            sem entrada aqui entram sem incerteza.
+        correlacoes: Pares de medidores -> coeficiente de correlação
+            (padrão: CORRELACOES).
+        limite_pct: |diferença| acima deste percentual da entrada é inaceitável.
+
+    Returns:
+        ResultadoMonteCarlo com média, desvio, intervalo de abrangência
+        (quantis simétricos) e P(|diferença| > limite_pct).
+    """
+    correlacoes = CORRELACOES if correlacoes is None else correlacoes
+    nomes_entrada = list(u_entrada)
+    nomes_saida = list(volumes_saida)
+    nomes = nomes_entrada + nomes_saida
+    ne = len(nomes_entrada)
+
+    sigma_entrada = np.array([u_entrada[n] for n in nomes_entrada]) / fator_abrangencia
+    vols = np.array([volumes_saida[n] for n in nomes_saida], dtype=np.float64)
+    sigma_saida = np.array([u_saida.get(n, 0.0) for n in nomes_saida]) / fator_abrangencia
+    # Sensibilidades: variação absoluta de cada volume por unidade de erro padronizado
+    w_entrada = vol_entrada * sigma_entrada
+    w_saida = vols * sigma_saida
+    dif_medida = vol_entrada - vols.sum()
+    fator = _fator_correlacao(nomes, correlacoes)
+
+    rng = np.random.default_rng(semente)
+    dif_nm3 = np.empty(n_amostras)
+    dif_pct = np.empty(n_amostras)
+    agg_nm3, agg_pct = Agregado(), Agregado()
+    for ini in range(0, n_amostras, bloco):
+        fim = min(ini + bloco, n_amostras)
+        z = rng.standard_normal((fim - ini, len(nomes)))
+        if fator is not None:
+            z = z @ fator.T
+        entrada = vol_entrada + z[:, :ne] @ w_entrada
+        d = dif_medida + z[:, :ne] @ w_entrada - z[:, ne:] @ w_saida
+        dif_nm3[ini:fim] = d
+        dif_pct[ini:fim] = d / entrada * 100
+        agg_nm3.atualizar(dif_nm3[ini:fim])
+        agg_pct.atualizar(dif_pct[ini:fim])
+
+    q = [(1 - cobertura) / 2, (1 + cobertura) / 2]
+    lo_nm3, hi_nm3 = np.quantile(dif_nm3, q)
+    lo_pct, hi_pct = np.quantile(dif_pct, q)
+    resultado = ResultadoMonteCarlo(
+        n_amostras=n_amostras,
+        semente=semente,
+        media_nm3=agg_nm3.media,
+        desvio_nm3=agg_nm3.desvio,
+        media_pct=agg_pct.media,
+        desvio_pct=agg_pct.desvio,
+        cobertura=cobertura,
+        intervalo_nm3=(float(lo_nm3), float(hi_nm3)),
+        intervalo_pct=(float(lo_pct), float(hi_pct)),
+        limite_pct=limite_pct,
+        prob_inaceitavel=float(np.mean(np.abs(dif_pct) > limite_pct)),
+    )
+    logger.info(
+        f"  Monte Carlo ({n_amostras:,} sorteios): diferença = {resultado.media_pct:.2f}% "
+        f"[{lo_pct:.2f}% ; {hi_pct:.2f}%], P(|dif| > {limite_pct:.1f}%) = {resultado.prob_inaceitavel:.4f}"
+    )
+    return resultado
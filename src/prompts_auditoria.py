@@ -10,7 +10,11 @@ Cada função retorna (system_prompt, section_prompt, lista_de_graficos_png).
 # =====================================================================
 # DIRETÓRIO DE DIAGRAMAS (para Capítulo 1)
 # =====================================================================
+import numpy as np
+
 from config import DIAGRAMAS_DIR
+from dados_distrito import PerfisClientes, clientes_incompletos
+from qualidade_dados import COMPLETUDE_ALERTA_PCT
 
 # =====================================================================
 # SYSTEM PROMPTS ESPECIALIZADOS
@@ -175,7 +179,7 @@ CHAPTER_CONFIG = {
         "titulo_docx": "4. Cálculo e Validação de Energia",
         "metodologia_file": "secao_4_energia.md",
         "special": False,
-        "tabela_key": "secao_4_energia",
+        "tabela_key": ["secao_4_energia", "secao_4_energia_clientes"],
         "graph_files": [
             "energia_serie.png",
             "energia_diferencas.png",
@@ -191,7 +195,7 @@ CHAPTER_CONFIG = {
         "diagram_files": [],
         "diagram_captions": {},
         "tema_metodologia": "cálculo de energia (E = V × PCS), validação computacional, correlação volume-energia, importância do faturamento energético",
-        "tema_dados": "energia média diária, energia total no período, validação do cálculo contra a planilha, correlação r entre volume e energia",
+        "tema_dados": "energia média diária, energia total no período, validação do cálculo contra a planilha, correlação r entre volume e energia, energia horária por cliente e balanço energético entrada vs clientes",
         "graph_descriptions": """1. Série temporal da energia diária (Concessionária vs Transportadora) em Gcal/dia
 2. Diferenças de energia (Gcal) entre Concessionária e Transportadora ao longo do tempo
 3. Energia acumulada mensal — gráfico de barras agrupadas (Concessionária vs Transportadora)
@@ -202,7 +206,7 @@ CHAPTER_CONFIG = {
         "titulo_docx": "5. Perfis de Consumo dos Clientes",
         "metodologia_file": "secao_5_clientes.md",
         "special": False,
-        "tabela_key": "secao_5_clientes",
+        "tabela_key": ["secao_5_clientes", "secao_5_conversao"],
         "graph_files": [
             "clientes_participacao.png",
             "clientes_serie.png",
@@ -210,6 +214,7 @@ CHAPTER_CONFIG = {
             "clientes_heatmap.png",
             "clientes_pressao_temp.png",
             "clientes_boxplot.png",
+            "clientes_heatmap_todos.png",
         ],
         "graph_captions": {
             "clientes_participacao.png": "Figura 5.1: Participação volumétrica dos clientes",
@@ -218,17 +223,19 @@ CHAPTER_CONFIG = {
             "clientes_heatmap.png": "Figura 5.4: Heatmap de consumo da Empresa A",
             "clientes_pressao_temp.png": "Figura 5.5: Condições operacionais (pressão e temperatura)",
             "clientes_boxplot.png": "Figura 5.6: Distribuição comparativa de volumes por cliente",
+            "clientes_heatmap_todos.png": "Figura 5.7: Heatmaps de consumo de todos os clientes",
         },
         "diagram_files": [],
         "diagram_captions": {},
         "tema_metodologia": "perfis de consumo individual, fator de carga, condições operacionais (pressão, temperatura), faixas de operação dos medidores, rangeabilidade",
-        "tema_dados": "volume total e participação percentual de cada cliente, fator de carga, vazão média/mín/máx, condições de pressão e temperatura, dados faltantes do Empresa D",
+        "tema_dados": "volume total e participação percentual de cada cliente, fator de carga, vazão média/mín/máx, condições de pressão e temperatura, dados faltantes por cliente e verificação da conversão PTZ (fatores de pressão, temperatura e compressibilidade)",
         "graph_descriptions": """1. Dois painéis: barras horizontais de volume total por cliente + gráfico donut de participação
 2. 7 painéis com séries temporais do volume horário por cliente (com média móvel 24h)
 3. 7 painéis com perfil médio horário por cliente (hora do dia, com banda de ±1 desvio padrão)
 4. Heatmap de consumo da Empresa A (Hora × Dia) — mostra padrões de operação contínua e paradas
 5. 7 painéis com pressão (eixo esquerdo) e temperatura (eixo direito) por cliente
-6. Boxplots comparativos de distribuição de volume por cliente""",
+6. Boxplots comparativos de distribuição de volume por cliente
+7. 7 painéis com heatmap Hora × Dia de cada cliente — compara regimes de operação e paradas entre clientes""",
     },
     6: {
         "titulo": "Cálculo de Incertezas de Medição",
@@ -263,27 +270,30 @@ $$U = k \\cdot U_c \\quad (k=2, \\text{95\\% de confiança})$$""",
         "titulo_docx": "7. Balanço de Massa com Bandas de Incerteza",
         "metodologia_file": "secao_7_balanco.md",
         "special": False,
-        "tabela_key": "secao_7_balanco",
+        "tabela_key": ["secao_7_balanco", "secao_7_balanco_diario"],
         "graph_files": [
             "balanco_barras.png",
             "balanco_waterfall.png",
             "balanco_bandas.png",
             "balanco_dashboard.png",
+            "balanco_diario.png",
         ],
         "graph_captions": {
             "balanco_barras.png": "Figura 7.1: Entrada vs Saída com bandas de incerteza",
             "balanco_waterfall.png": "Figura 7.2: Decomposição waterfall do balanço",
             "balanco_bandas.png": "Figura 7.3: Sobreposição das bandas de incerteza",
             "balanco_dashboard.png": "Figura 7.4: Dashboard do resultado do balanço",
+            "balanco_diario.png": "Figura 7.5: Balanço diário com bandas de incerteza",
         },
         "diagram_files": [],
         "diagram_captions": {},
         "tema_metodologia": "balanço de massa em sistemas de distribuição de gás, fórmula da diferença percentual, bandas de incerteza, critério de aceitação por sobreposição de bandas",
-        "tema_dados": "diferença de 1,09% entre entrada e saída, volumes transferidos, bandas de incerteza de entrada e saída, sobreposição das bandas",
+        "tema_dados": "diferença de 1,09% entre entrada e saída, volumes transferidos, bandas de incerteza de entrada e saída, sobreposição das bandas, balanço dia a dia e dias com maior diferença",
         "graph_descriptions": """1. Gráfico de barras Entrada vs Saída Total com barras de erro (bandas de incerteza)
 2. Gráfico waterfall decompondo o balanço: Entrada menos cada cliente = Diferença
 3. Visualização horizontal de sobreposição de bandas: banda de entrada vs banda de saída
-4. Dashboard de 3 painéis: barras de volumes, gauge mostrando 1,09%, painel resultado""",
+4. Dashboard de 3 painéis: barras de volumes, gauge mostrando 1,09%, painel resultado
+5. Balanço diário: entrada e saída de cada dia de gás com bandas de incerteza, e diferença diária (%) em barras (verde = bandas sobrepostas)""",
         "equacoes_extras": """
 IMPORTANTE: Use equações LaTeX:
 $$\\text{Dif\\%} = \\frac{V_{entrada} - \\sum V_{saída}}{V_{entrada}} \\times 100$$
@@ -395,8 +405,28 @@ Separe as duas partes com uma linha contendo apenas: ---SEPARADOR---
 # CAPÍTULO 1 — CASO ESPECIAL (conteúdo + síntese)
 # =====================================================================
 
-def prompt_secao1_conteudo(metodologia_text: str):
-    """Capítulo 1: Conteúdo com diagramas passados como imagens."""
+# Completude da planilha de referência, usada quando não há completude extraída
+_COMPLETUDE_PADRAO = "- Empresa D: 57% de registros horários faltantes (NaN)\n"
+
+
+def _linhas_completude(perfis: PerfisClientes | None) -> str:
+    """Itens da lista de contexto com a completude dos dados horários de cada cliente."""
+    if perfis is None or np.isnan(perfis.clientes.colunas["completude_pct"]).all():
+        return _COMPLETUDE_PADRAO
+    incompletos, restantes = clientes_incompletos(perfis)
+    linhas = [f"- {nome}: {faltantes:.0f}% de registros horários faltantes (NaN)" for nome, faltantes in incompletos]
+    if restantes:
+        linhas.append(f"- Mais {restantes} clientes com menos de {COMPLETUDE_ALERTA_PCT:.0f}% das horas com dados")
+    if not linhas and (perfis.clientes.colunas["completude_pct"] >= COMPLETUDE_ALERTA_PCT).any():
+        linhas.append(f"- Todos os clientes com pelo menos {COMPLETUDE_ALERTA_PCT:.0f}% das horas com dados")
+    return "".join(f"{linha}\n" for linha in linhas)
+
+
+def prompt_secao1_conteudo(metodologia_text: str, perfis: PerfisClientes | None = None):
+    """Capítulo 1: Conteúdo com diagramas passados como imagens.
+
+    ``perfis`` (capítulo 5 extraído) fornece a completude dos dados de cada cliente.
+    """
     prompt = f"""## Capítulo 1: Visão Geral do Distrito e Dados Disponíveis
 
 ### Contexto Metodológico
@@ -410,8 +440,7 @@ def prompt_secao1_conteudo(metodologia_text: str):
   Empresa D, Empresa E, Empresa F, Empresa G
 - Dados diários de entrada: volume (Nm³/d), PCS (kcal/m³), energia (kcal)
 - Dados horários de clientes: volume (Nm³/h), pressão (bar_a), temperatura (°C)
-- Empresa D: 57% de registros horários faltantes (NaN)
-- Comparação Concessionária vs Transportadora em todas as medições de entrada
+{_linhas_completude(perfis)}- Comparação Concessionária vs Transportadora em todas as medições de entrada
 
 ### Diagramas Anexos (3 imagens)
 1. Diagrama da estrutura/topologia do distrito de distribuição de gás natural
@@ -458,7 +487,7 @@ Com base no conteúdo acima, escreva:
 
 2. **Parecer Regulatório**: Comece com "### Parecer Regulatório".
    Os dados são suficientes e adequados para uma auditoria regulatória?
-   Comente sobre a qualidade dos dados (completude, dados faltantes do Empresa D).
+   Comente sobre a qualidade dos dados (completude, dados faltantes por cliente).
 
 Separe as duas partes com uma linha contendo apenas: ---SEPARADOR---
 """
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de lacunas e qualidade dos dados, em codificação por carreiras (RLE).
+
+Cada série (coluna de um cliente ou série diária da entrada) é percorrida
+uma vez na carga e cada posição do período recebe um código:
+
+    0 ok          valor presente e plausível
+    1 faltante    hora/dia sem valor (linha ausente ou NaN)
+    2 congelado   mesmo valor repetido por ``MIN_CONGELADO`` posições ou mais
+    3 negativo    valor negativo em grandeza que não admite sinal
+    4 fora_faixa  valor fora da faixa física da grandeza
+    5 duplicado   carimbo repetido na origem (valores agregados pela média)
+
+Só as carreiras com código ≠ 0 são guardadas (início, comprimento,
+código): poucos bytes por falha em vez de um byte por hora. Com as somas
+acumuladas dos comprimentos por código, a contagem de qualquer código num
+intervalo [início, fim) sai de duas buscas binárias — O(log n) no número
+de carreiras — sem voltar aos DataFrames.
+
+Uso:
+    q = snapshot.qualidade
+    q["Cliente #4/Volume_Nm3h"].completude_pct()
+    q["Cliente #1/Pressao_bara"].contagens("2025-06-01", "2025-07-01")["congelado"]
+"""
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from correcao_ptz import FAIXA_PRESSAO_BARA, FAIXA_TEMPERATURA_C
+from dados_horarios import COLUNAS, horas_epoch
+
+logger = logging.getLogger(__name__)
+
+OK, FALTANTE, CONGELADO, NEGATIVO, FORA_FAIXA, DUPLICADO = range(6)
+CODIGOS = ("ok", "faltante", "congelado", "negativo", "fora_faixa", "duplicado")
+
+# Abaixo disso a completude de um cliente é destacada no texto e nos gráficos
+COMPLETUDE_ALERTA_PCT = 95.0
+
+# Repetições exatas a partir das quais o sensor é considerado congelado
+MIN_CONGELADO = {1: 24, 24: 7}  # passo (horas) -> posições
+
+# Regras por grandeza: (admite negativo, faixa física, zero repetido é válido)
+REGRAS = {
+    "Volume_Nm3h": (False, (0.0, np.inf), True),
+    "Pressao_bara": (False, FAIXA_PRESSAO_BARA, False),
+    "Temperatura_C": (True, FAIXA_TEMPERATURA_C, False),
+    # PCS: 35.000–43.000 kJ/m³ da especificação da ANP
+    "PCS_Conc_kcal": (False, (8_360.0, 10_270.0), False),
+    "PCS_Transp_kcal": (False, (8_360.0, 10_270.0), False),
+}
+REGRA_PADRAO = (False, (0.0, np.inf), True)
+
+
+def classificar(
+    valores: np.ndarray,
+    duplicadas: np.ndarray | None = None,
+    regra: tuple = REGRA_PADRAO,
+    min_congelado: int = MIN_CONGELADO[1],
+) -> np.ndarray:
+    """Código de qualidade (uint8) de cada posição de uma série densa.
+
+    Args:
+        valores: Série densa (uma posição por passo, NaN onde falta).
+        duplicadas: Máscara das posições com carimbo repetido na origem.
+        regra: (admite negativo, (mínimo, máximo), zero repetido é válido).
+        min_congelado: Tamanho mínimo da carreira de valores idênticos.
+    """
+    x = np.asarray(valores, dtype=np.float64)
+    negativo_ok, (vmin, vmax), zero_ok = regra
+    cod = np.zeros(x.size, dtype=np.uint8)
+    if duplicadas is not None:
+        cod[duplicadas] = DUPLICADO
+
+    # Carreiras de valores idênticos e consecutivos
+    if x.size > 1 and min_congelado > 1:
+        igual = x[1:] == x[:-1]
+        if zero_ok:
+            igual &= x[1:] != 0
+        ini, comp, _ = rle(np.concatenate([[False], igual]).astype(np.uint8))
+        longa = comp + 1 >= min_congelado
+        marca = np.zeros(x.size + 1, dtype=np.int32)
+        marca[ini[longa] - 1] += 1
+        marca[ini[longa] + comp[longa]] -= 1
+        cod[np.cumsum(marca[:-1]) > 0] = CONGELADO
+
+    with np.errstate(invalid="ignore"):
+        cod[(x < vmin) | (x > vmax)] = FORA_FAIXA
+        if not negativo_ok:
+            cod[x < 0] = NEGATIVO
+    cod[np.isnan(x)] = FALTANTE
+    return cod
+
+
+def rle(codigos: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Carreiras com código ≠ 0: (inícios int64, comprimentos int32, códigos uint8)."""
+    c = np.asarray(codigos)
+    if not c.size:
+        return np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.uint8)
+    mudancas = np.flatnonzero(c[1:] != c[:-1]) + 1
+    ini = np.concatenate([[0], mudancas])
+    fim = np.concatenate([mudancas, [c.size]])
+    cod = c[ini]
+    manter = cod != OK
+    return ini[manter].astype(np.int64), (fim - ini)[manter].astype(np.int32), cod[manter].astype(np.uint8)
+
+
+@dataclass(eq=False)
+class SerieQualidade:
+    """Carreiras de falhas de uma série: posição p cobre [t0 + p, t0 + p + 1) passos."""
+    t0: int
+    n: int
+    inicios: np.ndarray
+    comprimentos: np.ndarray
+    codigos: np.ndarray
+    passo_horas: int = 1
+
+    @classmethod
+    def de_codigos(cls, t0: int, codigos: np.ndarray, passo_horas: int = 1) -> "SerieQualidade":
+        return cls(t0, int(codigos.size), *rle(codigos), passo_horas=passo_horas)
+
+    @cached_property
+    def _fins(self) -> np.ndarray:
+        return self.inicios + self.comprimentos
+
+    @cached_property
+    def _acumulado(self) -> np.ndarray:
+        """Somas acumuladas (len(CODIGOS), R + 1) dos comprimentos por código."""
+        por_codigo = np.zeros((len(CODIGOS), self.inicios.size), dtype=np.int64)
+        por_codigo[self.codigos, np.arange(self.inicios.size)] = self.comprimentos
+        return np.concatenate([np.zeros((len(CODIGOS), 1), np.int64), np.cumsum(por_codigo, axis=1)], axis=1)
+
+    def _posicao(self, quando, padrao: int) -> int:
+        if quando is None:
+            return padrao
+        h = int(horas_epoch(np.array([pd.Timestamp(quando).to_datetime64()]))[0])
+        return min(max(h // self.passo_horas - self.t0, 0), self.n)
+
+    def contagens(self, inicio=None, fim=None) -> dict[str, int]:
+        """Posições de cada código no intervalo [inicio, fim) (datas; None = limite da série)."""
+        a, b = self._posicao(inicio, 0), self._posicao(fim, self.n)
+        total = np.zeros(len(CODIGOS), dtype=np.int64)
+        i = int(np.searchsorted(self._fins, a, side="right"))
+        j = int(np.searchsorted(self.inicios, b, side="left"))
+        if i < j:
+            total += self._acumulado[:, j] - self._acumulado[:, i]
+            # Carreiras cortadas pelas bordas do intervalo
+            total[self.codigos[i]] -= max(0, a - int(self.inicios[i]))
+            total[self.codigos[j - 1]] -= max(0, int(self._fins[j - 1]) - b)
+        total[OK] = max(b - a, 0) - int(total[1:].sum())
+        return dict(zip(CODIGOS, total.tolist()))
+
+    def completude_pct(self, inicio=None, fim=None) -> float | None:
+        """Percentual das posições com valor (não faltantes) no intervalo."""
+        c = self.contagens(inicio, fim)
+        n = sum(c.values())
+        return (n - c["faltante"]) / n * 100 if n else None
+
+    def validas_pct(self, inicio=None, fim=None) -> float | None:
+        """Percentual das posições sem nenhuma falha no intervalo."""
+        c = self.contagens(inicio, fim)
+        n = sum(c.values())
+        return c["ok"] / n * 100 if n else None
+
+    @property
+    def nbytes(self) -> int:
+        return self.inicios.nbytes + self.comprimentos.nbytes + self.codigos.nbytes
+
+
+@dataclass(eq=False)
+class IndiceQualidade:
+    """Séries de qualidade por chave ("<aba ou conjunto>/<coluna>")."""
+    series: dict[str, SerieQualidade] = field(default_factory=dict)
+
+    def __getitem__(self, chave: str) -> SerieQualidade:
+        return self.series[chave]
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self.series
+
+    def __or__(self, outro: "IndiceQualidade") -> "IndiceQualidade":
+        return IndiceQualidade({**self.series, **outro.series})
+
+    def resumo(self) -> list[dict]:
+        """Uma linha por série: chave, posições, contagem de cada código e completude %."""
+        linhas = []
+        for chave, s in self.series.items():
+            c = s.contagens()
+            linhas.append({"serie": chave, "posicoes": s.n, **c, "completude_pct": s.completude_pct()})
+        return linhas
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.nbytes for s in self.series.values())
+
+
+def qualidade_clientes(horas: np.ndarray, valores: np.ndarray, abas: list[str],
+                       duplicadas: dict[str, np.ndarray] | None = None) -> IndiceQualidade:
+    """Índice das colunas de todos os clientes a partir da grade horária (C, 3, H).
+
+    O período, comum a todos, vai da primeira à última hora com algum valor
+    em qualquer cliente: horas ausentes da grade contam como faltantes.
+    """
+    duplicadas = duplicadas or {}
+    algum = np.flatnonzero(~np.all(np.isnan(valores), axis=(0, 1))) if horas.size else horas
+    if not algum.size:
+        return IndiceQualidade({f"{aba}/{col}": SerieQualidade.de_codigos(0, np.empty(0, np.uint8))
+                                for aba in abas for col in COLUNAS})
+    trecho = slice(algum[0], algum[-1] + 1)
+    t0 = int(horas[trecho][0])
+    n = int(horas[trecho][-1]) - t0 + 1
+    pos = horas[trecho] - t0
+    series = {}
+    for i, aba in enumerate(abas):
+        dup = np.zeros(n, dtype=bool)
+        d = np.asarray(duplicadas.get(aba, []), dtype=np.int64) - t0
+        dup[d[(d >= 0) & (d < n)]] = True
+        for j, col in enumerate(COLUNAS):
+            denso = np.full(n, np.nan)
+            denso[pos] = valores[i, j, trecho]
+            series[f"{aba}/{col}"] = SerieQualidade.de_codigos(
+                t0, classificar(denso, dup, REGRAS.get(col, REGRA_PADRAO)))
+    return IndiceQualidade(series)
+
+
+def qualidade_diaria(df: pd.DataFrame, colunas: list[str], prefixo: str) -> IndiceQualidade:
+    """Índice das colunas de uma aba diária (Data + colunas); dias ausentes contam como faltantes."""
+    dias = horas_epoch(df["Data"].to_numpy("datetime64[ns]")) // 24
+    series = {}
+    if not dias.size:
+        return IndiceQualidade({f"{prefixo}/{col}": SerieQualidade.de_codigos(0, np.empty(0, np.uint8), 24)
+                                for col in colunas})
+    d0 = int(dias.min())
+    n = int(dias.max()) - d0 + 1
+    unicos, contagem = np.unique(dias, return_counts=True)
+    dup = np.zeros(n, dtype=bool)
+    dup[unicos[contagem > 1] - d0] = True
+    for col in colunas:
+        denso = np.full(n, np.nan)
+        denso[dias - d0] = df[col].to_numpy(np.float64)   # repetidos: fica o último
+        series[f"{prefixo}/{col}"] = SerieQualidade.de_codigos(
+            d0, classificar(denso, dup, REGRAS.get(col, REGRA_PADRAO), MIN_CONGELADO[24]), passo_horas=24)
+    return IndiceQualidade(series)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Variantes leves de cada gráfico, uma por consumidor.
+
+O PNG mestre (150 dpi, ~2.400–3.000 px de largura) é a fonte de todas as
+variantes e continua sendo o arquivo servido por ``/files/graficos``.
+Cada perfil grava uma cópia reduzida numa subpasta do diretório de gráficos:
+
+    llm          llm/<nome>.png        lado maior ≤ 1280 px, PNG com paleta de
+                                       64 cores (anexos das chamadas ao Gemini)
+    impressao    impressao/<nome>.png  largura ≤ 1950 px (300 dpi a 6,5"),
+                                       PNG com paleta de 256 cores (DOCX e PPTX)
+    web          web/<nome>.webp       miniatura WebP de 640 px (galeria web)
+
+A paleta é calculada por cobertura máxima (Quantize.MAXCOVERAGE), sem
+pontilhamento: o fundo branco e as cores sólidas saem exatos e o erro
+por pixel fica limitado a poucos níveis nas bordas suavizadas e nos
+gradientes dos mapas de calor.
+
+As variantes são indexadas pelo SHA-256 do PNG mestre no armazém de
+cache_graficos: um gráfico restaurado do cache tem as variantes copiadas,
+sem nova conversão. Cada consumidor pede o seu perfil com ``variante``,
+que devolve o PNG mestre quando a variante não existe ou é mais antiga.
+
+Uso:
+    from variantes_graficos import gerar_variantes, variante
+    gerar_variantes(out / "pcs_serie.png")
+    client.analyze_section(..., [str(variante(GRAFICOS_DIR / "pcs_serie.png", "llm"))])
+"""
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+HAS_WEBP = features.check("webp")
+
+
+@dataclass(frozen=True)
+class PerfilImagem:
+    """Como derivar a variante de um consumidor a partir do PNG mestre."""
+    nome: str
+    formato: str                 # "PNG" ou "WEBP"
+    largura_max: int | None = None
+    lado_max: int | None = None
+    cores: int | None = None     # PNG com paleta (None = RGB)
+    qualidade: int = 80          # WebP
+
+    @property
+    def extensao(self) -> str:
+        return ".webp" if self.formato == "WEBP" else ".png"
+
+
+PERFIS = {
+    "llm": PerfilImagem("llm", "PNG", lado_max=1280, cores=64),
+    "impressao": PerfilImagem("impressao", "PNG", largura_max=1950, cores=256),
+    "web": PerfilImagem("web", "WEBP", largura_max=640, qualidade=80),
+}
+
+
+def _perfis_ativos() -> list[PerfilImagem]:
+    return [p for p in PERFIS.values() if p.formato != "WEBP" or HAS_WEBP]
+
+
+def caminho_variante(png: str | Path, perfil: str) -> Path:
+    """Caminho da variante ``perfil`` do PNG mestre ``png``."""
+    png, p = Path(png), PERFIS[perfil]
+    return png.parent / p.nome / f"{png.stem}{p.extensao}"
+
+
+def variante(png: str | Path, perfil: str) -> Path:
+    """Variante ``perfil`` de ``png`` se estiver atualizada; senão, o próprio PNG mestre."""
+    png = Path(png)
+    if perfil not in PERFIS:
+        return png
+    caminho = caminho_variante(png, perfil)
+    try:
+        if caminho.stat().st_mtime >= png.stat().st_mtime:
+            return caminho
+    except OSError:
+        pass
+    return png
+
+
+def variantes_atualizadas(png: str | Path) -> bool:
+    """True se todas as variantes de ``png`` existem e não são mais antigas que ele."""
+    return all(variante(png, p.nome) != Path(png) for p in _perfis_ativos())
+
+
+def _reduzir(img: Image.Image, p: PerfilImagem) -> Image.Image:
+    escala = 1.0
+    if p.largura_max:
+        escala = min(escala, p.largura_max / img.width)
+    if p.lado_max:
+        escala = min(escala, p.lado_max / max(img.size))
+    if escala >= 1.0:
+        return img
+    tamanho = (round(img.width * escala), round(img.height * escala))
+    return img.resize(tamanho, Image.Resampling.LANCZOS)
+
+
+def _converter(img: Image.Image, p: PerfilImagem, destino: Path):
+    img = _reduzir(img, p)
+    tmp = destino.with_name(f".{destino.name}.tmp-{os.getpid()}")
+    try:
+        if p.formato == "WEBP":
+            img.save(tmp, "WEBP", quality=p.qualidade, method=4)
+        else:
+            if p.cores:
+                img = img.quantize(colors=p.cores, method=Image.Quantize.MAXCOVERAGE, dither=Image.Dither.NONE)
+            img.save(tmp, "PNG")
+        os.replace(tmp, destino)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def gerar_variantes(png: str | Path, sha: str | None = None, usar_cache: bool = True) -> list[Path]:
+    """Grava as variantes de todos os perfis de ``png`` (copiadas do armazém quando possível).
+
+    Args:
+        png: PNG mestre recém-gerado.
+        sha: SHA-256 de ``png``, se já conhecido.
+        usar_cache: Procurar/guardar as variantes no armazém de cache_graficos.
+
+    Returns:
+        Caminhos das variantes gravadas. Falhas são registradas no log e o
+        consumidor correspondente usa o PNG mestre.
+    """
+    from cache_graficos import guardar_variante, restaurar_variante
+    from cache_planilha import hash_arquivo
+
+    png = Path(png)
+    if usar_cache and sha is None:
+        sha = hash_arquivo(png)
+    img = None
+    gravadas = []
+    for p in _perfis_ativos():
+        destino = caminho_variante(png, p.nome)
+        try:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            if usar_cache and restaurar_variante(sha, p.nome + p.extensao, destino):
+                gravadas.append(destino)
+                continue
+            if img is None:
+                with Image.open(png) as origem:
+                    img = origem.convert("RGB")
+            _converter(img, p, destino)
+            if usar_cache:
+                guardar_variante(sha, p.nome + p.extensao, destino)
+            gravadas.append(destino)
+        except OSError as e:
+            logger.warning(f"Falha ao gerar variante {p.nome} de {png.name}: {e}")
+    return gravadas
@@ -23,6 +23,7 @@ from config import (
     CACHE_DIR, REPORTS_DIR, PRESENT_DIR, EXCEL_DEFAULT, IS_VERCEL,
 )
 from prompts_auditoria import CHAPTER_CONFIG
+from variantes_graficos import variante
 
 # ---------------------------------------------------------------------------
 # App setup
@@ -220,7 +221,11 @@ async def serve_presentation(filename: str):
 # ---------------------------------------------------------------------------
 @app.get("/api/outputs/graficos")
 async def list_graficos():
-    """List all graph PNGs organized by chapter, with inline base64 data."""
+    """List all graphs organized by chapter, with an inline base64 thumbnail.
+
+    The thumbnail is the WebP web variant (the full PNG if it is missing);
+    the full-size PNG stays available at ``url``.
+    """
     result = {}
     for cap_num, cfg in CHAPTER_CONFIG.items():
         graphs = []
@@ -234,7 +239,9 @@ async def list_graficos():
                 "url": f"/files/graficos/{fname}",
             }
             if exists:
-                g["data_b64"] = base64.b64encode(fpath.read_bytes()).decode()
+                miniatura = variante(fpath, "web")
+                g["mime"] = "image/webp" if miniatura.suffix == ".webp" else "image/png"
+                g["data_b64"] = base64.b64encode(miniatura.read_bytes()).decode()
             graphs.append(g)
         if graphs:
             result[cap_num] = {
@@ -317,11 +324,15 @@ async def phase_extract(file: UploadFile = File(None)):
     excel_path = await ensure_excel_on_disk(file)
 
     try:
-        from extrator_dados import extrair_todos, salvar_json
+        from extrator_dados import extrair_todos, salvar_json, extrair_incertezas, extrair_indice_balanco
+        from graph_generator import carregar_snapshot
+        from indice_balanco import INDICE_DEFAULT
         CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        dados = extrair_todos(str(excel_path))
+        snapshot = carregar_snapshot(str(excel_path))
+        dados = extrair_todos(snapshot)
         json_path = CACHE_DIR / "extracted_data.json"
         salvar_json(dados, str(json_path))
+        extrair_indice_balanco(snapshot, extrair_incertezas()).salvar(INDICE_DEFAULT)
 
         # Build summary for response
         config = dados.get("config")
@@ -345,6 +356,7 @@ async def phase_extract(file: UploadFile = File(None)):
                 "n_clientes": len(perf.clientes),
                 "balanco_pct": bal.diferenca_pct,
                 "balanco_resultado": bal.resultado,
+                "balanco_prob_inaceitavel": bal.mc_prob_inaceitavel,
             },
         }
     except Exception as e:
@@ -379,19 +391,42 @@ async def phase_extract_preview():
         raise HTTPException(500, f"Erro ao carregar dados: {e}")
 
 
+@app.get("/api/query/balance")
+async def query_balance(start: str | None = None, end: str | None = None):
+    """Balanço de massa de um intervalo [start, end) qualquer, pelo índice de somas acumuladas.
+
+    start/end: datas ISO (ex.: 2025-06-01 ou 2025-06-01T05:00); ausentes = limites do período.
+    """
+    from indice_balanco import INDICE_DEFAULT, carregar_indice
+    if not INDICE_DEFAULT.exists():
+        raise HTTPException(404, "Índice de balanço não encontrado. Execute /api/phase/extract primeiro.")
+    mtime = INDICE_DEFAULT.stat().st_mtime
+    if _state.get("indice_mtime") != mtime:
+        _state["indice"] = carregar_indice(INDICE_DEFAULT)
+        _state["indice_mtime"] = mtime
+    try:
+        return _state["indice"].consultar(start, end)
+    except ValueError as e:
+        raise HTTPException(400, f"Intervalo inválido: {e}")
+
+
 @app.post("/api/phase/graphs")
-async def phase_graphs(file: UploadFile = File(None)):
-    """Phase 0b: Generate all graphs from Excel."""
+async def phase_graphs(file: UploadFile = File(None), only: str = Form("")):
+    """Phase 0b: Generate all graphs from Excel (or only the charts in ``only``, comma-separated ids)."""
     excel_path = await ensure_excel_on_disk(file)
+    somente = [i for i in only.split(",") if i.strip()] or None
 
     try:
         from graph_generator import gerar_todos_graficos
         GRAFICOS_DIR.mkdir(parents=True, exist_ok=True)
         gerados = gerar_todos_graficos(
-            excel_path=str(excel_path),
+            str(excel_path),
             output_dir=str(GRAFICOS_DIR),
+            somente=somente,
         )
         return {"status": "ok", "count": len(gerados), "files": gerados}
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, f"Erro ao gerar gráficos: {e}")
 
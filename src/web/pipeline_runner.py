@@ -164,7 +164,7 @@ class PipelineRunner:
                     "total": TOTAL_STEPS,
                 })
 
-            elif etype == "phase_complete":
+            elif etype in ("phase_complete", "substep_complete"):
                 self._emit(event)
 
     def _run(self, api_key: str, resume: bool, montar: bool):
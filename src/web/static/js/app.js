@@ -199,6 +199,11 @@ function connectSSE() {
         addLog(`  Concluído: ${data.step_label}`, 'step-complete');
     });
 
+    evtSource.addEventListener('substep_complete', (e) => {
+        const data = JSON.parse(e.data);
+        addLog(`    ${data.substep}: ${data.seconds.toFixed(2)} s`);
+    });
+
     evtSource.addEventListener('phase_complete', (e) => {
         const data = JSON.parse(e.data);
         updatePhase(data.phase, 'complete');
@@ -497,9 +502,10 @@ function renderGraficos(filter) {
         if (filter !== 'all' && String(capNum) !== String(filter)) continue;
         for (const g of capData.graphs) {
             if (!g.exists) continue;
-            const imgSrc = g.data_b64 ? `data:image/png;base64,${g.data_b64}` : g.url;
+            const imgSrc = g.data_b64 ? `data:${g.mime || 'image/png'};base64,${g.data_b64}` : g.url;
             const idx = lightboxImages.length;
-            lightboxImages.push({ url: imgSrc, caption: g.caption });
+            // Miniatura no card; o lightbox busca o PNG completo (e volta à miniatura se falhar)
+            lightboxImages.push({ url: g.url, fallback: imgSrc, caption: g.caption });
 
             const card = document.createElement('div');
             card.className = 'gallery-card';
@@ -569,6 +575,7 @@ function openLightbox(idx) {
 function updateLightbox() {
     const item = lightboxImages[lightboxIndex];
     if (!item) return;
+    lbImg.onerror = item.fallback ? () => { lbImg.onerror = null; lbImg.src = item.fallback; } : null;
     lbImg.src = item.url;
     lbCaption.textContent = item.caption;
 }